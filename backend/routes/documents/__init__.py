@@ -22,7 +22,7 @@ from fastapi import APIRouter
 
 from .utils import init_documents_module
 from .templates import router as templates_router
-from .signing import router as signing_router
+from .signing import router as signing_router, backfill_signing_tokens
 from .officers import router as officers_router
 from .pdf import router as pdf_router
 
@@ -36,16 +36,18 @@ router.include_router(signing_router)
 router.include_router(pdf_router)
 
 
-def init_router(database, token_verifier, admin_verifier):
+def init_router(database, token_verifier, admin_verifier, blob_store=None, pdf_service=None):
     """Initialize document signing module with dependencies
     
     Args:
         database: MongoDB database instance
         token_verifier: Async function to verify JWT tokens
         admin_verifier: Async function to verify admin tokens
+        blob_store: Shared BlobStore for template PDFs (created from database if omitted)
+        pdf_service: Shared PDFService process pool (created on first use if omitted)
     """
-    init_documents_module(database, token_verifier, admin_verifier)
+    init_documents_module(database, token_verifier, admin_verifier, blob_store, pdf_service)
 
 
 # Export for backwards compatibility
-__all__ = ['router', 'init_router']
+__all__ = ['router', 'init_router', 'backfill_signing_tokens']
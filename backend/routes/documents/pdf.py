@@ -5,20 +5,86 @@ Handles generation of signed PDFs with:
 - Filled form fields overlaid on PDF
 - Signatures overlaid at specified positions
 - Signature certificate page
+
+The final PDF is generated once when the signing workflow completes, stored in
+the blob store and its SHA-256 recorded in the audit trail; downloads stream it.
 """
 import sys
 import base64
-from datetime import datetime
+from datetime import datetime, timezone
 from io import BytesIO
+from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 
-from .utils import get_db, get_current_user
+from utils.blob_store import BlobNotFound
+from utils.pdf_service import PDFServiceError, PDFServiceTimeout
+
+from .utils import (
+    get_db, get_current_user, get_blob_store, get_pdf_service, has_template_pdf, load_template_pdf,
+    TEMPLATE_METADATA_PROJECTION
+)
 
 router = APIRouter()
 
 
+def signed_pdf_filename(template: dict, signing_request: dict) -> str:
+    filename = f"signed_{template['name']}_{signing_request['recipient_name']}.pdf"
+    return filename.replace(" ", "_")
+
+
+async def finalize_signed_document(signing_request_id: str) -> Optional[dict]:
+    """
+    Render the final signed PDF and store it, once per signing request.
+    Records the blob key and the PDF's SHA-256 in the audit trail and returns the
+    updated signing request, or None if there is nothing to finalize.
+    """
+    db = get_db()
+    
+    signing_request = await db.signing_requests.find_one({"id": signing_request_id}, {"_id": 0})
+    if not signing_request:
+        return None
+    if signing_request.get("signed_pdf_blob"):
+        return signing_request
+    
+    signature = await db.signatures.find_one({"signing_request_id": signing_request_id}, {"_id": 0})
+    template = await db.document_templates.find_one({"id": signing_request["template_id"]}, TEMPLATE_METADATA_PROJECTION)
+    if not signature or not template:
+        return None
+    
+    signed_pdf = await generate_signed_pdf(template, signing_request, signature)
+    store = get_blob_store()
+    blob = await store.put(signed_pdf, "application/pdf", signed_pdf_filename(template, signing_request))
+    
+    audit_update = {
+        "signed_document_hash": blob,  # Blob keys are the content's SHA-256
+        "signed_document_generated_at": datetime.now(timezone.utc).isoformat()
+    }
+    # Dotted keys need an audit_trail object to write into
+    await db.signing_requests.update_one(
+        {"id": signing_request_id, "audit_trail": None},
+        {"$set": {"audit_trail": {}}}
+    )
+    
+    # First writer wins, so every download gets the same bytes and hash. Only the
+    # new audit fields are set, so concurrent audit updates are kept.
+    result = await db.signing_requests.update_one(
+        {"id": signing_request_id, "signed_pdf_blob": {"$exists": False}},
+        {"$set": {
+            "signed_pdf_blob": blob,
+            "signed_pdf_size": len(signed_pdf),
+            **{f"audit_trail.{field}": value for field, value in audit_update.items()}
+        }}
+    )
+    if not result.modified_count:
+        await store.release(blob)
+        return await db.signing_requests.find_one({"id": signing_request_id}, {"_id": 0})
+    
+    sys.stderr.write(f"[DOCS] Stored signed PDF for {signing_request_id} (sha256 {blob[:12]}...)\n")
+    return await db.signing_requests.find_one({"id": signing_request_id}, {"_id": 0})
+
+
 @router.get("/signed/{request_id}/download")
 async def download_signed_document(
     request_id: str,
@@ -30,75 +96,103 @@ async def download_signed_document(
     signing_request = await db.signing_requests.find_one({
         "id": request_id,
         "status": {"$in": ["signed", "completed"]}
-    })
+    }, {"_id": 0})
     if not signing_request:
         raise HTTPException(status_code=404, detail="Signed document not found")
     
-    signature = await db.signatures.find_one({"signing_request_id": request_id})
-    if not signature:
-        raise HTTPException(status_code=404, detail="Signature not found")
-    
-    template = await db.document_templates.find_one({"id": signing_request["template_id"]})
+    template = await db.document_templates.find_one(
+        {"id": signing_request["template_id"]},
+        {"_id": 0, "name": 1}
+    )
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    signed_pdf = await generate_signed_pdf(template, signing_request, signature)
+    if not signing_request.get("signed_pdf_blob"):
+        # Completed before signed PDFs were stored, or generation failed at completion
+        if not await db.signatures.find_one({"signing_request_id": request_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Signature not found")
+        try:
+            signing_request = await finalize_signed_document(request_id)
+        except PDFServiceTimeout:
+            raise HTTPException(status_code=503, detail="Signed PDF generation timed out, please try again")
+        except PDFServiceError as e:
+            sys.stderr.write(f"[DOCS] Signed PDF generation failed: {e}\n")
+            raise HTTPException(status_code=500, detail="Failed to generate signed PDF")
+        if not signing_request or not signing_request.get("signed_pdf_blob"):
+            raise HTTPException(status_code=404, detail="Signed document not found")
     
-    filename = f"signed_{template['name']}_{signing_request['recipient_name']}.pdf"
-    filename = filename.replace(" ", "_")
+    blob = signing_request["signed_pdf_blob"]
+    headers = {
+        "Content-Disposition": f"attachment; filename={signed_pdf_filename(template, signing_request)}",
+        "ETag": f'"{blob}"',
+        "X-Document-SHA256": blob
+    }
+    if signing_request.get("signed_pdf_size"):
+        headers["Content-Length"] = str(signing_request["signed_pdf_size"])
     
-    return StreamingResponse(
-        BytesIO(signed_pdf),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    try:
+        body = await get_blob_store().stream(blob)
+    except BlobNotFound:
+        raise HTTPException(status_code=404, detail="Signed document file not found")
+    return StreamingResponse(body, media_type="application/pdf", headers=headers)
 
 
 async def generate_signed_pdf(template: dict, signing_request: dict, signature: dict) -> bytes:
     """Generate a PDF with filled fields and signatures overlaid at specified positions"""
+    pdf_bytes = None
+    if template.get("template_type") == "pdf" and has_template_pdf(template):
+        pdf_bytes = await load_template_pdf(template)
+    
+    # Rendering runs in the PDF worker pool; send only plain data across
+    template = {k: v for k, v in template.items() if k not in ("_id", "pdf_data")}
+    signing_request = {k: v for k, v in signing_request.items() if k != "_id"}
+    signature = {k: v for k, v in signature.items() if k != "_id"}
     try:
-        import fitz  # PyMuPDF
-        
-        audit = signing_request.get("audit_trail", {})
-        filled_fields = signing_request.get("recipient_fields", {}) or {}
-        approval_chain = signing_request.get("approval_chain", [])
-        
-        if template.get("template_type") == "pdf" and template.get("pdf_data"):
-            pdf_bytes = base64.b64decode(template["pdf_data"])
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            field_placements = template.get("field_placements", [])
-            signature_placements = template.get("signature_placements", [])
-            
-            # Process each page
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_rect = page.rect
-                page_width = page_rect.width
-                page_height = page_rect.height
-                
-                # Overlay text fields
-                _overlay_text_fields(page, field_placements, filled_fields, page_num + 1, page_width, page_height)
-                
-                # Overlay signatures
-                _overlay_signatures(page, signature_placements, signature, approval_chain, audit, page_num + 1, page_width, page_height)
-            
-            # Add signature certificate page
-            _add_certificate_page(doc, template, signing_request, audit, approval_chain)
-            
-            output = BytesIO()
-            doc.save(output)
-            doc.close()
-            return output.getvalue()
-        else:
-            # Generate PDF from text template
-            return _generate_text_template_pdf(template, signing_request, signature, audit)
-            
+        return await get_pdf_service().run(render_signed_pdf, template, signing_request, signature, pdf_bytes)
     except ImportError as e:
         sys.stderr.write(f"[DOCS] PDF generation requires PyMuPDF: {e}\n")
         raise HTTPException(status_code=500, detail="PDF generation not available")
 
 
+def render_signed_pdf(template: dict, signing_request: dict, signature: dict, pdf_bytes: bytes = None) -> bytes:
+    """Build the signed PDF (runs in a PDF worker process)"""
+    import fitz  # PyMuPDF
+    
+    audit = signing_request.get("audit_trail", {})
+    filled_fields = signing_request.get("recipient_fields", {}) or {}
+    approval_chain = signing_request.get("approval_chain", [])
+    
+    if not pdf_bytes:
+        # Generate PDF from text template
+        return _generate_text_template_pdf(template, signing_request, signature, audit)
+    
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    
+    field_placements = template.get("field_placements", [])
+    signature_placements = template.get("signature_placements", [])
+    
+    # Process each page
+    for page_num in range(len(doc)):
+        page = doc[page_num]
+        page_rect = page.rect
+        page_width = page_rect.width
+        page_height = page_rect.height
+        
+        # Overlay text fields
+        _overlay_text_fields(page, field_placements, filled_fields, page_num + 1, page_width, page_height)
+        
+        # Overlay signatures
+        _overlay_signatures(page, signature_placements, signature, approval_chain, audit, page_num + 1, page_width, page_height)
+    
+    # Add signature certificate page
+    _add_certificate_page(doc, template, signing_request, audit, approval_chain)
+    
+    output = BytesIO()
+    doc.save(output)
+    doc.close()
+    return output.getvalue()
+
+
 def _overlay_text_fields(page, field_placements, filled_fields, page_num, page_width, page_height):
     """Overlay filled text fields on a PDF page"""
     import fitz
@@ -6,25 +6,137 @@ Handles document signing workflow:
 - Get signing requests list and details
 - Cancel/delete signing requests
 - Submit signatures (recipient and approver)
+
+Public signing links resolve through the signing_tokens collection
+(token -> request id and signer), one indexed lookup per hit.
 """
 import sys
 import uuid
 import json
-import base64
 from datetime import datetime, timezone, timedelta
 from io import BytesIO
 
 from fastapi import APIRouter, HTTPException, Depends, Request, Form
 from fastapi.responses import StreamingResponse
 
+from utils.blob_store import BlobNotFound
+
 from .utils import (
     get_db, get_current_user, generate_signing_token, hash_document,
-    decrypt_email, check_document_permission, NATIONAL_OFFICERS
+    decrypt_email, check_document_permission, has_template_pdf, load_template_pdf, get_blob_store,
+    NATIONAL_OFFICERS, TEMPLATE_METADATA_PROJECTION
 )
 from .email import send_signing_email
+from .pdf import finalize_signed_document
 
 router = APIRouter()
 
+# Token entries outlive the link so expired links still get a 410, then are purged by TTL
+SIGNING_TOKEN_RETENTION_DAYS = 30
+# Marker in document_migrations written once existing requests' links have been indexed
+SIGNING_TOKEN_BACKFILL_ID = "signing_tokens_backfill"
+
+
+# =============================================================================
+# SIGNING TOKEN LOOKUP
+# =============================================================================
+
+def _signing_token_entries(signing_request: dict) -> list:
+    """signing_tokens documents for a request's recipient and approver links"""
+    expires_at = signing_request["expires_at"]
+    purge_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00')) + timedelta(days=SIGNING_TOKEN_RETENTION_DAYS)
+    entries = [{
+        "token": signing_request["signing_token"],
+        "request_id": signing_request["id"],
+        "role": "recipient",
+        "approver_index": None,
+        "expires_at": expires_at,
+        "purge_at": purge_at
+    }]
+    for i, approver in enumerate(signing_request.get("approval_chain") or []):
+        if approver.get("signing_token"):
+            entries.append({
+                "token": approver["signing_token"],
+                "request_id": signing_request["id"],
+                "role": "approver",
+                "approver_index": i,
+                "expires_at": expires_at,
+                "purge_at": purge_at
+            })
+    return entries
+
+
+async def register_signing_tokens(db, signing_request: dict):
+    """Index a new request's signing links"""
+    await db.signing_tokens.insert_many(_signing_token_entries(signing_request))
+
+
+async def _upsert_signing_tokens(db, signing_request: dict):
+    """Index a request's signing links, keeping entries that already exist"""
+    for entry in _signing_token_entries(signing_request):
+        await db.signing_tokens.update_one(
+            {"token": entry["token"]},
+            {"$setOnInsert": entry},
+            upsert=True
+        )
+
+
+async def resolve_signing_token(db, signing_token: str):
+    """
+    Find the signing request behind a public link.
+    Returns (signing_request, approver_index); approver_index is -1 for the
+    recipient's link, and signing_request is None for unknown tokens.
+    """
+    entry = await db.signing_tokens.find_one(
+        {"token": signing_token},
+        {"_id": 0, "request_id": 1, "approver_index": 1}
+    )
+    if entry:
+        signing_request = await db.signing_requests.find_one({"id": entry["request_id"]})
+        approver_index = entry.get("approver_index")
+        return signing_request, -1 if approver_index is None else approver_index
+    
+    # Not indexed (sent before signing_tokens, or its entry was purged): look it up on the request
+    signing_request = await db.signing_requests.find_one({"signing_token": signing_token})
+    approver_index = -1
+    if not signing_request:
+        signing_request = await db.signing_requests.find_one({"approval_chain.signing_token": signing_token})
+        if not signing_request:
+            return None, -1
+        approver_index = next(
+            i for i, approver in enumerate(signing_request.get("approval_chain") or [])
+            if approver.get("signing_token") == signing_token
+        )
+    await _upsert_signing_tokens(db, signing_request)
+    return signing_request, approver_index
+
+
+async def backfill_signing_tokens() -> int:
+    """
+    Index links of requests sent before signing_tokens existed, once. Links of
+    requests outside the retention window are indexed on first use instead.
+    """
+    db = get_db()
+    if await db.document_migrations.find_one({"id": SIGNING_TOKEN_BACKFILL_ID}, {"_id": 1}):
+        return 0
+    
+    oldest = (datetime.now(timezone.utc) - timedelta(days=SIGNING_TOKEN_RETENTION_DAYS)).isoformat()
+    cursor = db.signing_requests.find(
+        {"expires_at": {"$gte": oldest}, "signing_token": {"$exists": True}},
+        {"_id": 0, "id": 1, "signing_token": 1, "expires_at": 1, "approval_chain.signing_token": 1}
+    )
+    backfilled = 0
+    async for signing_request in cursor:
+        await _upsert_signing_tokens(db, signing_request)
+        backfilled += 1
+    
+    await db.document_migrations.update_one(
+        {"id": SIGNING_TOKEN_BACKFILL_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc).isoformat(), "requests": backfilled}},
+        upsert=True
+    )
+    return backfilled
+
 
 # =============================================================================
 # SIGNING REQUEST MANAGEMENT
@@ -48,7 +160,10 @@ async def send_document_for_signing(
         raise HTTPException(status_code=403, detail="Permission denied")
     
     # Get template
-    template = await db.document_templates.find_one({"id": template_id, "is_active": True})
+    template = await db.document_templates.find_one(
+        {"id": template_id, "is_active": True},
+        TEMPLATE_METADATA_PROJECTION
+    )
     if not template:
         raise HTTPException(status_code=404, detail="Template not found or inactive")
     
@@ -90,6 +205,7 @@ async def send_document_for_signing(
     }
     
     await db.signing_requests.insert_one(signing_request)
+    await register_signing_tokens(db, signing_request)
     
     # Send email notification
     await send_signing_email(
@@ -221,7 +337,7 @@ async def cancel_or_delete_signing_request(
     if not check_document_permission(current_user):
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    doc = await db.signing_requests.find_one({"id": request_id}, {"status": 1})
+    doc = await db.signing_requests.find_one({"id": request_id}, {"status": 1, "signed_pdf_blob": 1})
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     
@@ -232,6 +348,8 @@ async def cancel_or_delete_signing_request(
         if permanent:
             await db.signing_requests.delete_one({"id": request_id})
             await db.signatures.delete_many({"signing_request_id": request_id})
+            await db.signing_tokens.delete_many({"request_id": request_id})
+            await get_blob_store().release(doc.get("signed_pdf_blob"))
             sys.stderr.write(f"[DOCS] Permanently deleted {request_id} by {current_user.get('username')}\n")
             return {"success": True, "message": "Document permanently deleted"}
         return {"success": True, "message": f"Document already {current_status}"}
@@ -257,28 +375,14 @@ async def get_signing_page(signing_token: str, request: Request):
     """Get document for signing (public endpoint)"""
     db = get_db()
     
-    # Check if recipient or approver token
-    signing_request = await db.signing_requests.find_one({"signing_token": signing_token})
-    is_approver = False
-    approver_info = None
-    approver_index = -1
-    
-    if not signing_request:
-        # Check approver tokens
-        signing_request = await db.signing_requests.find_one({
-            "approval_chain.signing_token": signing_token
-        })
-        if signing_request:
-            is_approver = True
-            for i, approver in enumerate(signing_request.get("approval_chain", [])):
-                if approver.get("signing_token") == signing_token:
-                    approver_info = approver
-                    approver_index = i
-                    break
-    
+    # Recipient or approver token
+    signing_request, approver_index = await resolve_signing_token(db, signing_token)
     if not signing_request:
         raise HTTPException(status_code=404, detail="Invalid or expired signing link")
     
+    is_approver = approver_index >= 0
+    approver_info = signing_request["approval_chain"][approver_index] if is_approver else None
+    
     # Check expiration
     expires_at = datetime.fromisoformat(signing_request["expires_at"].replace('Z', '+00:00'))
     if datetime.now(timezone.utc) > expires_at:
@@ -306,12 +410,15 @@ async def get_signing_page(signing_token: str, request: Request):
         # Mark as viewed
         if signing_request["status"] in ["pending", "pending_recipient"]:
             await db.signing_requests.update_one(
-                {"signing_token": signing_token},
+                {"id": signing_request["id"]},
                 {"$set": {"status": "viewed", "viewed_at": datetime.now(timezone.utc).isoformat()}}
             )
     
     # Get template
-    template = await db.document_templates.find_one({"id": signing_request["template_id"]})
+    template = await db.document_templates.find_one(
+        {"id": signing_request["template_id"]},
+        TEMPLATE_METADATA_PROJECTION
+    )
     if not template:
         raise HTTPException(status_code=404, detail="Document template not found")
     
@@ -326,7 +433,7 @@ def _build_signing_page_response(template, signing_request, is_approver, approve
         "template_name": template["name"],
         "template_type": template["template_type"],
         "text_content": template.get("text_content"),
-        "has_pdf": template.get("pdf_data") is not None,
+        "has_pdf": has_template_pdf(template),
         "recipient_name": signing_request["recipient_name"],
         "recipient_email": signing_request["recipient_email"],
         "message": signing_request.get("message"),
@@ -381,27 +488,33 @@ async def get_signing_pdf(signing_token: str):
     """Get PDF document for display (public endpoint)"""
     db = get_db()
     
-    signing_request = await db.signing_requests.find_one({"signing_token": signing_token})
-    
-    if not signing_request:
-        signing_request = await db.signing_requests.find_one({
-            "approval_chain.signing_token": signing_token
-        })
-    
+    signing_request, _ = await resolve_signing_token(db, signing_token)
     if not signing_request:
         raise HTTPException(status_code=404, detail="Invalid signing link")
     
     if signing_request["status"] in ["completed", "cancelled", "expired"]:
         raise HTTPException(status_code=400, detail="Document not available")
     
-    template = await db.document_templates.find_one({"id": signing_request["template_id"]})
-    if not template or not template.get("pdf_data"):
+    template = await db.document_templates.find_one(
+        {"id": signing_request["template_id"]},
+        TEMPLATE_METADATA_PROJECTION
+    )
+    if not template or not has_template_pdf(template):
         raise HTTPException(status_code=404, detail="PDF not found")
     
-    pdf_bytes = base64.b64decode(template["pdf_data"])
+    if template.get("pdf_blob"):
+        try:
+            body = await get_blob_store().stream(template["pdf_blob"])
+        except BlobNotFound:
+            raise HTTPException(status_code=404, detail="PDF not found")
+    else:
+        pdf_bytes = await load_template_pdf(template)
+        if not pdf_bytes:
+            raise HTTPException(status_code=404, detail="PDF not found")
+        body = BytesIO(pdf_bytes)
     
     return StreamingResponse(
-        BytesIO(pdf_bytes),
+        body,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"inline; filename={template.get('pdf_filename', 'document.pdf')}",
@@ -430,23 +543,10 @@ async def submit_signature(
         raise HTTPException(status_code=400, detail="You must agree to the consent statement")
     
     # Determine if recipient or approver
-    signing_request = await db.signing_requests.find_one({"signing_token": signing_token})
-    is_approver = False
-    approver_index = -1
-    
-    if not signing_request:
-        signing_request = await db.signing_requests.find_one({
-            "approval_chain.signing_token": signing_token
-        })
-        if signing_request:
-            is_approver = True
-            for i, approver in enumerate(signing_request.get("approval_chain", [])):
-                if approver.get("signing_token") == signing_token:
-                    approver_index = i
-                    break
-    
+    signing_request, approver_index = await resolve_signing_token(db, signing_token)
     if not signing_request:
         raise HTTPException(status_code=404, detail="Invalid signing link")
+    is_approver = approver_index >= 0
     
     # Validate status
     if signing_request["status"] in ["cancelled", "expired", "completed"]:
@@ -462,7 +562,10 @@ async def submit_signature(
         raise HTTPException(status_code=410, detail="This signing link has expired")
     
     # Get template
-    template = await db.document_templates.find_one({"id": signing_request["template_id"]})
+    template = await db.document_templates.find_one(
+        {"id": signing_request["template_id"]},
+        TEMPLATE_METADATA_PROJECTION
+    )
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
@@ -547,6 +650,9 @@ async def _process_approver_signature(
         {"$set": update_data}
     )
     
+    if is_last_approver:
+        await _finalize_quietly(signing_request["id"])
+    
     sys.stderr.write(f"[DOCS] Document {decision} by {typed_name} (Approver {approver_index + 1})\n")
     
     return {
@@ -558,6 +664,14 @@ async def _process_approver_signature(
     }
 
 
+async def _finalize_quietly(signing_request_id: str):
+    """Store the final signed PDF; on failure the first download generates it instead"""
+    try:
+        await finalize_signed_document(signing_request_id)
+    except Exception as e:
+        sys.stderr.write(f"[DOCS] Could not store signed PDF for {signing_request_id}: {e}\n")
+
+
 async def _process_recipient_signature(
     db, signing_request, template, signature_type, typed_name, signature_image,
     consent_agreed, recipient_fields, client_ip, user_agent, now
@@ -635,10 +749,13 @@ async def _process_recipient_signature(
         }
     
     await db.signing_requests.update_one(
-        {"signing_token": signing_request["signing_token"]},
+        {"id": signing_request["id"]},
         {"$set": update_data}
     )
     
+    if update_data["status"] == "completed":
+        await _finalize_quietly(signing_request["id"])
+    
     sys.stderr.write(f"[DOCS] Document signed by {typed_name} ({signing_request['recipient_email']})\n")
     
     return {
@@ -6,23 +6,185 @@ Handles document template CRUD operations:
 - Create templates (PDF and text-based)
 - Update templates
 - Delete/deactivate templates
-- PDF page rendering for visual editor
+- PDF page geometry (computed at upload) and page rendering for the visual editor
+  (with a rendered-page cache)
 - Field and signature placement management
 """
 import sys
 import uuid
-import base64
+import asyncio
 from datetime import datetime, timezone
 from io import BytesIO
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
 
-from .utils import get_db, get_current_user, hash_document, check_document_permission
+from utils.blob_store import BlobNotFound
+
+from .utils import (
+    get_db, get_current_user, get_blob_store, get_pdf_service, hash_document, check_document_permission,
+    has_template_pdf, load_template_pdf, TEMPLATE_METADATA_PROJECTION
+)
 
 router = APIRouter()
 
 
+# =============================================================================
+# RENDERED PAGE CACHE
+# =============================================================================
+# Editor page images are rendered once per (PDF content hash, page, zoom) and the
+# PNGs kept in the blob store, indexed by the template_page_images collection.
+# Because the key is the content hash, re-uploading the same PDF or sharing it
+# between templates reuses the same images.
+
+PAGE_IMAGE_ZOOM = 1.5  # 1.5x zoom for quality
+
+_render_locks = {}
+_prerender_tasks = set()
+
+
+def _render_pages_png(pdf_bytes: bytes, zoom: float, page_numbers=None) -> dict:
+    """Rasterize pages of a PDF (all pages if page_numbers is None) -> {page_num: png_bytes}. Runs in a PDF worker process."""
+    import fitz  # PyMuPDF
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        if page_numbers is None:
+            page_numbers = range(1, len(doc) + 1)
+        matrix = fitz.Matrix(zoom, zoom)
+        images = {}
+        for page_num in page_numbers:
+            if 1 <= page_num <= len(doc):
+                images[page_num] = doc[page_num - 1].get_pixmap(matrix=matrix).tobytes("png")
+        return images
+    finally:
+        doc.close()
+
+
+def _read_page_geometry(pdf_bytes: bytes) -> list:
+    """Page numbers and mediabox sizes of a PDF (runs in a PDF worker process)"""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(BytesIO(pdf_bytes))
+    pages_info = []
+    for i, page in enumerate(reader.pages):
+        media_box = page.mediabox
+        pages_info.append({
+            "page": i + 1,
+            "width": float(media_box.width),
+            "height": float(media_box.height)
+        })
+    return pages_info
+
+
+async def read_page_geometry(pdf_bytes: bytes) -> Optional[list]:
+    """Page sizes of an uploaded PDF, or None if it can't be parsed (computed again on first use)"""
+    try:
+        return await get_pdf_service().run(_read_page_geometry, pdf_bytes)
+    except Exception as e:
+        sys.stderr.write(f"[DOCS] Could not read PDF page geometry: {e}\n")
+        return None
+
+
+def page_image_etag(pdf_hash: str, page_num: int, zoom: float = PAGE_IMAGE_ZOOM) -> str:
+    return f'"{pdf_hash}-{page_num}-{zoom}"'
+
+
+async def _store_page_images(pdf_hash: str, zoom: float, images: dict):
+    """Save rendered PNGs and index them; pages already cached are left alone"""
+    db = get_db()
+    store = get_blob_store()
+    for page_num, png in images.items():
+        blob = await store.put(png, "image/png")
+        result = await db.template_page_images.update_one(
+            {"pdf_hash": pdf_hash, "page": page_num, "zoom": zoom},
+            {"$setOnInsert": {"blob": blob, "size": len(png), "created_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+        if not result.upserted_id:
+            await store.release(blob)  # Someone else cached this page first
+
+
+async def get_cached_page_image(
+    template: dict, page_num: int, zoom: float = PAGE_IMAGE_ZOOM, pdf_bytes: Optional[bytes] = None
+) -> Optional[str]:
+    """Blob key of the rendered page, rendering and caching it on a miss. None if the page doesn't exist."""
+    db = get_db()
+    pdf_hash = template["pdf_hash"]
+    query = {"pdf_hash": pdf_hash, "page": page_num, "zoom": zoom}
+    
+    cached = await db.template_page_images.find_one(query, {"_id": 0, "blob": 1})
+    if cached:
+        return cached["blob"]
+    
+    # One render per page at a time; concurrent requests wait for it
+    lock = _render_locks.setdefault((pdf_hash, page_num, zoom), asyncio.Lock())
+    try:
+        async with lock:
+            cached = await db.template_page_images.find_one(query, {"_id": 0, "blob": 1})
+            if cached:
+                return cached["blob"]
+            if pdf_bytes is None:
+                pdf_bytes = await load_template_pdf(template)
+            images = await get_pdf_service().run(_render_pages_png, pdf_bytes, zoom, [page_num])
+            if page_num not in images:
+                return None
+            await _store_page_images(pdf_hash, zoom, images)
+            cached = await db.template_page_images.find_one(query, {"_id": 0, "blob": 1})
+            return cached["blob"] if cached else None
+    finally:
+        if not lock.locked():
+            _render_locks.pop((pdf_hash, page_num, zoom), None)
+
+
+async def prerender_template_pages(template: dict, zoom: float = PAGE_IMAGE_ZOOM):
+    """
+    Render and cache every page of a PDF template that isn't cached yet.
+    Each page is its own PDF job, so editor requests get a worker between pages
+    and a page that fails or times out doesn't lose the others.
+    """
+    db = get_db()
+    pdf_hash = template.get("pdf_hash")
+    try:
+        pdf_bytes = await load_template_pdf(template)
+        if not pdf_bytes or not pdf_hash:
+            return
+        pages_info = template.get("page_geometry") or await get_pdf_service().run(_read_page_geometry, pdf_bytes)
+        cached_pages = {
+            c["page"] async for c in db.template_page_images.find({"pdf_hash": pdf_hash, "zoom": zoom}, {"_id": 0, "page": 1})
+        }
+    except Exception as e:
+        sys.stderr.write(f"[DOCS] Page pre-render failed for template '{template.get('id')}': {e}\n")
+        return
+    
+    rendered = 0
+    for page_num in [p["page"] for p in pages_info if p["page"] not in cached_pages]:
+        try:
+            if await get_cached_page_image(template, page_num, zoom, pdf_bytes):
+                rendered += 1
+        except Exception as e:
+            sys.stderr.write(f"[DOCS] Pre-render of page {page_num} failed for template '{template.get('id')}': {e}\n")
+    if rendered:
+        sys.stderr.write(f"[DOCS] Pre-rendered {rendered} page(s) for template '{template.get('id')}'\n")
+
+
+def schedule_prerender(template: dict):
+    """Pre-render a template's pages in the background after upload"""
+    task = asyncio.create_task(prerender_template_pages(template))
+    _prerender_tasks.add(task)
+    task.add_done_callback(_prerender_tasks.discard)
+
+
+async def purge_page_images(pdf_hash: Optional[str]):
+    """Drop cached page images for a PDF no template uses anymore"""
+    db = get_db()
+    if not pdf_hash or await db.document_templates.find_one({"pdf_hash": pdf_hash}, {"_id": 1}):
+        return
+    store = get_blob_store()
+    async for cached in db.template_page_images.find({"pdf_hash": pdf_hash}, {"_id": 0, "blob": 1}):
+        await store.release(cached.get("blob"))
+    await db.template_page_images.delete_many({"pdf_hash": pdf_hash})
+
+
 # =============================================================================
 # TEMPLATE CRUD ENDPOINTS
 # =============================================================================
@@ -54,7 +216,7 @@ async def get_document_template(
     
     template = await db.document_templates.find_one(
         {"id": template_id},
-        {"_id": 0}
+        TEMPLATE_METADATA_PROJECTION
     )
     
     if not template:
@@ -102,22 +264,26 @@ async def create_document_template(
             raise HTTPException(status_code=400, detail="PDF file required for PDF template")
         
         pdf_content = await pdf_file.read()
-        template_doc["pdf_data"] = base64.b64encode(pdf_content).decode('utf-8')
+        template_doc["pdf_blob"] = await get_blob_store().put(pdf_content, "application/pdf", pdf_file.filename)
+        template_doc["pdf_size"] = len(pdf_content)
         template_doc["pdf_filename"] = pdf_file.filename
         template_doc["pdf_hash"] = hash_document(pdf_content)
+        template_doc["page_geometry"] = await read_page_geometry(pdf_content)
         template_doc["text_content"] = None
     else:
         if not text_content:
             raise HTTPException(status_code=400, detail="text_content required for text template")
         
         template_doc["text_content"] = text_content
-        template_doc["pdf_data"] = None
+        template_doc["pdf_blob"] = None
         template_doc["pdf_filename"] = None
         template_doc["pdf_hash"] = hash_document(text_content.encode('utf-8'))
     
     await db.document_templates.insert_one(template_doc)
+    if template_type == "pdf":
+        schedule_prerender(template_doc)
     
-    response = {k: v for k, v in template_doc.items() if k not in ["_id", "pdf_data"]}
+    response = {k: v for k, v in template_doc.items() if k != "_id"}
     sys.stderr.write(f"[DOCS] Created template '{name}' ({template_type}) by {current_user.get('username')}\n")
     
     return response
@@ -140,7 +306,7 @@ async def update_document_template(
     if not check_document_permission(current_user):
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    template = await db.document_templates.find_one({"id": template_id})
+    template = await db.document_templates.find_one({"id": template_id}, TEMPLATE_METADATA_PROJECTION)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
@@ -159,14 +325,23 @@ async def update_document_template(
         update_data["pdf_hash"] = hash_document(text_content.encode('utf-8'))
     if pdf_file and template.get("template_type") == "pdf":
         pdf_content = await pdf_file.read()
-        update_data["pdf_data"] = base64.b64encode(pdf_content).decode('utf-8')
+        update_data["pdf_blob"] = await get_blob_store().put(pdf_content, "application/pdf", pdf_file.filename)
+        update_data["pdf_size"] = len(pdf_content)
         update_data["pdf_filename"] = pdf_file.filename
         update_data["pdf_hash"] = hash_document(pdf_content)
+        update_data["page_geometry"] = await read_page_geometry(pdf_content)
     
-    await db.document_templates.update_one(
-        {"id": template_id},
-        {"$set": update_data}
-    )
+    update = {"$set": update_data}
+    if "pdf_blob" in update_data:
+        update["$unset"] = {"pdf_data": ""}
+    await db.document_templates.update_one({"id": template_id}, update)
+    
+    # Drop the replaced PDF once nothing references it, and warm the new one's page images
+    if "pdf_blob" in update_data:
+        await get_blob_store().release(template.get("pdf_blob"))
+        if template.get("pdf_hash") != update_data["pdf_hash"]:
+            await purge_page_images(template.get("pdf_hash"))
+        schedule_prerender({**template, **update_data})
     
     sys.stderr.write(f"[DOCS] Updated template '{template_id}' by {current_user.get('username')}\n")
     return {"success": True, "message": "Template updated"}
@@ -184,7 +359,7 @@ async def delete_document_template(
     if current_user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Only admins can delete templates")
     
-    template = await db.document_templates.find_one({"id": template_id})
+    template = await db.document_templates.find_one({"id": template_id}, TEMPLATE_METADATA_PROJECTION)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
@@ -198,6 +373,8 @@ async def delete_document_template(
             )
         
         await db.document_templates.delete_one({"id": template_id})
+        await get_blob_store().release(template.get("pdf_blob"))
+        await purge_page_images(template.get("pdf_hash"))
         sys.stderr.write(f"[DOCS] Permanently deleted template '{template['name']}' by {current_user.get('username')}\n")
         return {"success": True, "message": "Template permanently deleted"}
     else:
@@ -222,73 +399,75 @@ async def get_template_pages(
     """Get page count and field placements for a PDF template"""
     db = get_db()
     
-    template = await db.document_templates.find_one({"id": template_id})
+    template = await db.document_templates.find_one({"id": template_id}, TEMPLATE_METADATA_PROJECTION)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    if template.get("template_type") != "pdf" or not template.get("pdf_data"):
+    if template.get("template_type") != "pdf" or not has_template_pdf(template):
         raise HTTPException(status_code=400, detail="Template is not a PDF")
     
-    try:
-        from PyPDF2 import PdfReader
-        pdf_bytes = base64.b64decode(template["pdf_data"])
-        reader = PdfReader(BytesIO(pdf_bytes))
-        
-        pages_info = []
-        for i, page in enumerate(reader.pages):
-            media_box = page.mediabox
-            pages_info.append({
-                "page": i + 1,
-                "width": float(media_box.width),
-                "height": float(media_box.height)
-            })
-        
-        return {
-            "page_count": len(reader.pages),
-            "pages": pages_info,
-            "field_placements": template.get("field_placements", []),
-            "signature_placements": template.get("signature_placements", [])
-        }
-    except Exception as e:
-        sys.stderr.write(f"[DOCS] Error reading PDF pages: {e}\n")
-        raise HTTPException(status_code=500, detail="Failed to read PDF")
+    pages_info = template.get("page_geometry")
+    if not pages_info:
+        # Uploaded before geometry was stored (or unreadable then): compute once and keep it
+        try:
+            pdf_bytes = await load_template_pdf(template)
+            pages_info = await get_pdf_service().run(_read_page_geometry, pdf_bytes)
+        except Exception as e:
+            sys.stderr.write(f"[DOCS] Error reading PDF pages: {e}\n")
+            raise HTTPException(status_code=500, detail="Failed to read PDF")
+        await db.document_templates.update_one(
+            {"id": template_id, "pdf_hash": template.get("pdf_hash")},
+            {"$set": {"page_geometry": pages_info}}
+        )
+    
+    return {
+        "page_count": len(pages_info),
+        "pages": pages_info,
+        "field_placements": template.get("field_placements", []),
+        "signature_placements": template.get("signature_placements", [])
+    }
 
 
 @router.get("/templates/{template_id}/page/{page_num}/image")
 async def get_template_page_image(
     template_id: str,
     page_num: int,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """Render a PDF page as an image for the visual editor"""
     db = get_db()
     
-    template = await db.document_templates.find_one({"id": template_id})
+    template = await db.document_templates.find_one({"id": template_id}, TEMPLATE_METADATA_PROJECTION)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    if template.get("template_type") != "pdf" or not template.get("pdf_data"):
+    if template.get("template_type") != "pdf" or not has_template_pdf(template):
         raise HTTPException(status_code=400, detail="Template is not a PDF")
     
+    if page_num < 1:
+        raise HTTPException(status_code=404, detail="Page not found")
+    
+    # The image only depends on PDF content, page and zoom
+    etag = page_image_etag(template["pdf_hash"], page_num)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    
     try:
-        import fitz  # PyMuPDF
-        pdf_bytes = base64.b64decode(template["pdf_data"])
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        
-        if page_num < 1 or page_num > len(doc):
+        blob = await get_cached_page_image(template, page_num)
+        if not blob:
             raise HTTPException(status_code=404, detail="Page not found")
         
-        page = doc[page_num - 1]
-        mat = fitz.Matrix(1.5, 1.5)  # 1.5x zoom for quality
-        pix = page.get_pixmap(matrix=mat)
-        img_bytes = pix.tobytes("png")
-        doc.close()
-        
         return StreamingResponse(
-            BytesIO(img_bytes),
+            await get_blob_store().stream(blob),
             media_type="image/png",
-            headers={"Cache-Control": "max-age=3600"}  # Cache for 1 hour
+            headers=headers
         )
+    except HTTPException:
+        raise
+    except BlobNotFound:
+        raise HTTPException(status_code=404, detail="Page not found")
     except ImportError:
         sys.stderr.write("[DOCS] PyMuPDF not installed\n")
         raise HTTPException(status_code=501, detail="PDF rendering not available")
@@ -309,7 +488,7 @@ async def update_template_placements(
     if not check_document_permission(current_user):
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    template = await db.document_templates.find_one({"id": template_id})
+    template = await db.document_templates.find_one({"id": template_id}, {"_id": 1})
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
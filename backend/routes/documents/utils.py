@@ -6,17 +6,22 @@ This module provides shared utilities for the document signing system:
 - Encryption/decryption helpers
 - Token generation
 - Document hashing
+- Template PDF storage (blob store)
 - National Officers configuration
 """
 import os
 import sys
 import uuid
+import base64
 import hashlib
 from typing import Optional
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from cryptography.fernet import Fernet
 
+from utils.blob_store import BlobStore
+from utils.pdf_service import PDFService
+
 # Security
 security = HTTPBearer()
 
@@ -35,12 +40,16 @@ _db = None
 _verify_token_func = None
 _verify_admin_func = None
 _cipher_suite = None
+_blob_store = None
+_pdf_service = None
 
 
-def init_documents_module(database, token_verifier, admin_verifier):
+def init_documents_module(database, token_verifier, admin_verifier, blob_store=None, pdf_service=None):
     """Initialize document module with database and auth dependencies"""
-    global _db, _verify_token_func, _verify_admin_func
+    global _db, _verify_token_func, _verify_admin_func, _blob_store, _pdf_service
     _db = database
+    _blob_store = blob_store
+    _pdf_service = pdf_service
     _verify_token_func = token_verifier
     _verify_admin_func = admin_verifier
 
@@ -52,6 +61,48 @@ def get_db():
     return _db
 
 
+def get_blob_store() -> BlobStore:
+    """Get the blob store holding template PDFs"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore(get_db())
+    return _blob_store
+
+
+def get_pdf_service() -> PDFService:
+    """Get the process pool that runs PyMuPDF/PyPDF2 work off the event loop"""
+    global _pdf_service
+    if _pdf_service is None:
+        _pdf_service = PDFService()
+    return _pdf_service
+
+
+# Everything but a legacy inline PDF; use for template reads that only need metadata
+TEMPLATE_METADATA_PROJECTION = {"_id": 0, "pdf_data": 0}
+
+
+def has_template_pdf(template: dict) -> bool:
+    """True if the template has a stored PDF (blob store or legacy inline base64)"""
+    if template.get("pdf_blob") or template.get("pdf_data"):
+        return True
+    # Read with TEMPLATE_METADATA_PROJECTION: PDF templates get a hash when their file is stored
+    return template.get("template_type") == "pdf" and bool(template.get("pdf_hash"))
+
+
+async def load_template_pdf(template: dict) -> Optional[bytes]:
+    """Raw bytes of a template's PDF, or None for text templates"""
+    if template.get("pdf_blob"):
+        return await get_blob_store().get(template["pdf_blob"])
+    pdf_data = template.get("pdf_data")
+    if not pdf_data and "pdf_data" not in template and template.get("template_type") == "pdf":
+        # Legacy inline PDF left out by a metadata projection
+        stored = await get_db().document_templates.find_one({"id": template["id"]}, {"_id": 0, "pdf_data": 1})
+        pdf_data = (stored or {}).get("pdf_data")
+    if pdf_data:
+        return base64.b64decode(pdf_data)
+    return None
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify token and return current user"""
     if _verify_token_func is None:
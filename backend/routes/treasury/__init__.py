@@ -17,6 +17,7 @@ Module Structure:
 - transactions.py - Income/expense tracking
 - budgets.py     - Budget management
 - reports.py     - Financial reports
+- rollups.py     - Monthly ledger rollups behind reports and budgets
 - audit.py       - Audit log viewing
 
 Permissions:
@@ -32,6 +33,7 @@ from .accounts import router as accounts_router
 from .transactions import router as transactions_router
 from .budgets import router as budgets_router
 from .reports import router as reports_router
+from .rollups import router as rollups_router, rebuild_monthly_rollups, rollups_built
 from .audit import router as audit_router
 
 # Create combined router with prefix
@@ -43,17 +45,19 @@ router.include_router(accounts_router)
 router.include_router(transactions_router)
 router.include_router(budgets_router)
 router.include_router(reports_router)
+router.include_router(rollups_router)
 router.include_router(audit_router)
 
 
-def init_router(database, token_verifier):
+def init_router(database, token_verifier, blob_store=None):
     """Initialize treasury module with dependencies
     
     Args:
         database: MongoDB database instance
         token_verifier: Async function to verify JWT tokens
+        blob_store: Shared BlobStore for receipts (created from database if omitted)
     """
-    init_treasury_module(database, token_verifier)
+    init_treasury_module(database, token_verifier, blob_store)
 
 
-__all__ = ['router', 'init_router']
+__all__ = ['router', 'init_router', 'rebuild_monthly_rollups', 'rollups_built']
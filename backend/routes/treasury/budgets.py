@@ -15,6 +15,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 
 from .utils import get_db, get_current_user, check_treasury_permission
+from .rollups import get_rollups
 
 router = APIRouter()
 
@@ -53,9 +54,10 @@ async def list_budgets(
     
     budgets = await db.treasury_budgets.find(query, {"_id": 0}).to_list(200)
     
-    # Calculate spending for each budget
+    # Spending for every budget from the expense rollups of their years
+    spending = await _calculate_budget_spending(db, budgets)
     for budget in budgets:
-        spent = await _calculate_budget_spending(db, budget)
+        spent = spending.get(budget["id"], 0)
         budget["spent"] = spent
         budget["remaining"] = budget["amount"] - spent
         budget["percent_used"] = (spent / budget["amount"] * 100) if budget["amount"] > 0 else 0
@@ -178,48 +180,29 @@ async def delete_budget(
     return {"success": True, "message": "Budget deactivated"}
 
 
-async def _calculate_budget_spending(db, budget: dict) -> float:
-    """Calculate total spending for a budget period"""
-    # Build date range based on period
-    year = budget["year"]
-    
+def _budget_months(budget: dict) -> tuple:
+    """First and last month covered by a budget period"""
     if budget["period"] == "yearly":
-        start_date = f"{year}-01-01"
-        end_date = f"{year}-12-31"
-    elif budget["period"] == "quarterly":
-        quarter = budget["quarter"]
-        start_month = (quarter - 1) * 3 + 1
-        end_month = quarter * 3
-        start_date = f"{year}-{start_month:02d}-01"
-        if end_month == 12:
-            end_date = f"{year}-12-31"
-        else:
-            end_date = f"{year}-{end_month + 1:02d}-01"
-    else:  # monthly
-        month = budget["month"]
-        start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year + 1}-01-01"
-        else:
-            end_date = f"{year}-{month + 1:02d}-01"
-    
-    # Query expenses for this category in this period
-    pipeline = [
-        {
-            "$match": {
-                "type": "expense",
-                "category_id": budget["category_id"],
-                "date": {"$gte": start_date, "$lt": end_date}
-            }
-        },
-        {
-            "$group": {
-                "_id": None,
-                "total": {"$sum": "$amount"}
-            }
-        }
-    ]
-    
-    result = await db.treasury_transactions.aggregate(pipeline).to_list(1)
-    
-    return result[0]["total"] if result else 0
+        return 1, 12
+    if budget["period"] == "quarterly":
+        return (budget["quarter"] - 1) * 3 + 1, budget["quarter"] * 3
+    return budget["month"], budget["month"]
+
+
+async def _calculate_budget_spending(db, budgets: list) -> dict:
+    """Total expenses per budget id, read from monthly rollups (one query per budget year)"""
+    spending = {}
+    for year in {b["year"] for b in budgets}:
+        year_budgets = [b for b in budgets if b["year"] == year]
+        rollups = await get_rollups(
+            db, year,
+            category_id={"$in": list({b["category_id"] for b in year_budgets})},
+            type="expense"
+        )
+        for budget in year_budgets:
+            start_month, end_month = _budget_months(budget)
+            spending[budget["id"]] = sum(
+                r["total"] for r in rollups
+                if r.get("category_id") == budget["category_id"] and start_month <= r["month"] <= end_month
+            )
+    return spending
@@ -6,6 +6,9 @@ Generates financial reports:
 - Quarterly reports
 - Yearly reports
 - Category breakdowns
+
+Reports are built from the monthly ledger rollups (see rollups.py): one
+indexed read of at most a year's (month, type, category, account) totals.
 """
 import sys
 from datetime import datetime, timezone
@@ -14,6 +17,7 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends
 
 from .utils import get_db, get_current_user, check_treasury_permission
+from .rollups import ROLLUP_TYPES, get_rollups
 
 router = APIRouter()
 
@@ -41,13 +45,12 @@ async def get_summary(
     else:
         end_date = f"{year}-{month + 1:02d}-01"
     
-    # Get totals
-    income_total = await _get_total(db, "income", start_date, end_date)
-    expense_total = await _get_total(db, "expense", start_date, end_date)
-    
-    # Get category breakdowns
-    income_by_category = await _get_by_category(db, "income", start_date, end_date)
-    expense_by_category = await _get_by_category(db, "expense", start_date, end_date)
+    # Totals and category breakdowns from the month's rollups
+    report = await _get_period_report(db, year, month, month)
+    income_total = report["totals"]["income"]
+    expense_total = report["totals"]["expense"]
+    income_by_category = report["by_category"]["income"]
+    expense_by_category = report["by_category"]["expense"]
     
     # Get account balances
     accounts = await db.treasury_accounts.find(
@@ -102,34 +105,25 @@ async def get_quarterly_report(
     else:
         end_date = f"{year}-{end_month + 1:02d}-01"
     
-    # Get totals
-    income_total = await _get_total(db, "income", start_date, end_date)
-    expense_total = await _get_total(db, "expense", start_date, end_date)
+    # Totals, monthly and category breakdowns from the quarter's rollups
+    report = await _get_period_report(db, year, start_month, end_month)
+    income_total = report["totals"]["income"]
+    expense_total = report["totals"]["expense"]
+    income_by_category = report["by_category"]["income"]
+    expense_by_category = report["by_category"]["expense"]
     
-    # Get monthly breakdown
+    # Monthly breakdown
     monthly_data = []
     for m in range(start_month, end_month + 1):
-        m_start = f"{year}-{m:02d}-01"
-        if m == 12:
-            m_end = f"{year + 1}-01-01"
-        else:
-            m_end = f"{year}-{m + 1:02d}-01"
-        
-        m_income = await _get_total(db, "income", m_start, m_end)
-        m_expense = await _get_total(db, "expense", m_start, m_end)
-        
+        m_totals = _month_totals(report, year, m)
         monthly_data.append({
             "month": m,
             "month_name": datetime(year, m, 1).strftime("%B"),
-            "income": m_income,
-            "expenses": m_expense,
-            "net": m_income - m_expense
+            "income": m_totals["income"],
+            "expenses": m_totals["expense"],
+            "net": m_totals["income"] - m_totals["expense"]
         })
     
-    # Get category breakdowns
-    income_by_category = await _get_by_category(db, "income", start_date, end_date)
-    expense_by_category = await _get_by_category(db, "expense", start_date, end_date)
-    
     # Get budget vs actual
     budgets = await db.treasury_budgets.find({
         "period": "quarterly",
@@ -183,24 +177,19 @@ async def get_yearly_report(
     start_date = f"{year}-01-01"
     end_date = f"{year + 1}-01-01"
     
-    # Get totals
-    income_total = await _get_total(db, "income", start_date, end_date)
-    expense_total = await _get_total(db, "expense", start_date, end_date)
+    # Totals, monthly and category breakdowns from the year's rollups
+    report = await _get_period_report(db, year, 1, 12)
+    income_total = report["totals"]["income"]
+    expense_total = report["totals"]["expense"]
+    income_by_category = report["by_category"]["income"]
+    expense_by_category = report["by_category"]["expense"]
     
-    # Get quarterly breakdown
+    # Quarterly breakdown (sum of its months)
     quarterly_data = []
     for q in range(1, 5):
-        q_start_month = (q - 1) * 3 + 1
-        q_end_month = q * 3
-        
-        q_start = f"{year}-{q_start_month:02d}-01"
-        if q_end_month == 12:
-            q_end = f"{year + 1}-01-01"
-        else:
-            q_end = f"{year}-{q_end_month + 1:02d}-01"
-        
-        q_income = await _get_total(db, "income", q_start, q_end)
-        q_expense = await _get_total(db, "expense", q_start, q_end)
+        q_months = [_month_totals(report, year, m) for m in range((q - 1) * 3 + 1, q * 3 + 1)]
+        q_income = sum(m["income"] for m in q_months)
+        q_expense = sum(m["expense"] for m in q_months)
         
         quarterly_data.append({
             "quarter": q,
@@ -210,30 +199,18 @@ async def get_yearly_report(
             "net": q_income - q_expense
         })
     
-    # Get monthly breakdown
+    # Monthly breakdown
     monthly_data = []
     for m in range(1, 13):
-        m_start = f"{year}-{m:02d}-01"
-        if m == 12:
-            m_end = f"{year + 1}-01-01"
-        else:
-            m_end = f"{year}-{m + 1:02d}-01"
-        
-        m_income = await _get_total(db, "income", m_start, m_end)
-        m_expense = await _get_total(db, "expense", m_start, m_end)
-        
+        m_totals = _month_totals(report, year, m)
         monthly_data.append({
             "month": m,
             "month_name": datetime(year, m, 1).strftime("%b"),
-            "income": m_income,
-            "expenses": m_expense,
-            "net": m_income - m_expense
+            "income": m_totals["income"],
+            "expenses": m_totals["expense"],
+            "net": m_totals["income"] - m_totals["expense"]
         })
     
-    # Get category breakdowns
-    income_by_category = await _get_by_category(db, "income", start_date, end_date)
-    expense_by_category = await _get_by_category(db, "expense", start_date, end_date)
-    
     return {
         "period": {
             "year": year,
@@ -252,55 +229,43 @@ async def get_yearly_report(
     }
 
 
-async def _get_total(db, type: str, start_date: str, end_date: str) -> float:
-    """Get total for a transaction type in a date range"""
-    pipeline = [
-        {
-            "$match": {
-                "type": type,
-                "date": {"$gte": start_date, "$lt": end_date}
-            }
-        },
-        {
-            "$group": {
-                "_id": None,
-                "total": {"$sum": "$amount"}
-            }
-        }
-    ]
+async def _get_period_report(db, year: int, start_month: int, end_month: int) -> dict:
+    """
+    Income/expense totals for months start_month..end_month of a year, from rollups:
+    - totals:      {"income": x, "expense": y}
+    - monthly:     {"YYYY-MM": {"income": x, "expense": y}}
+    - by_category: {"income": [...], "expense": [...]}, largest first
+    """
+    rollups = await get_rollups(db, year, start_month, end_month)
+    
+    report = {
+        "totals": {t: 0 for t in ROLLUP_TYPES},
+        "monthly": {},
+        "by_category": {t: [] for t in ROLLUP_TYPES}
+    }
+    categories = {}
+    for r in rollups:
+        month_key = f"{r['year']}-{r['month']:02d}"
+        month_totals = report["monthly"].setdefault(month_key, {t: 0 for t in ROLLUP_TYPES})
+        month_totals[r["type"]] += r["total"]
+        report["totals"][r["type"]] += r["total"]
+        
+        category = categories.setdefault((r["type"], r.get("category_id")), {
+            "category_id": r.get("category_id"),
+            "category_name": r.get("category_name"),
+            "total": 0,
+            "count": 0
+        })
+        category["total"] += r["total"]
+        category["count"] += r["count"]
     
-    result = await db.treasury_transactions.aggregate(pipeline).to_list(1)
-    return result[0]["total"] if result else 0
+    for (type, _), category in categories.items():
+        report["by_category"][type].append(category)
+    for type in ROLLUP_TYPES:
+        report["by_category"][type].sort(key=lambda c: c["total"], reverse=True)
+    return report
 
 
-async def _get_by_category(db, type: str, start_date: str, end_date: str) -> list:
-    """Get totals by category for a date range"""
-    pipeline = [
-        {
-            "$match": {
-                "type": type,
-                "date": {"$gte": start_date, "$lt": end_date}
-            }
-        },
-        {
-            "$group": {
-                "_id": "$category_id",
-                "category_name": {"$first": "$category_name"},
-                "total": {"$sum": "$amount"},
-                "count": {"$sum": 1}
-            }
-        },
-        {"$sort": {"total": -1}}
-    ]
-    
-    results = await db.treasury_transactions.aggregate(pipeline).to_list(100)
-    
-    return [
-        {
-            "category_id": r["_id"],
-            "category_name": r["category_name"],
-            "total": r["total"],
-            "count": r["count"]
-        }
-        for r in results
-    ]
+def _month_totals(report: dict, year: int, month: int) -> dict:
+    """Income/expense totals of one month from a period report"""
+    return report["monthly"].get(f"{year}-{month:02d}", {t: 0 for t in ROLLUP_TYPES})
@@ -0,0 +1,207 @@
+"""
+Treasury Module - Monthly Ledger Rollups
+
+Maintains treasury_monthly_rollups: income/expense totals and counts per
+(year, month, type, category_id, account_id). Every transaction create,
+update and delete adjusts its rollup, so summaries, budget progress and
+reports read a few small documents instead of scanning treasury_transactions.
+
+- Adjust rollups for a transaction (add / remove)
+- Read rollups for a range of months (from the ledger until the first build)
+- Rebuild rollups from the ledger to reconcile drift
+"""
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends
+
+from .utils import get_db, get_current_user, check_treasury_permission, log_audit
+
+router = APIRouter()
+
+# Transfers and adjustments move money between accounts and are not reported
+ROLLUP_TYPES = ("income", "expense")
+
+# Marker in treasury_rollup_state written once rollups have been built from the ledger
+ROLLUP_STATE_ID = "monthly_rollups"
+_rollups_ready = False
+
+
+def rollup_period(date: Optional[str]) -> Optional[tuple]:
+    """(year, month) of a transaction date string (YYYY-MM-DD...), or None if it can't be read"""
+    try:
+        year, month = int(date[:4]), int(date[5:7])
+    except (TypeError, ValueError):
+        return None
+    return (year, month) if 1 <= month <= 12 else None
+
+
+def _rollup_key(transaction: dict) -> Optional[dict]:
+    """Rollup document key for a transaction, or None if it isn't rolled up"""
+    if transaction.get("type") not in ROLLUP_TYPES:
+        return None
+    period = rollup_period(transaction.get("date"))
+    if not period:
+        return None
+    return {
+        "year": period[0],
+        "month": period[1],
+        "type": transaction["type"],
+        "category_id": transaction.get("category_id"),
+        "account_id": transaction.get("account_id")
+    }
+
+
+async def add_to_rollups(db, transaction: dict):
+    """Count a new (or updated) transaction in its monthly rollup"""
+    key = _rollup_key(transaction)
+    if not key:
+        return
+    await db.treasury_monthly_rollups.update_one(
+        key,
+        {
+            "$inc": {"total": transaction["amount"], "count": 1},
+            "$set": {"category_name": transaction.get("category_name"), "updated_at": _now()}
+        },
+        upsert=True
+    )
+
+
+async def remove_from_rollups(db, transaction: dict):
+    """Take a deleted (or pre-update) transaction out of its monthly rollup"""
+    key = _rollup_key(transaction)
+    if not key:
+        return
+    await db.treasury_monthly_rollups.update_one(
+        key,
+        {"$inc": {"total": -transaction["amount"], "count": -1}, "$set": {"updated_at": _now()}},
+        upsert=True
+    )
+    await db.treasury_monthly_rollups.delete_one({**key, "count": {"$lte": 0}})
+
+
+async def rollups_built(db) -> bool:
+    """True once rollups have been built from the ledger (checked in the DB until then)"""
+    global _rollups_ready
+    if not _rollups_ready:
+        _rollups_ready = bool(await db.treasury_rollup_state.find_one({"id": ROLLUP_STATE_ID}, {"_id": 1}))
+    return _rollups_ready
+
+
+async def get_rollups(db, year: int, start_month: int = 1, end_month: int = 12, **filters) -> list:
+    """
+    Rollup documents for months start_month..end_month of a year, optionally
+    filtered by key fields. Until the first build has finished the same totals
+    are aggregated from treasury_transactions, so reports never miss history.
+    """
+    if await rollups_built(db):
+        query = {"year": year, "month": {"$gte": start_month, "$lte": end_month}, **filters}
+        return await db.treasury_monthly_rollups.find(query, {"_id": 0}).to_list(None)
+    
+    end = f"{year + 1}-01" if end_month == 12 else f"{year}-{end_month + 1:02d}"
+    match = {"date": {"$gte": f"{year}-{start_month:02d}", "$lt": end}, **filters}
+    if "type" not in match:
+        match["type"] = {"$in": list(ROLLUP_TYPES)}
+    rollups = []
+    async for row in db.treasury_transactions.aggregate(_rollup_pipeline(match)):
+        rollup = _rollup_from_row(row)
+        if rollup:
+            rollups.append(rollup)
+    return rollups
+
+
+def _rollup_pipeline(match: dict) -> list:
+    """Aggregation of transactions into rollup-shaped rows"""
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {
+                    "month": {"$substrCP": ["$date", 0, 7]},
+                    "type": "$type",
+                    "category_id": "$category_id",
+                    "account_id": "$account_id"
+                },
+                "category_name": {"$last": "$category_name"},
+                "total": {"$sum": "$amount"},
+                "count": {"$sum": 1}
+            }
+        }
+    ]
+
+
+def _rollup_from_row(row: dict) -> Optional[dict]:
+    key = _rollup_key({**row["_id"], "date": row["_id"]["month"]})
+    if not key:
+        return None
+    return {**key, "total": row["total"], "count": row["count"], "category_name": row.get("category_name")}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def rebuild_monthly_rollups(db=None) -> int:
+    """
+    Recompute every rollup from treasury_transactions, drop rollups with no
+    transactions left and mark rollups as built. Returns the number written.
+    Rollups adjusted by transactions saved during the run are kept; their totals
+    may need another rebuild to be exact.
+    """
+    global _rollups_ready
+    db = db if db is not None else get_db()
+    
+    rebuilt_at = _now()
+    rebuilt = 0
+    async for row in db.treasury_transactions.aggregate(_rollup_pipeline({"type": {"$in": list(ROLLUP_TYPES)}})):
+        rollup = _rollup_from_row(row)
+        if not rollup:
+            continue
+        key = {k: rollup[k] for k in ("year", "month", "type", "category_id", "account_id")}
+        await db.treasury_monthly_rollups.update_one(
+            key,
+            {"$set": {
+                "total": rollup["total"],
+                "count": rollup["count"],
+                "category_name": rollup["category_name"],
+                "rebuilt_at": rebuilt_at
+            }},
+            upsert=True
+        )
+        rebuilt += 1
+    
+    # Stale rollups: not written by this run and not adjusted by a transaction since it started
+    await db.treasury_monthly_rollups.delete_many({
+        "rebuilt_at": {"$ne": rebuilt_at},
+        "$or": [{"updated_at": {"$exists": False}}, {"updated_at": {"$lt": rebuilt_at}}]
+    })
+    await db.treasury_rollup_state.update_one(
+        {"id": ROLLUP_STATE_ID},
+        {"$set": {"built_at": _now(), "rollups": rebuilt}},
+        upsert=True
+    )
+    _rollups_ready = True
+    return rebuilt
+
+
+@router.post("/reports/rollups/rebuild")
+async def rebuild_rollups(current_user: dict = Depends(get_current_user)):
+    """Recompute report totals from the transaction ledger"""
+    if not check_treasury_permission(current_user, "treasury_admin"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+    
+    rebuilt = await rebuild_monthly_rollups()
+    
+    await log_audit(
+        action="rollups_rebuilt",
+        entity_type="report",
+        entity_id="treasury_monthly_rollups",
+        entity_name="Monthly report totals",
+        user=current_user,
+        details={"rollups": rebuilt}
+    )
+    
+    sys.stderr.write(f"[TREASURY] Rebuilt {rebuilt} monthly rollups by {current_user.get('username')}\n")
+    
+    return {"success": True, "rollups": rebuilt}
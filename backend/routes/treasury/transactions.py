@@ -2,7 +2,7 @@
 Treasury Module - Transaction Management
 
 Handles income and expense transactions:
-- List transactions with filtering
+- List transactions with filtering (keyset pagination, newest first)
 - Create income/expense transactions
 - Update transactions
 - Delete transactions
@@ -17,13 +17,35 @@ from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
 from pydantic import BaseModel
 
+from utils.blob_store import BlobNotFound
+
 from .utils import (
-    get_db, get_current_user, check_treasury_permission,
-    encrypt_transaction, decrypt_transaction, encrypt_value, decrypt_account, log_audit
+    get_db, get_current_user, get_blob_store, check_treasury_permission,
+    encrypt_transaction, decrypt_transaction, decrypt_transactions, encrypt_value, decrypt_account, log_audit
 )
+from .rollups import add_to_rollups, remove_from_rollups
 
 router = APIRouter()
 
+# Transactions are listed newest first, ordered by (date, id). `cursor` is an
+# opaque pointer to the last row of the previous page (returned as next_cursor).
+TRANSACTION_PAGE_MAX = 1000
+
+
+def _encode_cursor(transaction: dict) -> str:
+    raw = f"{transaction.get('date') or ''}\x00{transaction['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """(date, id) from a cursor, or 400 if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, transaction_id = raw.split("\x00", 1)
+        return date, transaction_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid transaction cursor")
+
 
 class TransactionCreate(BaseModel):
     type: str  # "income" or "expense"
@@ -56,9 +78,16 @@ async def list_transactions(
     end_date: str = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: str = None,
+    include_total: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get transactions with optional filtering"""
+    """
+    Get transactions with optional filtering, newest first.
+    Pass the previous page's next_cursor as `cursor` for the next page (offset
+    still works but gets slower on deep pages). The matching total is only
+    counted when include_total is set.
+    """
     if not check_treasury_permission(current_user, "view_treasury"):
         raise HTTPException(status_code=403, detail="Permission denied")
     
@@ -80,20 +109,34 @@ async def list_transactions(
         else:
             query["date"] = {"$lte": end_date}
     
-    total = await db.treasury_transactions.count_documents(query)
+    total = await db.treasury_transactions.count_documents(query) if include_total else None
     
+    limit = max(1, min(limit, TRANSACTION_PAGE_MAX))
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"date": {"$lt": cursor_date}},
+            {"date": cursor_date, "id": {"$lt": cursor_id}}
+        ]
+        offset = 0
+    
+    # Fetch one extra row to know whether there is a next page
     transactions = await db.treasury_transactions.find(
         query, {"_id": 0, "receipt_data": 0}  # Exclude large receipt data from list
-    ).sort("date", -1).skip(offset).limit(limit).to_list(limit)
+    ).sort([("date", -1), ("id", -1)]).skip(offset).limit(limit + 1).to_list(limit + 1)
+    has_more = len(transactions) > limit
+    transactions = transactions[:limit]
     
     # Decrypt sensitive fields
-    decrypted_transactions = [decrypt_transaction(t) for t in transactions]
+    decrypted_transactions = await decrypt_transactions(transactions)
     
     return {
         "transactions": decrypted_transactions,
         "total": total,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "has_more": has_more,
+        "next_cursor": _encode_cursor(transactions[-1]) if has_more else None
     }
 
 
@@ -165,7 +208,7 @@ async def create_transaction(
         "vendor_payee": transaction.vendor_payee,
         "notes": transaction.notes,
         "receipt_filename": None,
-        "receipt_data": None,
+        "receipt_blob": None,
         "created_at": now.isoformat(),
         "created_by": current_user.get("username", "unknown"),
         "updated_at": None
@@ -174,6 +217,7 @@ async def create_transaction(
     # Encrypt sensitive fields before storing
     encrypted_doc = encrypt_transaction(transaction_doc)
     await db.treasury_transactions.insert_one(encrypted_doc)
+    await add_to_rollups(db, transaction_doc)
     
     # Update account balance
     balance_change = transaction.amount if transaction.type == "income" else -transaction.amount
@@ -204,7 +248,7 @@ async def create_transaction(
     sys.stderr.write(f"[TREASURY] Created {transaction.type}: ${transaction.amount:.2f} (encrypted)\n")
     
     # Return decrypted version for display
-    return {k: v for k, v in transaction_doc.items() if k not in ["_id", "receipt_data"]}
+    return {k: v for k, v in transaction_doc.items() if k != "_id"}
 
 
 @router.put("/transactions/{transaction_id}")
@@ -270,6 +314,12 @@ async def update_transaction(
         {"$set": encrypted_update}
     )
     
+    # Move the amount between monthly rollups if amount, category or date changed
+    updated_tx = {**transaction, **update_data}
+    if any(updated_tx.get(k) != transaction.get(k) for k in ("amount", "category_id", "date")):
+        await remove_from_rollups(db, transaction)
+        await add_to_rollups(db, updated_tx)
+    
     # Audit log
     await log_audit(
         action="transaction_updated",
@@ -317,6 +367,8 @@ async def delete_transaction(
     )
     
     await db.treasury_transactions.delete_one({"id": transaction_id})
+    await remove_from_rollups(db, transaction)
+    await get_blob_store().release(transaction.get("receipt_blob"))
     
     # Audit log
     await log_audit(
@@ -367,17 +419,23 @@ async def upload_receipt(
     if len(content) > 5 * 1024 * 1024:  # 5MB limit
         raise HTTPException(status_code=400, detail="File too large (max 5MB)")
     
-    encoded = base64.b64encode(content).decode()
+    receipt_blob = await get_blob_store().put(content, file.content_type, file.filename)
     
     await db.treasury_transactions.update_one(
         {"id": transaction_id},
-        {"$set": {
-            "receipt_filename": file.filename,
-            "receipt_content_type": file.content_type,
-            "receipt_data": encoded,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
+        {
+            "$set": {
+                "receipt_filename": file.filename,
+                "receipt_content_type": file.content_type,
+                "receipt_blob": receipt_blob,
+                "receipt_size": len(content),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            },
+            "$unset": {"receipt_data": ""}
+        }
     )
+    # Drop the replaced receipt's reference (also undoes the extra one if the same file was re-uploaded)
+    await get_blob_store().release(transaction.get("receipt_blob"))
     
     # Audit log
     await log_audit(
@@ -409,20 +467,26 @@ async def get_receipt(
     
     transaction = await db.treasury_transactions.find_one(
         {"id": transaction_id},
-        {"receipt_data": 1, "receipt_filename": 1, "receipt_content_type": 1}
+        {"receipt_blob": 1, "receipt_data": 1, "receipt_filename": 1, "receipt_content_type": 1}
     )
     
-    if not transaction or not transaction.get("receipt_data"):
+    if not transaction or not (transaction.get("receipt_blob") or transaction.get("receipt_data")):
         raise HTTPException(status_code=404, detail="Receipt not found")
     
-    from fastapi.responses import Response
+    from fastapi.responses import Response, StreamingResponse
     
-    content = base64.b64decode(transaction["receipt_data"])
+    media_type = transaction.get("receipt_content_type", "application/octet-stream")
+    headers = {
+        "Content-Disposition": f"inline; filename={transaction.get('receipt_filename', 'receipt')}"
+    }
     
-    return Response(
-        content=content,
-        media_type=transaction.get("receipt_content_type", "application/octet-stream"),
-        headers={
-            "Content-Disposition": f"inline; filename={transaction.get('receipt_filename', 'receipt')}"
-        }
-    )
+    if transaction.get("receipt_blob"):
+        try:
+            body = await get_blob_store().stream(transaction["receipt_blob"])
+        except BlobNotFound:
+            raise HTTPException(status_code=404, detail="Receipt file not found")
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+    
+    # Legacy inline receipt (not yet migrated)
+    content = base64.b64decode(transaction["receipt_data"])
+    return Response(content=content, media_type=media_type, headers=headers)
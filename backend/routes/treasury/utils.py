@@ -4,19 +4,22 @@ Treasury Module - Shared Utilities and Configuration
 Provides shared utilities for the treasury system:
 - Database and auth initialization
 - Permission checking
-- Encryption for sensitive financial data
+- Encryption for sensitive financial data (with batch decryption for lists)
 - Audit logging for compliance
 - Common constants
 """
 import os
 import sys
 import uuid
+import asyncio
 from datetime import datetime, timezone
 from typing import Optional, Any, Dict
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from cryptography.fernet import Fernet
 
+from utils.blob_store import BlobStore
+
 # Security
 security = HTTPBearer()
 
@@ -24,6 +27,7 @@ security = HTTPBearer()
 _db = None
 _verify_token_func = None
 _cipher_suite = None
+_blob_store = None
 
 # Default categories
 DEFAULT_INCOME_CATEGORIES = [
@@ -40,11 +44,15 @@ DEFAULT_EXPENSE_CATEGORIES = [
 ENCRYPTED_TRANSACTION_FIELDS = ['description', 'vendor_payee', 'reference_number', 'notes']
 ENCRYPTED_ACCOUNT_FIELDS = ['name', 'description']
 
+# Lists shorter than this are decrypted inline; the thread hand-off would cost more
+BATCH_DECRYPT_MIN_SIZE = 25
+
 
-def init_treasury_module(database, token_verifier):
+def init_treasury_module(database, token_verifier, blob_store=None):
     """Initialize treasury module with database and auth dependencies"""
-    global _db, _verify_token_func, _cipher_suite
+    global _db, _verify_token_func, _cipher_suite, _blob_store
     _db = database
+    _blob_store = blob_store
     _verify_token_func = token_verifier
     
     # Initialize encryption
@@ -63,6 +71,14 @@ def get_db():
     return _db
 
 
+def get_blob_store() -> BlobStore:
+    """Get the blob store holding receipts"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore(get_db())
+    return _blob_store
+
+
 def encrypt_value(value: str) -> str:
     """Encrypt a single value using AES-256 (Fernet)"""
     if not value or not _cipher_suite:
@@ -105,6 +121,13 @@ def decrypt_transaction(transaction: dict) -> dict:
     return decrypted
 
 
+async def decrypt_transactions(transactions: list) -> list:
+    """Decrypt a page of transactions, in a worker thread for larger pages so the event loop stays free"""
+    if not _cipher_suite or len(transactions) < BATCH_DECRYPT_MIN_SIZE:
+        return [decrypt_transaction(t) for t in transactions]
+    return await asyncio.to_thread(lambda: [decrypt_transaction(t) for t in transactions])
+
+
 def encrypt_account(account: dict) -> dict:
     """Encrypt sensitive account fields before storing"""
     encrypted = account.copy()
@@ -196,6 +219,9 @@ AUDIT_ACTIONS = {
     "budget_created": "Budget Created",
     "budget_updated": "Budget Updated",
     "budget_deleted": "Budget Deleted",
+    
+    # Report actions
+    "rollups_rebuilt": "Report Totals Rebuilt",
 }
 
 
@@ -28,12 +28,15 @@ from fastapi.staticfiles import StaticFiles
 sys.stderr.write("  [INIT] Importing Motor (MongoDB async)...\n")
 sys.stderr.flush()
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 sys.stderr.write("  [INIT] Importing logging & pathlib...\n")
 sys.stderr.flush()
 import os
 import logging
 from pathlib import Path
+from types import SimpleNamespace
 
 sys.stderr.write("✅ [INIT] Core imports successful\n")
 sys.stderr.flush()
@@ -44,6 +47,7 @@ sys.stderr.write("  [INIT] Importing typing & utils...\n")
 sys.stderr.flush()
 from typing import List, Optional
 import uuid
+import secrets
 from datetime import datetime, timezone, timedelta
 sys.stderr.write("  [INIT] Importing JWT...\n")
 sys.stderr.flush()
@@ -58,10 +62,6 @@ from io import StringIO
 sys.stderr.write("  [INIT] Importing responses...\n")
 sys.stderr.flush()
 from fastapi.responses import StreamingResponse, Response
-sys.stderr.write("  [INIT] Importing aiosmtplib...\n")
-sys.stderr.flush()
-import aiosmtplib
-import smtplib
 import httpx
 sys.stderr.write("  [INIT] Importing email MIME...\n")
 sys.stderr.flush()
@@ -73,6 +73,7 @@ from cryptography.fernet import Fernet
 sys.stderr.write("  [INIT] Importing hashlib...\n")
 sys.stderr.flush()
 import hashlib
+from cachetools import TTLCache
 sys.stderr.write("  [INIT] Importing Discord.py...\n")
 sys.stderr.flush()
 import discord
@@ -140,6 +141,12 @@ from utils import (
     hash_for_duplicate_detection
 )
 from utils.formatting import normalize_name, fuzzy_name_match
+from utils.matching import MemberMatcher
+from utils.mailer import Mailer
+from utils.discord_webhooks import DiscordWebhookClient
+from utils.notification_hub import NotificationHub, format_sse
+from utils.blob_store import BlobStore, BlobNotFound
+from utils.pdf_service import PDFService
 from utils.sanitization import sanitize_search_query
 sys.stderr.write("✅ [INIT] Utils package imported\n")
 sys.stderr.flush()
@@ -174,6 +181,8 @@ mongo_url = os.environ['MONGO_URL']
 # Don't connect immediately - let Motor connect lazily on first use
 client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
 db = client[os.environ['DB_NAME']]
+# GridFS-backed, content-addressed storage for uploaded files (template PDFs, receipts, forms)
+blob_store = BlobStore(db)
 sys.stderr.write("✅ [INIT] MongoDB client configured (will connect on first use)\n")
 sys.stderr.flush()
 
@@ -1545,10 +1554,6 @@ async def send_email_smtp(to_email: str, subject: str, html_body: str, plain_bod
         return {"success": False, "message": "SMTP not configured"}
     
     try:
-        import smtplib
-        from email.mime.text import MIMEText
-        from email.mime.multipart import MIMEMultipart
-        
         # Create message
         msg = MIMEMultipart('alternative')
         msg['Subject'] = subject
@@ -1564,18 +1569,8 @@ async def send_email_smtp(to_email: str, subject: str, html_body: str, plain_bod
         part2 = MIMEText(html_body, 'html')
         msg.attach(part2)
         
-        # Send email
-        if SMTP_USE_TLS:
-            # Port 587 with STARTTLS
-            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
-            server.starttls()
-        else:
-            # Port 465 with SSL
-            server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT)
-        
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        server.sendmail(SMTP_FROM_EMAIL, to_email, msg.as_string())
-        server.quit()
+        # Queue on the pooled mailer (reuses an open, authenticated connection)
+        await smtp_mailer.send(msg)
         
         logger.info(f"Email sent successfully to {to_email}: {subject}")
         return {"success": True, "message": f"Email sent to {to_email}"}
@@ -1619,6 +1614,38 @@ SMTP_PORT = int(os.environ.get('SMTP_PORT', '465'))
 SMTP_EMAIL = os.environ.get('SMTP_EMAIL', '')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
 
+# Pooled outbound mail - connections are opened lazily and reused across sends
+# SMTP_USE_TLS=true means STARTTLS (port 587), otherwise implicit SSL (port 465)
+smtp_mailer = Mailer(
+    hostname=SMTP_HOST,
+    port=SMTP_PORT,
+    username=SMTP_USERNAME,
+    password=SMTP_PASSWORD,
+    from_email=SMTP_FROM_EMAIL,
+    use_tls=not SMTP_USE_TLS,
+    start_tls=SMTP_USE_TLS,
+    concurrency=int(os.environ.get('SMTP_POOL_SIZE', 4)),
+)
+support_mailer = Mailer(
+    hostname=SMTP_HOST,
+    port=SMTP_PORT,
+    username=SUPPORT_SMTP_USERNAME,
+    password=SUPPORT_SMTP_PASSWORD,
+    from_email=SUPPORT_SMTP_USERNAME,
+    use_tls=True,
+    concurrency=1,
+)
+# Invites, password resets and support mail log in with SMTP_EMAIL over implicit SSL
+account_mailer = Mailer(
+    hostname=SMTP_HOST,
+    port=SMTP_PORT,
+    username=SMTP_EMAIL,
+    password=SMTP_PASSWORD,
+    from_email=SMTP_EMAIL,
+    use_tls=True,
+    concurrency=2,
+)
+
 
 # Helper functions for encrypting/decrypting member data
 def encrypt_member_sensitive_data(member_data: dict) -> dict:
@@ -1637,6 +1664,112 @@ def encrypt_member_sensitive_data(member_data: dict) -> dict:
 
 # format_phone_number, sanitize_for_regex, sanitize_string_input imported from utils package
 
+def member_date_fields(member_data: dict) -> dict:
+    """
+    Derived, indexed month/day fields for whichever of dob / join_date are present:
+    dob_md ("MM-DD"), dob_doy (day of year in a leap-year calendar) and join_month (1-12).
+    Birthday and anniversary lookups query these instead of parsing every member.
+    """
+    derived = {}
+    if 'dob' in member_data:
+        dob_md, dob_doy = None, None
+        try:
+            dob_date = datetime.strptime((member_data['dob'] or '')[:10], "%Y-%m-%d")
+            dob_md = dob_date.strftime("%m-%d")
+            dob_doy = datetime(2000, dob_date.month, dob_date.day).timetuple().tm_yday
+        except ValueError:
+            pass
+        derived['dob_md'] = dob_md
+        derived['dob_doy'] = dob_doy
+    if 'join_date' in member_data:
+        join_month = None
+        try:
+            month = int(str(member_data['join_date']).split('/')[0])
+            join_month = month if 1 <= month <= 12 else None
+        except ValueError:
+            pass
+        derived['join_month'] = join_month
+    return derived
+
+
+def leap_day_of_year(date_value) -> int:
+    """Day of year on the leap-year calendar used by dob_doy"""
+    return datetime(2000, date_value.month, date_value.day).timetuple().tm_yday
+
+
+async def backfill_member_date_fields():
+    """Populate dob_md / dob_doy / join_month on members written before they existed"""
+    updated = 0
+    cursor = db.members.find(
+        {"$or": [{"dob_md": {"$exists": False}}, {"join_month": {"$exists": False}}]},
+        {"_id": 0, "id": 1, "dob": 1, "join_date": 1}
+    )
+    async for member in cursor:
+        fields = member_date_fields({"dob": member.get("dob"), "join_date": member.get("join_date")})
+        await db.members.update_one({"id": member.get("id")}, {"$set": fields})
+        updated += 1
+    return updated
+
+
+# Running aggregate behind the public /stats/experience endpoint. Each member's
+# experience_start ("MM/YYYY") contributes the day ordinal of the 1st of that
+# month; total years is then (count * today - sum) / 365.25. Only starts before
+# `as_of` are counted, so the aggregate is rebuilt once per day to pick up
+# future-dated starts and anything written outside the hooked endpoints.
+EXPERIENCE_STATS_ID = "experience"
+
+
+def experience_start_ordinal(value) -> Optional[int]:
+    """Day ordinal of an "MM/YYYY" experience start, or None if unparseable"""
+    if not value:
+        return None
+    try:
+        parts = value.split("/")
+        if len(parts) == 2:
+            return datetime(int(parts[1]), int(parts[0]), 1).toordinal()
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+async def rebuild_experience_stats() -> dict:
+    """Recompute the experience aggregate from all members"""
+    today = datetime.now(timezone.utc).date()
+    ordinal_sum = 0
+    count = 0
+    async for member in db.members.find({"experience_start": {"$nin": [None, ""]}}, {"_id": 0, "experience_start": 1}):
+        ordinal = experience_start_ordinal(member.get("experience_start"))
+        if ordinal is not None and ordinal < today.toordinal():
+            ordinal_sum += ordinal
+            count += 1
+    stats = {
+        "id": EXPERIENCE_STATS_ID,
+        "start_ordinal_sum": ordinal_sum,
+        "member_count": count,
+        "as_of": today.isoformat()
+    }
+    await db.member_stats.replace_one({"id": EXPERIENCE_STATS_ID}, stats, upsert=True)
+    return stats
+
+
+async def adjust_experience_stats(old_start=None, new_start=None):
+    """Apply one member's experience_start change to today's aggregate"""
+    today = datetime.now(timezone.utc).date()
+    delta_sum = 0
+    delta_count = 0
+    for value, sign in ((old_start, -1), (new_start, 1)):
+        ordinal = experience_start_ordinal(value)
+        if ordinal is not None and ordinal < today.toordinal():
+            delta_sum += sign * ordinal
+            delta_count += sign
+    if delta_count or delta_sum:
+        # A stale (previous day) aggregate is rebuilt on next read, so leave it alone
+        await db.member_stats.update_one(
+            {"id": EXPERIENCE_STATS_ID, "as_of": today.isoformat()},
+            {"$inc": {"start_ordinal_sum": delta_sum, "member_count": delta_count}}
+        )
+
+
 def decrypt_member_sensitive_data(member_data: dict) -> dict:
     """Decrypt sensitive member fields"""
     decrypted = member_data.copy()
@@ -1726,14 +1859,7 @@ async def send_invite_email(email: str, token: str, role: str):
     message.attach(part2)
     
     try:
-        await aiosmtplib.send(
-            message,
-            hostname=SMTP_HOST,
-            port=SMTP_PORT,
-            username=SMTP_EMAIL,
-            password=SMTP_PASSWORD,
-            use_tls=True
-        )
+        await account_mailer.send(message)
         logger.info(f"Invite email sent to {email}")
         return True
     except Exception as e:
@@ -1775,14 +1901,7 @@ async def send_email(to_email: str, subject: str, body: str):
     message.attach(part2)
     
     try:
-        await aiosmtplib.send(
-            message,
-            hostname=SMTP_HOST,
-            port=SMTP_PORT,
-            username=SMTP_EMAIL,
-            password=SMTP_PASSWORD,
-            use_tls=True
-        )
+        await account_mailer.send(message)
         logger.info(f"Email sent to {to_email}")
         return True
     except Exception as e:
@@ -2157,13 +2276,20 @@ async def log_activity(username: str, action: str, details: str, ip_address: str
 #   - models/documents.py: In-house document signing models
 # ==================== END PYDANTIC MODELS ====================
 
+# Worker processes for PDF parsing/rendering in the document module
+pdf_service = PDFService(
+    max_workers=int(os.environ.get('PDF_WORKERS', '0')) or None,
+    timeout=float(os.environ.get('PDF_TIMEOUT_SECONDS', '60')),
+    memory_limit_mb=int(os.environ.get('PDF_WORKER_MEMORY_MB', '1024'))
+)
+
 # Initialize documents router with dependencies
-from routes.documents import init_router as init_documents_router
-init_documents_router(db, verify_token, verify_admin)
+from routes.documents import init_router as init_documents_router, backfill_signing_tokens
+init_documents_router(db, verify_token, verify_admin, blob_store, pdf_service)
 
 # Initialize treasury router with dependencies
-from routes.treasury import init_router as init_treasury_router
-init_treasury_router(db, verify_token)
+from routes.treasury import init_router as init_treasury_router, rebuild_monthly_rollups, rollups_built
+init_treasury_router(db, verify_token, blob_store)
 
 # Initialize default admin user
 @app.on_event("startup")
@@ -2475,6 +2601,135 @@ Brothers of the Highway""",
     except Exception as e:
         print(f"⚠️ [STARTUP] Failed to seed dues email templates: {str(e)}", file=sys.stderr, flush=True)
 
+@app.on_event("startup")
+async def ensure_database_indexes():
+    """Create indexes used by sync jobs and hot query paths (idempotent)"""
+    try:
+        # Square sync state - one document per sync stream
+        await db.square_sync_state.create_index("id", unique=True)
+        await db.synced_payment_links.create_index("payment_id")
+        await db.synced_payments.create_index([("payment_id", 1), ("member_id", 1), ("year", 1), ("month", 1)])
+        # Auto-sync payments waiting for a subscription/member match - dropped after the lookback window
+        await db.square_sync_pending.create_index("payment_id", unique=True)
+        await db.square_sync_pending.create_index("purge_at", expireAfterSeconds=0)
+        # Payment-link dues payments that matched no member yet
+        await db.payment_link_pending.create_index("payment_id", unique=True)
+        await db.payment_link_pending.create_index("purge_at", expireAfterSeconds=0)
+        
+        # Square webhook inbox - dedupe by event_id, worker claims by due time
+        await db.square_webhook_inbox.create_index("event_id", unique=True)
+        await db.square_webhook_inbox.create_index([("status", 1), ("next_attempt_at", 1)])
+        await db.external_dues_payments.create_index("square_payment_id")
+        await db.unmatched_payments.create_index("square_payment_id")
+        
+        # Event reminders - scheduler only reads events with a due notify_at
+        await db.events.create_index("next_notify_at")
+        await db.events.create_index("id")
+        backfilled = await backfill_event_notification_state()
+        if backfilled:
+            print(f"✅ [STARTUP] Scheduled reminders for {backfilled} existing event(s)", file=sys.stderr, flush=True)
+        
+        # Birthday / anniversary lookups by derived month-day fields
+        await db.members.create_index("dob_md")
+        await db.members.create_index("dob_doy")
+        await db.members.create_index("join_month")
+        backfilled = await backfill_member_date_fields()
+        if backfilled:
+            print(f"✅ [STARTUP] Derived birthday/anniversary fields for {backfilled} member(s)", file=sys.stderr, flush=True)
+        
+        # Private message conversation summaries
+        await db.conversations.create_index("id", unique=True)
+        await db.conversations.create_index([("participants", 1), ("last_timestamp", -1)])
+        await db.private_messages.create_index([("conversation_id", 1), ("timestamp", -1), ("id", -1)])
+        await db.private_messages.create_index([("timestamp", -1), ("id", -1)])
+        # Unread badge counts pushed by the live notification stream
+        await db.private_messages.create_index([("recipient", 1), ("read", 1)])
+        # One-time tickets that open the stream, purged once expired
+        await db.notification_stream_tickets.create_index("ticket", unique=True)
+        await db.notification_stream_tickets.create_index("expires_at", expireAfterSeconds=0)
+        
+        # Rendered template page images, keyed by PDF content hash
+        await db.template_page_images.create_index([("pdf_hash", 1), ("page", 1), ("zoom", 1)], unique=True)
+        
+        # Public signing links - one point lookup per token, purged a while after the link expires
+        await db.signing_tokens.create_index("token", unique=True)
+        await db.signing_tokens.create_index("request_id")
+        await db.signing_tokens.create_index("purge_at", expireAfterSeconds=0)
+        await db.signing_requests.create_index("id")
+        # Fallback lookups for links not (yet) in signing_tokens
+        await db.signing_requests.create_index("signing_token")
+        await db.signing_requests.create_index("approval_chain.signing_token")
+        await db.document_migrations.create_index("id", unique=True)
+        
+        # Suggestion box: listing order, per-user vote lookups, cached tallies
+        await db.suggestions.create_index("id")
+        await db.suggestions.create_index([("created_at", -1)])
+        await db.suggestions.create_index("upvotes")
+        await db.suggestions.create_index("downvotes")
+        backfilled = await backfill_suggestion_vote_counts()
+        if backfilled:
+            print(f"✅ [STARTUP] Backfilled vote counts on {backfilled} suggestion(s)", file=sys.stderr, flush=True)
+        
+        # Treasury ledger listing by type and date range, and keyset pages per account/category
+        await db.treasury_transactions.create_index([("type", 1), ("date", 1)])
+        await db.treasury_transactions.create_index(
+            [("type", 1), ("account_id", 1), ("category_id", 1), ("date", -1), ("id", -1)]
+        )
+        
+        # Dues reminder planning - bulk lookups by member id
+        await db.dues_reminder_sent.create_index([("member_id", 1), ("year", 1), ("month", 1), ("template_id", 1)])
+        await db.dues_extensions.create_index("member_id")
+        print("✅ [STARTUP] Database indexes ensured", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"⚠️ [STARTUP] Failed to ensure database indexes: {str(e)}", file=sys.stderr, flush=True)
+
+@app.on_event("startup")
+async def ensure_signing_tokens():
+    """Index signing links of existing requests once; unindexed links resolve on the request until then"""
+    try:
+        backfilled = await backfill_signing_tokens()
+        if backfilled:
+            print(f"✅ [STARTUP] Indexed signing links for {backfilled} request(s)", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"⚠️ [STARTUP] Failed to index signing links: {str(e)}", file=sys.stderr, flush=True)
+
+@app.on_event("startup")
+async def ensure_conversation_history():
+    """Tag and summarize messages sent before conversations existed; threads query by sender/recipient until then"""
+    try:
+        tagged = await backfill_message_conversation_ids()
+        if tagged:
+            print(f"✅ [STARTUP] Tagged messages of {tagged} conversation(s)", file=sys.stderr, flush=True)
+        if not await db.conversations.find_one({}, {"_id": 1}) and await db.private_messages.find_one({}, {"_id": 1}):
+            rebuilt = await rebuild_conversation_index()
+            print(f"✅ [STARTUP] Built {rebuilt} conversation summaries", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"⚠️ [STARTUP] Failed to migrate conversation history: {str(e)}", file=sys.stderr, flush=True)
+
+@app.on_event("startup")
+async def ensure_blob_storage():
+    """Move base64/disk file storage into the blob store"""
+    try:
+        migrated = await migrate_inline_blobs()
+        if any(migrated.values()):
+            print(f"✅ [STARTUP] Moved files to blob store: {migrated}", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"⚠️ [STARTUP] Failed to move files to blob store: {str(e)}", file=sys.stderr, flush=True)
+
+@app.on_event("startup")
+async def ensure_treasury_rollups():
+    """Build treasury monthly rollups once; reports read the ledger until this has succeeded"""
+    try:
+        await db.treasury_monthly_rollups.create_index(
+            [("year", 1), ("month", 1), ("type", 1), ("category_id", 1), ("account_id", 1)], unique=True
+        )
+        await db.treasury_rollup_state.create_index("id", unique=True)
+        if not await rollups_built(db):
+            rebuilt = await rebuild_monthly_rollups(db)
+            print(f"✅ [STARTUP] Built {rebuilt} treasury monthly rollups", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"⚠️ [STARTUP] Failed to build treasury monthly rollups: {str(e)}", file=sys.stderr, flush=True)
+
 # Auth endpoints
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(login_data: LoginRequest):
@@ -2519,13 +2774,13 @@ async def login(login_data: LoginRequest):
     # This ensures explicitly granted user permissions aren't overridden by title permissions
     all_permissions = {**dynamic_permissions, **static_permissions}
     
-    # Trigger Square catalog sync in background (non-blocking)
-    # Only runs if user is a store admin (doesn't matter, sync is idempotent)
+    # Request a Square catalog sync in background (non-blocking)
+    # Debounced and single-flight, so a login rush starts at most one sync
     try:
-        asyncio.create_task(trigger_catalog_sync_background())
-        logger.info(f"Auto-sync triggered on login for user: {user['username']}")
+        if request_catalog_sync():
+            logger.info(f"Catalog sync requested on login for user: {user['username']}")
     except Exception as e:
-        logger.warning(f"Failed to trigger auto-sync: {str(e)}")
+        logger.warning(f"Failed to request catalog sync: {str(e)}")
     
     return LoginResponse(
         token=token, 
@@ -2658,14 +2913,7 @@ If you did not request this password reset, please ignore this email.
             html_part = MIMEText(html_body, "html")
             message.attach(html_part)
             
-            await aiosmtplib.send(
-                message,
-                hostname=SMTP_HOST,
-                port=SMTP_PORT,
-                username=SMTP_EMAIL,
-                password=SMTP_PASSWORD,
-                use_tls=True
-            )
+            await account_mailer.send(message)
             
             # Return masked email for privacy
             email_parts = user_email.split('@')
@@ -2815,14 +3063,7 @@ Reason for Request:
             message.attach(part1)
             message.attach(part2)
             
-            await aiosmtplib.send(
-                message,
-                hostname=SMTP_HOST,
-                port=SMTP_PORT,
-                username=SMTP_EMAIL,
-                password=SMTP_PASSWORD,
-                use_tls=True
-            )
+            await account_mailer.send(message)
             logger.info(f"Support request sent from {request.name}")
             return {"success": True, "message": "Support request submitted successfully"}
         else:
@@ -3016,6 +3257,7 @@ async def create_member(member_data: MemberCreate, current_user: dict = Depends(
     doc = member.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
+    doc.update(member_date_fields(doc))
     
     # Add email hash for duplicate detection before encryption
     if doc.get('email'):
@@ -3025,6 +3267,7 @@ async def create_member(member_data: MemberCreate, current_user: dict = Depends(
     doc = encrypt_member_sensitive_data(doc)
     
     await db.members.insert_one(doc)
+    await adjust_experience_stats(new_start=doc.get("experience_start"))
     
     # Log activity
     await log_activity(
@@ -3081,6 +3324,7 @@ async def update_member(member_id: str, member_data: MemberUpdate, current_user:
     
     update_data = {k: v for k, v in member_data.model_dump().items() if v is not None}
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data.update(member_date_fields(update_data))
     
     # Add email hash if email is being updated
     if update_data.get('email'):
@@ -3090,6 +3334,8 @@ async def update_member(member_id: str, member_data: MemberUpdate, current_user:
     update_data = encrypt_member_sensitive_data(update_data)
     
     await db.members.update_one({"id": member_id}, {"$set": update_data})
+    if "experience_start" in update_data and update_data["experience_start"] != member.get("experience_start"):
+        await adjust_experience_stats(member.get("experience_start"), update_data["experience_start"])
     
     updated_member = await db.members.find_one({"id": member_id}, {"_id": 0})
     # Decrypt for response
@@ -3569,6 +3815,7 @@ async def delete_member(
     
     # Remove from active members
     await db.members.delete_one({"id": member_id})
+    await adjust_experience_stats(old_start=member.get("experience_start"))
     
     # Clean up any Discord suspension records
     await db.discord_suspensions.delete_one({"member_id": member_id})
@@ -5254,6 +5501,8 @@ async def promote_prospect_to_member(
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
+    member_data.update(member_date_fields(member_data))
+    
     # Encrypt sensitive data
     member_data = encrypt_member_sensitive_data(member_data)
     
@@ -5271,6 +5520,7 @@ async def promote_prospect_to_member(
     
     # Insert into members collection
     await db.members.insert_one(member_data)
+    await adjust_experience_stats(new_start=member_data.get("experience_start"))
     
     # Delete from prospects collection
     await db.prospects.delete_one({"id": prospect_id})
@@ -5337,6 +5587,8 @@ async def bulk_promote_prospects(
                 "updated_at": datetime.now(timezone.utc).isoformat()
             }
             
+            member_data.update(member_date_fields(member_data))
+            
             # Encrypt sensitive data
             member_data = encrypt_member_sensitive_data(member_data)
             
@@ -5356,6 +5608,7 @@ async def bulk_promote_prospects(
             
             # Insert into members collection
             await db.members.insert_one(member_data)
+            await adjust_experience_stats(new_start=member_data.get("experience_start"))
             
             # Delete from prospects collection
             await db.prospects.delete_one({"id": prospect_id})
@@ -6121,9 +6374,11 @@ async def restore_archived_member(member_id: str, current_user: dict = Depends(v
     
     # Update timestamps
     archived_member["updated_at"] = datetime.now(timezone.utc).isoformat()
+    archived_member.update(member_date_fields(archived_member))
     
     # Move back to active members
     await db.members.insert_one(archived_member)
+    await adjust_experience_stats(new_start=archived_member.get("experience_start"))
     
     # Remove from archived collection
     await db.archived_members.delete_one({"id": member_id})
@@ -6211,9 +6466,7 @@ Welcome back, Brother!
                             msg.attach(MIMEText(text_content, 'plain'))
                             msg.attach(MIMEText(html_content, 'html'))
                             
-                            with smtplib.SMTP_SSL(SMTP_HOST, int(SMTP_PORT)) as server:
-                                server.login(SUPPORT_SMTP_USERNAME, SUPPORT_SMTP_PASSWORD)
-                                server.sendmail(SUPPORT_SMTP_USERNAME, personal_email, msg.as_string())
+                            await support_mailer.send(msg)
                             
                             discord_invite_sent = True
                             sys.stderr.write(f"✅ Discord invite sent to {personal_email} for restored member {member_handle}\n")
@@ -6404,6 +6657,352 @@ async def export_archived_prospects_csv(current_user: dict = Depends(verify_admi
         headers={"Content-Disposition": "attachment; filename=archived_prospects.csv"}
     )
 
+# ==================== LIVE NOTIFICATIONS ====================
+# Server-Sent Events stream backed by an in-process hub. Writes that change a
+# badge count publish the new value to connected users, so clients no longer
+# poll the count endpoints. Counts are computed once per write (and only when
+# someone who cares is connected) instead of once per poll per open tab.
+
+SUPPORT_INBOX_OWNER = "Lonestar"
+NOTIFICATION_KEEPALIVE_SECONDS = 25
+NOTIFICATION_TICKET_SECONDS = 60  # EventSource can't send headers; it opens the stream with a one-time ticket
+
+notification_hub = NotificationHub()
+
+
+async def count_unread_private_messages(username: str) -> int:
+    return await db.private_messages.count_documents({"recipient": username, "read": False})
+
+
+async def count_open_support_messages() -> int:
+    return await db.support_messages.count_documents({"status": "open"})
+
+
+async def count_upcoming_events(chapter: Optional[str]) -> int:
+    """Upcoming events visible to a chapter (all-chapter events included)"""
+    from datetime import date
+    query = {"date": {"$gte": date.today().isoformat()}}
+    if chapter:
+        query["$or"] = [{"chapter": chapter}, {"chapter": None}]
+    return await db.events.count_documents(query)
+
+
+async def push_unread_count(*usernames: str):
+    """Publish fresh unread private-message counts to connected users"""
+    for username in set(usernames):
+        if notification_hub.is_connected(username):
+            notification_hub.publish(username, "unread_messages", {
+                "unread_count": await count_unread_private_messages(username)
+            })
+
+
+async def push_support_count():
+    """Publish the open support-ticket count to the support inbox owner"""
+    if notification_hub.is_connected(SUPPORT_INBOX_OWNER):
+        notification_hub.publish(SUPPORT_INBOX_OWNER, "support_messages", {
+            "count": await count_open_support_messages()
+        })
+
+
+async def push_upcoming_events_count():
+    """Publish upcoming-event counts, one count query per connected chapter"""
+    chapters = {user.get("chapter") for user in notification_hub.connected_users()}
+    for chapter in chapters:
+        count = await count_upcoming_events(chapter)
+        notification_hub.publish_where(
+            lambda user, chapter=chapter: user.get("chapter") == chapter,
+            "upcoming_events",
+            {"count": count}
+        )
+
+
+upcoming_events_rollover_task = None
+
+
+async def run_upcoming_events_rollover():
+    """Re-publish upcoming-event counts after each midnight, when past events drop out of the count"""
+    from datetime import date
+    while True:
+        tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        await asyncio.sleep(max(1, (tomorrow - datetime.now()).total_seconds() + 1))
+        try:
+            await push_upcoming_events_count()
+        except Exception as e:
+            logger.error(f"Failed to publish upcoming event counts: {str(e)}")
+
+
+@app.on_event("startup")
+async def start_upcoming_events_rollover():
+    """Start the daily upcoming-event badge refresh"""
+    global upcoming_events_rollover_task
+    upcoming_events_rollover_task = asyncio.create_task(run_upcoming_events_rollover())
+
+
+@api_router.post("/notifications/stream-ticket")
+async def create_notification_stream_ticket(current_user: dict = Depends(verify_token)):
+    """Single-use, short-lived ticket for opening the notification stream (keeps the session token out of URLs)"""
+    ticket = secrets.token_urlsafe(32)
+    await db.notification_stream_tickets.insert_one({
+        "ticket": ticket,
+        "user": current_user,
+        "expires_at": datetime.now(timezone.utc) + timedelta(seconds=NOTIFICATION_TICKET_SECONDS)
+    })
+    return {"ticket": ticket, "expires_in": NOTIFICATION_TICKET_SECONDS}
+
+
+@api_router.get("/notifications/stream")
+async def notification_stream(request: Request, ticket: Optional[str] = None):
+    """
+    Live badge/message updates as Server-Sent Events.
+    Authenticated with a ticket from POST /notifications/stream-ticket (?ticket=),
+    or with the usual Authorization header for clients that can send one.
+    """
+    if ticket:
+        issued = await db.notification_stream_tickets.find_one_and_delete({
+            "ticket": ticket,
+            "expires_at": {"$gt": datetime.now(timezone.utc)}
+        })
+        if not issued:
+            raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+        current_user = issued["user"]
+    else:
+        authorization = request.headers.get("Authorization", "")
+        if not authorization.lower().startswith("bearer "):
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        current_user = await verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=authorization[7:]))
+    username = current_user["username"]
+    
+    subscription = notification_hub.subscribe(current_user)
+    
+    async def event_stream():
+        try:
+            # Initial snapshot so the client can render badges without extra requests
+            yield format_sse("unread_messages", {"unread_count": await count_unread_private_messages(username)})
+            yield format_sse("upcoming_events", {"count": await count_upcoming_events(current_user.get("chapter"))})
+            if username == SUPPORT_INBOX_OWNER:
+                yield format_sse("support_messages", {"count": await count_open_support_messages()})
+            
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), timeout=NOTIFICATION_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            notification_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ==================== CONVERSATION INDEX ====================
+# One summary document per user pair: participants (sorted), last message
+# snapshot, per-participant unread counters (keyed by participant index) and
+# archived_by. Maintained on every private-message write so the inbox is a
+# single indexed read instead of a scan of the whole message history.
+
+def conversation_participants(user_a: str, user_b: str) -> list:
+    """Participants in stored (sorted) order"""
+    return sorted([user_a, user_b])
+
+
+def conversation_id(user_a: str, user_b: str) -> str:
+    """Stable id for the conversation between two users"""
+    return hashlib.sha256("\x00".join(conversation_participants(user_a, user_b)).encode()).hexdigest()
+
+
+def conversation_view(conversation: dict, username: str) -> dict:
+    """Inbox entry for one participant (same shape the inbox endpoints always returned)"""
+    participants = conversation.get("participants", [])
+    index = participants.index(username)
+    return {
+        "username": participants[1 - index],
+        "lastMessage": conversation.get("last_message"),
+        "unreadCount": (conversation.get("unread") or {}).get(str(index), 0)
+    }
+
+
+async def record_conversation_message(message: dict):
+    """Update the pair summary for a newly sent message (two atomic updates)"""
+    participants = conversation_participants(message["sender"], message["recipient"])
+    recipient_index = participants.index(message["recipient"])
+    summary_id = conversation_id(message["sender"], message["recipient"])
+    await db.conversations.update_one(
+        {"id": summary_id},
+        {
+            "$setOnInsert": {
+                "id": summary_id,
+                "participants": participants
+            },
+            "$inc": {f"unread.{recipient_index}": 1},
+            # A new message moves the conversation back to both main inboxes; unlike
+            # per-message archiving, it then no longer shows in the archived inbox
+            "$pull": {"archived_by": {"$in": participants}}
+        },
+        upsert=True
+    )
+    # Concurrent sends may land out of order; keep the newest message as the snapshot
+    await db.conversations.update_one(
+        {
+            "id": summary_id,
+            "$or": [{"last_timestamp": {"$exists": False}}, {"last_timestamp": {"$lt": message["timestamp"]}}]
+        },
+        {"$set": {"last_message": message, "last_timestamp": message["timestamp"]}}
+    )
+
+
+async def rebuild_conversation_index():
+    """Build conversation summaries from private_messages (one-time migration)"""
+    summaries = {}
+    async for msg in db.private_messages.find({}, {"_id": 0}).sort("timestamp", 1):
+        participants = conversation_participants(msg["sender"], msg["recipient"])
+        key = conversation_id(msg["sender"], msg["recipient"])
+        summary = summaries.setdefault(key, {
+            "id": key,
+            "participants": participants,
+            "unread": {"0": 0, "1": 0}
+        })
+        summary["last_message"] = msg
+        summary["last_timestamp"] = msg["timestamp"]
+        if not msg.get("read"):
+            index = str(participants.index(msg["recipient"]))
+            summary["unread"][index] += 1
+    
+    for summary in summaries.values():
+        # Archived for a user when their most recent message in it is archived
+        summary["archived_by"] = [
+            user for user in summary["participants"]
+            if user in (summary["last_message"].get("archived_by") or [])
+        ]
+        await db.conversations.replace_one({"id": summary["id"]}, summary, upsert=True)
+    return len(summaries)
+
+
+# Keyset pagination over (timestamp, id). Cursors are opaque to clients and
+# returned in X-Next-Cursor (older page, pass as `before`) / X-Prev-Cursor
+# (newer page, pass as `after`); the body stays a chronological list.
+MESSAGE_PAGE_MAX = 1000
+
+
+def encode_message_cursor(message: dict) -> str:
+    """Opaque cursor pointing at one message"""
+    import base64
+    raw = f"{message['timestamp']}\x00{message['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_message_cursor(cursor: str) -> tuple:
+    """(timestamp, id) from a cursor, or 400 if it is malformed"""
+    import base64
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, message_id = raw.split("\x00", 1)
+        return timestamp, message_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid message cursor")
+
+
+async def fetch_message_page(
+    base_query: dict,
+    response: Response,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+) -> list:
+    """
+    One page of private messages in chronological order.
+    Newest page by default; `before` pages back in time, `after` pages forward.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+    limit = max(1, min(limit, MESSAGE_PAGE_MAX))
+    
+    query = dict(base_query)
+    if after:
+        timestamp, message_id = decode_message_cursor(after)
+        query["$or"] = [
+            {"timestamp": {"$gt": timestamp}},
+            {"timestamp": timestamp, "id": {"$gt": message_id}}
+        ]
+        direction = 1
+    else:
+        if before:
+            timestamp, message_id = decode_message_cursor(before)
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "id": {"$lt": message_id}}
+            ]
+        direction = -1
+    
+    # Fetch one extra row to know whether another page exists in that direction
+    rows = await db.private_messages.find(query, {"_id": 0}).sort(
+        [("timestamp", direction), ("id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == -1:
+        rows.reverse()
+    
+    if rows:
+        # Paging from a cursor implies rows exist on the cursor's side
+        older_exists = has_more if direction == -1 else True
+        newer_exists = has_more if direction == 1 else bool(before)
+        if older_exists:
+            response.headers["X-Next-Cursor"] = encode_message_cursor(rows[0])
+        if newer_exists:
+            response.headers["X-Prev-Cursor"] = encode_message_cursor(rows[-1])
+    return rows
+
+
+# Marker in document_migrations written once every message has a conversation_id
+MESSAGE_CONVERSATION_BACKFILL_ID = "message_conversation_ids"
+message_conversation_ids_ready = False
+
+
+async def conversation_ids_backfilled() -> bool:
+    """True once all messages carry conversation_id (checked in the DB until then)"""
+    global message_conversation_ids_ready
+    if not message_conversation_ids_ready:
+        message_conversation_ids_ready = bool(
+            await db.document_migrations.find_one({"id": MESSAGE_CONVERSATION_BACKFILL_ID}, {"_id": 1})
+        )
+    return message_conversation_ids_ready
+
+
+async def backfill_message_conversation_ids():
+    """Tag private messages written before conversation_id existed, once"""
+    if await conversation_ids_backfilled():
+        return 0
+    pairs = set()
+    async for msg in db.private_messages.find(
+        {"conversation_id": {"$exists": False}},
+        {"_id": 0, "sender": 1, "recipient": 1}
+    ):
+        pairs.add(tuple(conversation_participants(msg["sender"], msg["recipient"])))
+    for user_a, user_b in pairs:
+        await db.private_messages.update_many(
+            {
+                "$or": [
+                    {"sender": user_a, "recipient": user_b},
+                    {"sender": user_b, "recipient": user_a}
+                ],
+                "conversation_id": {"$exists": False}
+            },
+            {"$set": {"conversation_id": conversation_id(user_a, user_b)}}
+        )
+    
+    await db.document_migrations.update_one(
+        {"id": MESSAGE_CONVERSATION_BACKFILL_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc).isoformat(), "conversations": len(pairs)}},
+        upsert=True
+    )
+    global message_conversation_ids_ready
+    message_conversation_ids_ready = True
+    return len(pairs)
+
+
 # Private messaging endpoints (all authenticated users)
 @api_router.post("/messages", response_model=PrivateMessage)
 async def send_private_message(message: PrivateMessageCreate, current_user: dict = Depends(verify_token)):
@@ -6435,7 +7034,13 @@ async def send_private_message(message: PrivateMessageCreate, current_user: dict
         read=False
     )
     
-    await db.private_messages.insert_one(private_message.model_dump())
+    doc = private_message.model_dump()
+    doc["conversation_id"] = conversation_id(doc["sender"], doc["recipient"])
+    await db.private_messages.insert_one(doc)
+    await record_conversation_message(private_message.model_dump())
+    
+    notification_hub.publish(private_message.recipient, "private_message", private_message.model_dump())
+    await push_unread_count(private_message.recipient)
     
     return private_message
 
@@ -6444,58 +7049,35 @@ async def get_conversations(current_user: dict = Depends(verify_token)):
     """Get list of conversations with last message"""
     username = current_user['username']
     
-    # Get all messages where user is sender or recipient, sorted by timestamp
-    # Exclude archived conversations
-    messages = await db.private_messages.find(
-        {
-            "$or": [
-                {"sender": username},
-                {"recipient": username}
-            ],
-            "archived_by": {"$ne": username}  # Exclude archived
-        },
-        {"_id": 0}  # Exclude MongoDB ObjectId
-    ).sort("timestamp", -1).to_list(None)
-    
-    # Group by conversation partner
-    conversations_dict = {}
-    for msg in messages:
-        # Determine the other user in the conversation
-        other_user = msg['recipient'] if msg['sender'] == username else msg['sender']
-        
-        if other_user not in conversations_dict:
-            conversations_dict[other_user] = {
-                "username": other_user,
-                "lastMessage": msg,
-                "unreadCount": 0
-            }
-        
-        # Count unread messages (where current user is recipient and message is unread)
-        if msg['recipient'] == username and not msg['read']:
-            conversations_dict[other_user]['unreadCount'] += 1
-    
-    # Convert dict to list and sort by last message timestamp
-    conversations = list(conversations_dict.values())
-    conversations.sort(key=lambda x: x['lastMessage']['timestamp'], reverse=True)
+    # One indexed read over the conversation summaries, excluding archived ones
+    conversations = await db.conversations.find(
+        {"participants": username, "archived_by": {"$ne": username}},
+        {"_id": 0}
+    ).sort("last_timestamp", -1).to_list(None)
     
-    return conversations
+    return [conversation_view(c, username) for c in conversations]
 
 @api_router.get("/messages/{other_user}")
-async def get_messages_with_user(other_user: str, current_user: dict = Depends(verify_token)):
-    """Get messages with a specific user"""
+async def get_messages_with_user(
+    other_user: str,
+    response: Response,
+    limit: int = 100,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Get messages with a specific user - newest page first, keyset-paginated via before/after cursors"""
     username = current_user['username']
     
-    messages = await db.private_messages.find(
-        {
-            "$or": [
-                {"sender": username, "recipient": other_user},
-                {"sender": other_user, "recipient": username}
-            ]
-        },
-        {"_id": 0}
-    ).sort("timestamp", 1).limit(100).to_list(100)
-    
-    return messages
+    if await conversation_ids_backfilled():
+        query = {"conversation_id": conversation_id(username, other_user)}
+    else:
+        # Older messages may not be tagged yet; $and leaves $or free for the page cursor
+        query = {"$and": [{"$or": [
+            {"sender": username, "recipient": other_user},
+            {"sender": other_user, "recipient": username}
+        ]}]}
+    return await fetch_message_page(query, response, limit, before, after)
 
 @api_router.post("/messages/mark_read/{other_user}")
 async def mark_private_messages_read(other_user: str, current_user: dict = Depends(verify_token)):
@@ -6511,6 +7093,13 @@ async def mark_private_messages_read(other_user: str, current_user: dict = Depen
         {"$set": {"read": True}}
     )
     
+    participants = conversation_participants(username, other_user)
+    await db.conversations.update_one(
+        {"id": conversation_id(username, other_user)},
+        {"$set": {f"unread.{participants.index(username)}": 0}}
+    )
+    await push_unread_count(username)
+    
     return {"message": "Messages marked as read"}
 
 @api_router.get("/messages/unread/count")
@@ -6518,10 +7107,7 @@ async def get_unread_private_messages_count(current_user: dict = Depends(verify_
     """Get count of unread private messages"""
     username = current_user['username']
     
-    count = await db.private_messages.count_documents({
-        "recipient": username,
-        "read": False
-    })
+    count = await count_unread_private_messages(username)
     
     return {"unread_count": count}
 
@@ -6541,6 +7127,10 @@ async def archive_conversation(other_user: str, current_user: dict = Depends(ver
         },
         {"$push": {"archived_by": username}}
     )
+    await db.conversations.update_one(
+        {"id": conversation_id(username, other_user)},
+        {"$addToSet": {"archived_by": username}}
+    )
     
     return {
         "message": f"Conversation with {other_user} archived",
@@ -6562,6 +7152,10 @@ async def unarchive_conversation(other_user: str, current_user: dict = Depends(v
         },
         {"$pull": {"archived_by": username}}
     )
+    await db.conversations.update_one(
+        {"id": conversation_id(username, other_user)},
+        {"$pull": {"archived_by": username}}
+    )
     
     return {
         "message": f"Conversation with {other_user} unarchived",
@@ -6573,37 +7167,12 @@ async def get_archived_conversations(current_user: dict = Depends(verify_token))
     """Get list of archived conversations"""
     username = current_user['username']
     
-    # Get all messages where user is sender or recipient AND has archived the conversation
-    messages = await db.private_messages.find(
-        {
-            "$or": [
-                {"sender": username},
-                {"recipient": username}
-            ],
-            "archived_by": username
-        },
+    conversations = await db.conversations.find(
+        {"participants": username, "archived_by": username},
         {"_id": 0}
-    ).sort("timestamp", -1).to_list(None)
-    
-    # Group by conversation partner
-    conversations_dict = {}
-    for msg in messages:
-        other_user = msg['recipient'] if msg['sender'] == username else msg['sender']
-        
-        if other_user not in conversations_dict:
-            conversations_dict[other_user] = {
-                "username": other_user,
-                "lastMessage": msg,
-                "unreadCount": 0
-            }
-        
-        if msg['recipient'] == username and not msg['read']:
-            conversations_dict[other_user]['unreadCount'] += 1
-    
-    conversations = list(conversations_dict.values())
-    conversations.sort(key=lambda x: x['lastMessage']['timestamp'], reverse=True)
+    ).sort("last_timestamp", -1).to_list(None)
     
-    return conversations
+    return [conversation_view(c, username) for c in conversations]
 
 @api_router.delete("/messages/conversation/{other_user}")
 async def delete_conversation(other_user: str, current_user: dict = Depends(verify_token)):
@@ -6617,6 +7186,8 @@ async def delete_conversation(other_user: str, current_user: dict = Depends(veri
             {"sender": other_user, "recipient": username}
         ]
     })
+    await db.conversations.delete_one({"id": conversation_id(username, other_user)})
+    await push_unread_count(username, other_user)
     
     return {
         "message": f"Conversation with {other_user} deleted",
@@ -6624,7 +7195,13 @@ async def delete_conversation(other_user: str, current_user: dict = Depends(veri
     }
 
 @api_router.get("/messages/monitor/all")
-async def get_all_messages_for_monitoring(current_user: dict = Depends(verify_token)):
+async def get_all_messages_for_monitoring(
+    response: Response,
+    limit: int = 1000,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
     """Get all private messages for monitoring - Lonestar only"""
     username = current_user['username']
     
@@ -6632,11 +7209,9 @@ async def get_all_messages_for_monitoring(current_user: dict = Depends(verify_to
     if username.lower() != 'lonestar':
         raise HTTPException(status_code=403, detail="Access denied. This feature is restricted to Lonestar only.")
     
-    # Get all private messages, sorted by timestamp (newest first)
-    messages = await db.private_messages.find(
-        {},
-        {"_id": 0}
-    ).sort("timestamp", -1).limit(1000).to_list(1000)
+    # Private messages, newest first, keyset-paginated via before/after cursors
+    messages = await fetch_message_page({}, response, limit, before, after)
+    messages.reverse()
     
     return messages
 
@@ -6656,6 +7231,7 @@ async def create_support_message(support_msg: SupportMessageCreate):
     # Encrypt sensitive data
     doc = encrypt_support_message(doc)
     await db.support_messages.insert_one(doc)
+    await push_support_count()
     
     return {"message": "Support message submitted successfully", "id": message.id}
 
@@ -6698,6 +7274,7 @@ async def reply_to_support_message(message_id: str, reply: SupportReply, current
             }
         }
     )
+    await push_support_count()
     
     # Send email reply
     try:
@@ -6736,6 +7313,7 @@ async def delete_support_message(message_id: str, current_user: dict = Depends(v
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Support message not found")
+    await push_support_count()
     
     return {"message": "Support message deleted successfully"}
 
@@ -6747,7 +7325,7 @@ async def get_open_support_count(current_user: dict = Depends(verify_token)):
     if current_user['username'] != "Lonestar":
         raise HTTPException(status_code=403, detail="Access denied. This feature is only available to Lonestar.")
     
-    count = await db.support_messages.count_documents({"status": "open"})
+    count = await count_open_support_messages()
     
     return {"count": count}
 
@@ -10632,6 +11210,7 @@ async def update_permission(update: PermissionUpdate, current_user: dict = Depen
     )
     
     logger.info(f"Permission updated: {update.chapter}/{update.title}.{update.permission_key} = {update.value} by {current_user.get('username')}")
+    store_user_context_cache.clear()
     
     return {"success": True, "message": f"Updated {update.chapter}/{update.title}.{update.permission_key} to {update.value}"}
 
@@ -10671,6 +11250,7 @@ async def bulk_update_permissions(update: BulkPermissionUpdate, current_user: di
     )
     
     logger.info(f"Bulk permissions updated for {update.chapter}/{update.title} by {current_user.get('username')}")
+    store_user_context_cache.clear()
     
     return {"success": True, "message": f"Updated all permissions for {update.chapter}/{update.title}"}
 
@@ -11442,8 +12022,16 @@ async def bulk_dues_correction(
         "extension_revoked": extension_revoked,
         "discord_restored": discord_result.get("success") if discord_result else None
     }
+
+
+async def has_active_extension(member_id: str) -> bool:
     """Check if a member has an active dues extension"""
     extension = await db.dues_extensions.find_one({"member_id": member_id})
+    return is_extension_active(extension)
+
+
+def is_extension_active(extension: Optional[dict]) -> bool:
+    """Check whether a dues extension record is still in effect"""
     if not extension:
         return False
     
@@ -11454,8 +12042,15 @@ async def bulk_dues_correction(
         return False
 
 
+DUES_REMINDER_CONCURRENCY = 5  # Parallel email sends / Discord actions per reminder run
+
+
 async def check_and_send_dues_reminders():
-    """Check for unpaid dues and send appropriate reminder emails"""
+    """
+    Check for unpaid dues and send appropriate reminder emails.
+    Plans the run up front (two bulk lookups for extensions and already-sent
+    reminders), then delivers with bounded concurrency and writes the ledger once.
+    """
     from zoneinfo import ZoneInfo
     
     # Use Central Standard Time for date calculations
@@ -11505,15 +12100,15 @@ async def check_and_send_dues_reminders():
         {"_id": 0}
     ).to_list(1000)
     
-    emails_sent = 0
-    errors = []
+    year_str = str(year)
+    month_idx = month - 1
+    template_id = template_to_send.get("id")
+    day_trigger = template_to_send.get("day_trigger")
+    current_month = f"{month_names[month_idx]} {year}"
     
+    # ---- Planning: filter in memory, then prefetch extensions and sent records ----
+    candidates = []
     for member in members:
-        member_id = member.get("id")
-        dues = member.get("dues", {})
-        year_str = str(year)
-        month_idx = month - 1
-        
         # Skip non-dues paying members (honorary, exempt, etc.)
         if member.get("non_dues_paying", False):
             sys.stderr.write(f"⏭️ [DUES] Skipping {member.get('handle')} - non-dues paying member\n")
@@ -11526,51 +12121,59 @@ async def check_and_send_dues_reminders():
             sys.stderr.flush()
             continue
         
-        # Check if member has an active extension
-        if await has_active_extension(member_id):
-            sys.stderr.write(f"⏭️ [DUES] Skipping {member.get('handle')} - has active extension\n")
-            sys.stderr.flush()
-            continue
-        
         # Check if paid
-        is_paid = False
-        if year_str in dues:
-            year_dues = dues[year_str]
-            if isinstance(year_dues, list) and len(year_dues) > month_idx:
-                month_data = year_dues[month_idx]
-                if month_data is True or (isinstance(month_data, dict) and month_data.get("status") == "paid"):
-                    is_paid = True
+        year_dues = member.get("dues", {}).get(year_str)
+        if isinstance(year_dues, list) and len(year_dues) > month_idx:
+            month_data = year_dues[month_idx]
+            if month_data is True or (isinstance(month_data, dict) and month_data.get("status") == "paid"):
+                continue
         
-        if is_paid:
+        candidates.append(member)
+    
+    candidate_ids = [m.get("id") for m in candidates]
+    extensions = await db.dues_extensions.find(
+        {"member_id": {"$in": candidate_ids}},
+        {"_id": 0, "member_id": 1, "extension_until": 1}
+    ).to_list(None)
+    extended_ids = {e.get("member_id") for e in extensions if is_extension_active(e)}
+    
+    # Members we already sent this template to this month
+    sent_records = await db.dues_reminder_sent.find(
+        {"member_id": {"$in": candidate_ids}, "month": month, "year": year, "template_id": template_id},
+        {"_id": 0, "member_id": 1}
+    ).to_list(None)
+    already_sent_ids = {r.get("member_id") for r in sent_records}
+    
+    subject = template_to_send.get("subject", "")
+    targets = []
+    for member in candidates:
+        if member.get("id") in extended_ids:
+            sys.stderr.write(f"⏭️ [DUES] Skipping {member.get('handle')} - has active extension\n")
+            sys.stderr.flush()
             continue
-        
-        # Check if we already sent this template to this member this month
-        already_sent = await db.dues_reminder_sent.find_one({
-            "member_id": member_id,
-            "month": month,
-            "year": year,
-            "template_id": template_to_send.get("id")
-        })
-        
-        if already_sent:
+        if member.get("id") in already_sent_ids:
             continue
         
-        # Prepare email content
-        subject = template_to_send.get("subject", "")
-        body = template_to_send.get("body", "")
-        member_name = member.get("name") or member.get("handle", "Member")
-        body = body.replace("{{member_name}}", member_name)
-        body = body.replace("{{month}}", month_names[month - 1])
-        body = body.replace("{{year}}", str(year))
-        
         # Get decrypted email address
-        encrypted_email = member.get("email")
-        email_addr = decrypt_data(encrypted_email) if encrypted_email else None
-        
+        email_addr = decrypt_data(member.get("email"))
         if not email_addr:
             logger.warning(f"No email address for member {member.get('handle')}")
             continue
         
+        # Prepare email content
+        member_name = member.get("name") or member.get("handle", "Member")
+        body = template_to_send.get("body", "")
+        body = body.replace("{{member_name}}", member_name)
+        body = body.replace("{{month}}", month_names[month_idx])
+        body = body.replace("{{year}}", year_str)
+        targets.append((member, email_addr, body))
+    
+    errors = []
+    
+    # ---- Delivery: emails with bounded concurrency over the pooled mailer ----
+    semaphore = asyncio.Semaphore(DUES_REMINDER_CONCURRENCY)
+    
+    async def deliver(member, email_addr, body):
         # Convert plain text body to HTML (preserve line breaks)
         html_body = f"""
         <html>
@@ -11581,9 +12184,8 @@ async def check_and_send_dues_reminders():
         </body>
         </html>
         """
-        
-        # Send email via SendGrid
-        email_result = await send_email_smtp(email_addr, subject, html_body, body)
+        async with semaphore:
+            email_result = await send_email_smtp(email_addr, subject, html_body, body)
         
         if email_result.get("success"):
             logger.info(f"DUES REMINDER sent to {email_addr} ({member.get('handle')}): {subject}")
@@ -11591,66 +12193,76 @@ async def check_and_send_dues_reminders():
             logger.warning(f"DUES REMINDER failed for {email_addr}: {email_result.get('message')}")
         
         # Record that we sent this reminder (even if email failed, to avoid spam)
-        try:
-            await db.dues_reminder_sent.insert_one({
-                "member_id": member_id,
-                "member_handle": member.get("handle"),
-                "email": encrypted_email,  # Store encrypted
-                "month": month,
-                "year": year,
-                "template_id": template_to_send.get("id"),
-                "sent_at": now.isoformat(),
-                "subject": subject,
-                "email_sent": email_result.get("success", False)
-            })
-            emails_sent += 1
-            
-            day_trigger = template_to_send.get("day_trigger")
-            
-            # If day 10 notice, mark member as suspended and suspend Discord permissions (if enabled)
-            if day_trigger == 10 and suspension_enabled:
-                await db.members.update_one(
-                    {"id": member_id},
-                    {"$set": {"dues_suspended": True, "dues_suspended_at": now.isoformat()}}
-                )
-                
-                # Also suspend their Discord permissions
-                discord_result = await suspend_discord_member(
-                    member_handle=member.get("handle", "Unknown"),
-                    member_id=member_id,
-                    reason=f"Dues suspension - Day 10+ overdue for {current_month}"
-                )
-                if discord_result.get("success"):
-                    sys.stderr.write(f"🚫 [DUES] Discord suspended for {member.get('handle')}\n")
-                    sys.stderr.flush()
-                else:
-                    sys.stderr.write(f"⚠️ [DUES] Discord suspension failed for {member.get('handle')}: {discord_result.get('message')}\n")
-                    sys.stderr.flush()
-            elif day_trigger == 10 and not suspension_enabled:
-                sys.stderr.write(f"⏭️ [DUES] Suspension disabled - skipping suspension for {member.get('handle')}\n")
-                sys.stderr.flush()
-            
-            # If day 30 notice, kick member from Discord server (if enabled)
-            elif day_trigger == 30 and discord_kick_enabled:
-                # Kick from Discord
-                discord_result = await kick_discord_member(
+        return {
+            "member_id": member.get("id"),
+            "member_handle": member.get("handle"),
+            "email": member.get("email"),  # Store encrypted
+            "month": month,
+            "year": year,
+            "template_id": template_id,
+            "sent_at": now.isoformat(),
+            "subject": subject,
+            "email_sent": email_result.get("success", False)
+        }
+    
+    ledger = await asyncio.gather(*(deliver(*target) for target in targets))
+    
+    # One ledger write for the whole run; members whose rows failed get no Discord action
+    recorded_ids = {row["member_id"] for row in ledger}
+    try:
+        if ledger:
+            await db.dues_reminder_sent.insert_many(ledger, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            row = ledger[write_error["index"]]
+            recorded_ids.discard(row["member_id"])
+            errors.append(f"Failed for {row.get('member_handle')}: {write_error.get('errmsg')}")
+    emails_sent = len(recorded_ids)
+    recorded = [member for member, _, _ in targets if member.get("id") in recorded_ids]
+    
+    # ---- Discord actions with bounded concurrency ----
+    async def discord_action(action, member, reason, done_label, failed_label):
+        try:
+            async with semaphore:
+                discord_result = await action(
                     member_handle=member.get("handle", "Unknown"),
-                    member_id=member_id,
-                    reason=f"Dues removal - 30+ days overdue for {current_month}"
+                    member_id=member.get("id"),
+                    reason=reason
                 )
-                if discord_result.get("success"):
-                    sys.stderr.write(f"🚫 [DUES] Discord REMOVED for {member.get('handle')}\n")
-                    sys.stderr.flush()
-                else:
-                    sys.stderr.write(f"⚠️ [DUES] Discord removal failed for {member.get('handle')}: {discord_result.get('message')}\n")
-                    sys.stderr.flush()
-            elif day_trigger == 30 and not discord_kick_enabled:
-                sys.stderr.write(f"⏭️ [DUES] Discord kick disabled - skipping removal for {member.get('handle')}\n")
-                sys.stderr.flush()
-                    
+            if discord_result.get("success"):
+                sys.stderr.write(f"🚫 [DUES] Discord {done_label} for {member.get('handle')}\n")
+            else:
+                sys.stderr.write(f"⚠️ [DUES] Discord {failed_label} failed for {member.get('handle')}: {discord_result.get('message')}\n")
+            sys.stderr.flush()
         except Exception as e:
             errors.append(f"Failed for {member.get('handle')}: {str(e)}")
     
+    # If day 10 notice, mark members as suspended and suspend Discord permissions (if enabled)
+    if day_trigger == 10 and suspension_enabled and recorded:
+        await db.members.update_many(
+            {"id": {"$in": [m.get("id") for m in recorded]}},
+            {"$set": {"dues_suspended": True, "dues_suspended_at": now.isoformat()}}
+        )
+        await asyncio.gather(*(
+            discord_action(suspend_discord_member, member, f"Dues suspension - Day 10+ overdue for {current_month}", "suspended", "suspension")
+            for member in recorded
+        ))
+    elif day_trigger == 10 and not suspension_enabled:
+        for member in recorded:
+            sys.stderr.write(f"⏭️ [DUES] Suspension disabled - skipping suspension for {member.get('handle')}\n")
+        sys.stderr.flush()
+    
+    # If day 30 notice, kick members from Discord server (if enabled)
+    elif day_trigger == 30 and discord_kick_enabled and recorded:
+        await asyncio.gather(*(
+            discord_action(kick_discord_member, member, f"Dues removal - 30+ days overdue for {current_month}", "REMOVED", "removal")
+            for member in recorded
+        ))
+    elif day_trigger == 30 and not discord_kick_enabled:
+        for member in recorded:
+            sys.stderr.write(f"⏭️ [DUES] Discord kick disabled - skipping removal for {member.get('handle')}\n")
+        sys.stderr.flush()
+    
     return {
         "message": f"Dues reminder check complete for day {day}",
         "template_used": template_to_send.get("name"),
@@ -11674,6 +12286,7 @@ def run_dues_reminder_job():
             result = loop.run_until_complete(check_and_send_dues_reminders())
             print(f"✅ [SCHEDULER] Dues reminder check completed: {result}", file=sys.stderr, flush=True)
         finally:
+            loop.run_until_complete(smtp_mailer.close())
             loop.close()
             
     except Exception as e:
@@ -11703,8 +12316,11 @@ def run_square_sync_job():
         traceback.print_exc(file=sys.stderr)
 
 
-async def auto_sync_square_dues():
-    """Automated Square subscription sync - runs without user context"""
+async def auto_sync_square_dues(full_resync: bool = False):
+    """Automated Square subscription sync - runs without user context.
+    Only payments updated since the previous run are fetched; full_resync
+    re-scans the initial lookback window (e.g. after linking a member).
+    """
     import sys
     from motor.motor_asyncio import AsyncIOMotorClient
     
@@ -11723,31 +12339,65 @@ async def auto_sync_square_dues():
         sys.stderr.write("💳 [SQUARE SYNC] Starting auto-sync...\n")
         sys.stderr.flush()
         
-        # Get active subscriptions
-        subscriptions = []
-        cursor = None
+        # Pull only payments updated since the last run's watermark
+        sync_state = await get_square_sync_state(thread_db, "auto_sync")
+        if full_resync:
+            sync_state = {"id": "auto_sync"}
+        begin_time = square_sync_begin_time(sync_state)
+        watermark = sync_state.get("begin_time")
+        payments_by_customer = {}
+        seen_payment_ids = set()
+        
+        for page in iter_square_payment_pages(begin_time, location_id=SQUARE_LOCATION_ID):
+            for payment in page:
+                watermark = square_payment_watermark(payment) or watermark
+                if (getattr(payment, 'customer_id', None)
+                        and getattr(payment, 'status', None) == "COMPLETED"
+                        and getattr(payment, 'source_type', None) == "CARD"):
+                    payments_by_customer.setdefault(payment.customer_id, []).append(payment)
+                    seen_payment_ids.add(payment.id)
+        
+        sys.stderr.write(f"💳 [SQUARE SYNC] {sum(len(p) for p in payments_by_customer.values())} new card payments since {begin_time}\n")
+        sys.stderr.flush()
         
-        while True:
-            result = square_client.subscriptions.search(
-                cursor=cursor,
-                limit=100,
-                query={
-                    "filter": {
-                        "location_ids": [SQUARE_LOCATION_ID]
+        # Payments from earlier runs with no active subscription or member match yet
+        retried = 0
+        async for pending in thread_db.square_sync_pending.find({}, {"_id": 0}):
+            if pending["payment_id"] not in seen_payment_ids:
+                payments_by_customer.setdefault(pending["customer_id"], []).append(pending_square_payment(pending))
+                retried += 1
+        if retried:
+            sys.stderr.write(f"💳 [SQUARE SYNC] Retrying {retried} payments not matched on earlier runs\n")
+            sys.stderr.flush()
+        
+        # Get active subscriptions, but only for customers with new payments
+        subscriptions = []
+        customers_with_payments = list(payments_by_customer.keys())
+        
+        for i in range(0, len(customers_with_payments), 50):
+            cursor = None
+            while True:
+                result = square_client.subscriptions.search(
+                    cursor=cursor,
+                    limit=100,
+                    query={
+                        "filter": {
+                            "location_ids": [SQUARE_LOCATION_ID],
+                            "customer_ids": customers_with_payments[i:i+50]
+                        }
                     }
-                }
-            )
-            
-            subs = result.subscriptions or []
-            # Filter to ACTIVE subscriptions that are NOT scheduled for cancellation
-            active_subs = [s for s in subs if s.status == "ACTIVE" and not s.canceled_date]
-            subscriptions.extend(active_subs)
-            
-            cursor = result.cursor
-            if not cursor:
-                break
+                )
+                
+                subs = result.subscriptions or []
+                # Filter to ACTIVE subscriptions that are NOT scheduled for cancellation
+                active_subs = [s for s in subs if s.status == "ACTIVE" and not s.canceled_date]
+                subscriptions.extend(active_subs)
+                
+                cursor = result.cursor
+                if not cursor:
+                    break
         
-        sys.stderr.write(f"💳 [SQUARE SYNC] Found {len(subscriptions)} active subscriptions\n")
+        sys.stderr.write(f"💳 [SQUARE SYNC] Found {len(subscriptions)} active subscriptions with new payments\n")
         sys.stderr.flush()
         
         # Batch retrieve customers for subscriptions
@@ -11775,67 +12425,36 @@ async def auto_sync_square_dues():
         manual_links = await thread_db.member_subscriptions.find({}, {"_id": 0}).to_list(1000)
         manual_link_map = {link.get("square_customer_id"): link.get("member_id") for link in manual_links if link.get("square_customer_id")}
         
-        # Create name-to-member map for fuzzy matching
-        name_to_member = {}
-        for member in members:
-            name = member.get("name", "").lower().strip()
-            if name:
-                name_to_member[name] = member
-            handle = member.get("handle", "").lower().strip()
-            if handle:
-                name_to_member[handle] = member
+        # Score every customer name against every member in one vectorized pass
+        matcher = MemberMatcher(members)
+        fuzzy_matches = dict(zip(customer_map.keys(), matcher.match_many(list(customer_map.values()))))
         
         synced_count = 0
         payment_months_updated = 0
+        synced_customers = set()
         
         for sub in subscriptions:
             customer_id = sub.customer_id
-            customer_name = customer_map.get(customer_id, "Unknown")
             
             # Try to find matching member
             member = None
             
             # Check manual link first
             if customer_id in manual_link_map:
-                member_id = manual_link_map[customer_id]
-                member = next((m for m in members if m.get("id") == member_id), None)
+                member = matcher.get_by_id(manual_link_map[customer_id])
             
             # Try fuzzy match by name
             if not member:
-                customer_name_lower = customer_name.lower().strip()
-                if customer_name_lower in name_to_member:
-                    member = name_to_member[customer_name_lower]
-                else:
-                    for name_key, m in name_to_member.items():
-                        if customer_name_lower in name_key or name_key in customer_name_lower:
-                            member = m
-                            break
+                member = fuzzy_matches.get(customer_id, (None, 0, None))[0]
             
             if not member:
                 continue
             
             member_id = member.get("id")
             
-            # Get payments for this subscription
+            # New payments for this subscription's customer (fetched once above)
+            customer_payments = payments_by_customer.get(customer_id, [])
             try:
-                payments_result = square_client.payments.list(
-                    location_id=SQUARE_LOCATION_ID,
-                    limit=100
-                )
-                
-                # Handle both pager and direct response
-                all_payments = []
-                if hasattr(payments_result, 'payments') and payments_result.payments:
-                    all_payments = payments_result.payments
-                elif hasattr(payments_result, '__iter__'):
-                    all_payments = list(payments_result)
-                
-                # Filter payments for this customer
-                customer_payments = [p for p in all_payments 
-                                   if hasattr(p, 'customer_id') and p.customer_id == customer_id 
-                                   and hasattr(p, 'status') and p.status == "COMPLETED"
-                                   and hasattr(p, 'source_type') and p.source_type == "CARD"]
-                
                 for payment in customer_payments:
                     amount_cents = payment.amount_money.amount if payment.amount_money else 0
                     amount_dollars = amount_cents / 100
@@ -11953,21 +12572,39 @@ async def auto_sync_square_dues():
                                 sys.stderr.flush()
                 
                 synced_count += 1
+                synced_customers.add(customer_id)
                 
             except Exception as e:
                 logger.warning(f"Failed to get payments for subscription {sub.id}: {e}")
+                # Hold the watermark back so this customer's payments are retried
+                failed_marks = [square_payment_watermark(p) for p in customer_payments if square_payment_watermark(p)]
+                if failed_marks:
+                    retry_from = min(failed_marks)
+                    watermark = min(watermark, retry_from) if watermark else retry_from
                 continue
         
+        # The watermark moves past every payment read; ones not synced yet wait in
+        # square_sync_pending until their member is linked or their subscription shows up
+        pending_count = await save_pending_square_payments(thread_db, payments_by_customer, synced_customers)
+        
+        await save_square_sync_state(
+            thread_db, "auto_sync",
+            begin_time=watermark,
+            last_run_at=datetime.now(timezone.utc).isoformat(),
+            last_window_start=begin_time
+        )
+        
         # Close the thread-local connection
         client.close()
         
-        sys.stderr.write(f"💳 [SQUARE SYNC] Synced {synced_count} subscriptions, updated {payment_months_updated} month records\n")
+        sys.stderr.write(f"💳 [SQUARE SYNC] Synced {synced_count} subscriptions, updated {payment_months_updated} month records, {pending_count} payments pending a match\n")
         sys.stderr.flush()
         
         return {
             "success": True,
             "subscriptions_synced": synced_count,
-            "payment_months_updated": payment_months_updated
+            "payment_months_updated": payment_months_updated,
+            "payments_pending_match": pending_count
         }
         
     except Exception as e:
@@ -11976,12 +12613,12 @@ async def auto_sync_square_dues():
 
 
 @api_router.post("/dues/trigger-auto-sync")
-async def trigger_auto_sync(current_user: dict = Depends(verify_token)):
+async def trigger_auto_sync(full_resync: bool = False, current_user: dict = Depends(verify_token)):
     """Manually trigger the automatic Square dues sync (admin/secretary only)"""
     if not is_secretary(current_user) and current_user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Only Secretaries can trigger sync")
     
-    result = await auto_sync_square_dues()
+    result = await auto_sync_square_dues(full_resync=full_resync)
     return result
 
 
@@ -12026,31 +12663,75 @@ def can_manage_suggestions(user: dict) -> bool:
     user_title = user.get('title', '')
     return user_chapter == "National" and user_title in NATIONAL_OFFICER_TITLES
 
+# Voter arrays stay in the document for per-user lookups but never leave the database;
+# listings read the maintained upvote_count / downvote_count fields instead
+SUGGESTION_LIST_PROJECTION = {"_id": 0, "upvotes": 0, "downvotes": 0}
+SUGGESTION_COUNTS_PROJECTION = {"_id": 0, "upvote_count": 1, "downvote_count": 1}
+
+# (current vote, requested vote) -> (filter on the voter arrays, update, resulting vote)
+def suggestion_vote_transitions(user_id, vote_type: str) -> list:
+    """Candidate atomic updates for a toggle vote; exactly one filter matches a given document"""
+    other = "downvote" if vote_type == "upvote" else "upvote"
+    mine, theirs = f"{vote_type}s", f"{other}s"
+    return [
+        # Same vote again: withdraw it
+        ({mine: user_id},
+         {"$pull": {mine: user_id}, "$inc": {f"{vote_type}_count": -1}},
+         None),
+        # Opposite vote: switch sides
+        ({theirs: user_id},
+         {"$pull": {theirs: user_id}, "$addToSet": {mine: user_id},
+          "$inc": {f"{other}_count": -1, f"{vote_type}_count": 1}},
+         vote_type),
+        # No vote yet
+        ({mine: {"$ne": user_id}, theirs: {"$ne": user_id}},
+         {"$addToSet": {mine: user_id}, "$inc": {f"{vote_type}_count": 1}},
+         vote_type),
+    ]
+
+
+async def backfill_suggestion_vote_counts():
+    """Populate upvote_count / downvote_count on suggestions written before they existed"""
+    updated = 0
+    cursor = db.suggestions.find(
+        {"$or": [{"upvote_count": {"$exists": False}}, {"downvote_count": {"$exists": False}}]},
+        {"_id": 0, "id": 1, "upvotes": 1, "downvotes": 1}
+    )
+    async for suggestion in cursor:
+        await db.suggestions.update_one(
+            {"id": suggestion.get("id")},
+            {"$set": {
+                "upvotes": suggestion.get("upvotes") or [],
+                "downvotes": suggestion.get("downvotes") or [],
+                "upvote_count": len(suggestion.get("upvotes") or []),
+                "downvote_count": len(suggestion.get("downvotes") or [])
+            }}
+        )
+        updated += 1
+    return updated
+
 @api_router.get("/suggestions")
 async def get_suggestions(current_user: dict = Depends(verify_token)):
     """Get all suggestions - all logged-in members can view"""
-    suggestions = await db.suggestions.find({}, {"_id": 0}).to_list(1000)
+    # Newest first
+    suggestions = await db.suggestions.find({}, SUGGESTION_LIST_PROJECTION).sort("created_at", -1).to_list(1000)
     
-    # Sort by created_at descending (newest first)
-    suggestions.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+    # The current user's votes, via the multikey indexes on the voter arrays
+    user_id = current_user.get("member_id") or current_user.get("id")
+    upvoted = {s["id"] async for s in db.suggestions.find({"upvotes": user_id}, {"_id": 0, "id": 1})}
+    downvoted = {s["id"] async for s in db.suggestions.find({"downvotes": user_id}, {"_id": 0, "id": 1})}
     
-    # Calculate net votes for each suggestion
     for s in suggestions:
-        upvotes = len(s.get("upvotes", []))
-        downvotes = len(s.get("downvotes", []))
+        upvotes = s.get("upvote_count", 0)
+        downvotes = s.get("downvote_count", 0)
         s["vote_count"] = upvotes - downvotes
         s["upvote_count"] = upvotes
         s["downvote_count"] = downvotes
-        # Check if current user has voted
-        user_id = current_user.get("member_id") or current_user.get("id")
         s["user_vote"] = None
-        if user_id in s.get("upvotes", []):
+        if s.get("id") in upvoted:
             s["user_vote"] = "upvote"
-        elif user_id in s.get("downvotes", []):
+        elif s.get("id") in downvoted:
             s["user_vote"] = "downvote"
-        # Remove vote arrays from response (privacy)
-        s.pop("upvotes", None)
-        s.pop("downvotes", None)
     
     return suggestions
 
@@ -12073,6 +12754,8 @@ async def create_suggestion(
         "status": "new",
         "upvotes": [],
         "downvotes": [],
+        "upvote_count": 0,
+        "downvote_count": 0,
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
@@ -12082,8 +12765,6 @@ async def create_suggestion(
     # Return without internal fields
     response = {k: v for k, v in new_suggestion.items() if k not in ["_id", "upvotes", "downvotes", "submitter_id"]}
     response["vote_count"] = 0
-    response["upvote_count"] = 0
-    response["downvote_count"] = 0
     response["user_vote"] = None
     
     return response
@@ -12097,53 +12778,35 @@ async def vote_suggestion(
     """Vote on a suggestion - upvote or downvote"""
     user_id = current_user.get("member_id") or current_user.get("id")
     
-    suggestion = await db.suggestions.find_one({"id": suggestion_id})
-    if not suggestion:
-        raise HTTPException(status_code=404, detail="Suggestion not found")
-    
-    upvotes = suggestion.get("upvotes", [])
-    downvotes = suggestion.get("downvotes", [])
-    
-    if vote.vote_type == "upvote":
-        # Remove from downvotes if present
-        if user_id in downvotes:
-            downvotes.remove(user_id)
-        # Toggle upvote
-        if user_id in upvotes:
-            upvotes.remove(user_id)
-            new_vote = None
-        else:
-            upvotes.append(user_id)
-            new_vote = "upvote"
-    elif vote.vote_type == "downvote":
-        # Remove from upvotes if present
-        if user_id in upvotes:
-            upvotes.remove(user_id)
-        # Toggle downvote
-        if user_id in downvotes:
-            downvotes.remove(user_id)
-            new_vote = None
-        else:
-            downvotes.append(user_id)
-            new_vote = "downvote"
-    else:
+    if vote.vote_type not in ("upvote", "downvote"):
         raise HTTPException(status_code=400, detail="Invalid vote type")
     
-    await db.suggestions.update_one(
-        {"id": suggestion_id},
-        {"$set": {
-            "upvotes": upvotes,
-            "downvotes": downvotes,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    # Each transition is a single conditional update, so concurrent votes can't
+    # overwrite each other. If another request changes this user's vote between
+    # attempts, none match and we simply try again against the new state.
+    for _ in range(3):
+        for vote_filter, update, new_vote in suggestion_vote_transitions(user_id, vote.vote_type):
+            update["$set"] = {"updated_at": datetime.now(timezone.utc).isoformat()}
+            counts = await db.suggestions.find_one_and_update(
+                {"id": suggestion_id, **vote_filter},
+                update,
+                projection=SUGGESTION_COUNTS_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+            if counts:
+                upvotes = counts.get("upvote_count", 0)
+                downvotes = counts.get("downvote_count", 0)
+                return {
+                    "vote_count": upvotes - downvotes,
+                    "upvote_count": upvotes,
+                    "downvote_count": downvotes,
+                    "user_vote": new_vote
+                }
+        
+        if not await db.suggestions.find_one({"id": suggestion_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Suggestion not found")
     
-    return {
-        "vote_count": len(upvotes) - len(downvotes),
-        "upvote_count": len(upvotes),
-        "downvote_count": len(downvotes),
-        "user_vote": new_vote
-    }
+    raise HTTPException(status_code=409, detail="Vote changed concurrently, please try again")
 
 @api_router.patch("/suggestions/{suggestion_id}/status")
 async def update_suggestion_status(
@@ -12159,7 +12822,7 @@ async def update_suggestion_status(
     if status_update.status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
     
-    suggestion = await db.suggestions.find_one({"id": suggestion_id})
+    suggestion = await db.suggestions.find_one({"id": suggestion_id}, {"_id": 1})
     if not suggestion:
         raise HTTPException(status_code=404, detail="Suggestion not found")
     
@@ -12183,7 +12846,7 @@ async def delete_suggestion(
     current_user: dict = Depends(verify_token)
 ):
     """Delete a suggestion - National Officers or the original submitter can delete"""
-    suggestion = await db.suggestions.find_one({"id": suggestion_id})
+    suggestion = await db.suggestions.find_one({"id": suggestion_id}, {"_id": 0, "submitter_id": 1})
     if not suggestion:
         raise HTTPException(status_code=404, detail="Suggestion not found")
     
@@ -12236,18 +12899,7 @@ async def get_events(
 @api_router.get("/events/upcoming-count")
 async def get_upcoming_events_count(current_user: dict = Depends(verify_token)):
     """Get count of upcoming events for badge"""
-    from datetime import date
-    today = date.today().isoformat()
-    
-    # Build query based on user's chapter and title
-    query = {"date": {"$gte": today}}
-    
-    # If user has a chapter, show events for their chapter or all chapters
-    user_chapter = current_user.get("chapter")
-    if user_chapter:
-        query["$or"] = [{"chapter": user_chapter}, {"chapter": None}]
-    
-    count = await db.events.count_documents(query)
+    count = await count_upcoming_events(current_user.get("chapter"))
     return {"count": count}
 
 @api_router.post("/events")
@@ -12295,6 +12947,7 @@ async def create_event(event_data: EventCreate, current_user: dict = Depends(ver
         )
         doc = event.model_dump()
         doc['created_at'] = doc['created_at'].isoformat()
+        doc.update(compute_event_notification_state(doc))
         return doc
     
     created_events = []
@@ -12367,6 +13020,7 @@ async def create_event(event_data: EventCreate, current_user: dict = Depends(ver
             action="event_create",
             details=f"Created recurring event: {event_data.title} ({event_data.repeat_type}) - {len(created_events)} occurrences"
         )
+        await push_upcoming_events_count()
         
         return {
             "message": f"Recurring event created successfully ({len(created_events)} occurrences)",
@@ -12384,6 +13038,7 @@ async def create_event(event_data: EventCreate, current_user: dict = Depends(ver
             action="event_create",
             details=f"Created event: {event_data.title} on {event_data.date}"
         )
+        await push_upcoming_events_count()
         
         return {"message": "Event created successfully", "id": doc['id']}
 
@@ -12423,6 +13078,8 @@ async def update_event(
         update_data['discord_channel'] = event_data.discord_channel
     
     if update_data:
+        # Reschedule reminders against the updated date/time/notification settings
+        update_data.update(compute_event_notification_state({**event, **update_data}))
         await db.events.update_one({"id": event_id}, {"$set": update_data})
     
     # Log activity
@@ -12431,6 +13088,8 @@ async def update_event(
         action="event_update",
         details=f"Updated event: {event.get('title', event_id)}"
     )
+    if update_data:
+        await push_upcoming_events_count()
     
     return {"message": "Event updated successfully"}
 
@@ -12508,6 +13167,7 @@ async def delete_event(event_id: str, current_user: dict = Depends(verify_token)
         action="event_delete",
         details=f"Deleted event: {event.get('title', event_id)}"
     )
+    await push_upcoming_events_count()
     
     return {"message": "Event deleted successfully"}
 
@@ -12557,9 +13217,9 @@ async def get_anniversaries_this_month(current_user: dict = Depends(verify_token
     current_month = today.strftime("%m")
     current_year = today.year
     
-    # Fetch all members with join_date
+    # Members whose join month is this month (indexed join_month)
     members = await db.members.find(
-        {"join_date": {"$exists": True, "$ne": None, "$ne": ""}},
+        {"join_month": today.month},
         {"_id": 0}
     ).to_list(1000)
     
@@ -12614,9 +13274,10 @@ async def get_upcoming_anniversaries(months: int = 3, current_user: dict = Depen
     current_month = today.month
     current_year = today.year
     
-    # Fetch all members with join_date
+    # Members whose join month falls in the window, wrapping past December (indexed join_month)
+    window_months = [((current_month - 1 + offset) % 12) + 1 for offset in range(min(max(months, 0), 11) + 1)]
     members = await db.members.find(
-        {"join_date": {"$exists": True, "$ne": None, "$ne": ""}},
+        {"join_month": {"$in": window_months}},
         {"_id": 0}
     ).to_list(1000)
     
@@ -12678,9 +13339,9 @@ async def get_todays_birthdays(current_user: dict = Depends(verify_token)):
     today = datetime.now()
     today_mm_dd = today.strftime("%m-%d")
     
-    # Fetch all members with DOB set
+    # Members born on this month/day (indexed dob_md)
     members = await db.members.find(
-        {"dob": {"$exists": True, "$ne": None, "$ne": ""}},
+        {"dob_md": today_mm_dd},
         {"_id": 0}
     ).to_list(1000)
     
@@ -12717,11 +13378,17 @@ async def get_upcoming_birthdays(days: int = 30, current_user: dict = Depends(ve
     
     today = datetime.now()
     
-    # Fetch all members with DOB set
-    members = await db.members.find(
-        {"dob": {"$exists": True, "$ne": None, "$ne": ""}},
-        {"_id": 0}
-    ).to_list(1000)
+    # Day-of-year range on the indexed dob_doy, split in two when it wraps past December
+    if days >= 365:
+        doy_query = {"dob_doy": {"$ne": None}}
+    else:
+        start_doy = leap_day_of_year(today)
+        end_doy = leap_day_of_year(today + timedelta(days=max(days, 0)))
+        if start_doy <= end_doy:
+            doy_query = {"dob_doy": {"$gte": start_doy, "$lte": end_doy}}
+        else:
+            doy_query = {"$or": [{"dob_doy": {"$gte": start_doy}}, {"dob_doy": {"$lte": end_doy}}]}
+    members = await db.members.find(doy_query, {"_id": 0}).to_list(1000)
     
     upcoming_birthdays = []
     for member in members:
@@ -12773,15 +13440,14 @@ async def get_monthly_birthdays(month: int, year: int, current_user: dict = Depe
     user_chapter = current_user.get('chapter')
     is_national_member = user_chapter == 'National'
     
-    # Fetch all members with DOB set
-    members = await db.members.find(
-        {"dob": {"$exists": True, "$ne": None, "$ne": ""}},
-        {"_id": 0}
-    ).to_list(1000)
+    # Members born in the requested month (indexed dob_md range)
+    query = {"dob_md": {"$gte": f"{month:02d}-01", "$lte": f"{month:02d}-31"}}
     
     # Filter out National members for non-National users
     if not is_national_member:
-        members = [m for m in members if m.get('chapter') != 'National']
+        query["chapter"] = {"$ne": "National"}
+    
+    members = await db.members.find(query, {"_id": 0}).to_list(1000)
     
     monthly_birthdays = []
     for member in members:
@@ -12825,15 +13491,14 @@ async def get_monthly_anniversaries(month: int, year: int, current_user: dict =
     user_chapter = current_user.get('chapter')
     is_national_member = user_chapter == 'National'
     
-    # Fetch all members with join_date set
-    members = await db.members.find(
-        {"join_date": {"$exists": True, "$ne": None, "$ne": "", "$ne": "None"}},
-        {"_id": 0}
-    ).to_list(1000)
+    # Members who joined in the requested month (indexed join_month)
+    query = {"join_month": month}
     
     # Filter out National members for non-National users
     if not is_national_member:
-        members = [m for m in members if m.get('chapter') != 'National']
+        query["chapter"] = {"$ne": "National"}
+    
+    members = await db.members.find(query, {"_id": 0}).to_list(1000)
     
     monthly_anniversaries = []
     for member in members:
@@ -12883,13 +13548,15 @@ async def get_monthly_anniversaries(month: int, year: int, current_user: dict =
 
 # ==================== DISCORD NOTIFICATION SYSTEM ====================
 
-import requests
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import timedelta
 
 # Discord channel webhook configuration
 DISCORD_WEBHOOK_URL = os.environ.get('DISCORD_WEBHOOK_URL')
 
+# Shared keep-alive webhook client with per-webhook rate-limit buckets
+discord_webhooks = DiscordWebhookClient()
+
 # Discord channel webhooks mapping
 DISCORD_CHANNEL_WEBHOOKS = {
     "member-chat": os.environ.get('DISCORD_WEBHOOK_MEMBER_CHAT'),
@@ -13027,7 +13694,7 @@ async def send_discord_notification(event: dict, hours_before: int, channel: str
             "embeds": [embed]
         }
         
-        response = requests.post(webhook_url, json=payload)
+        response = await discord_webhooks.post(webhook_url, payload)
         
         if response.status_code == 204:
             hours_text = "now" if hours_before == 0 else f"{hours_before}h before"
@@ -13041,8 +13708,67 @@ async def send_discord_notification(event: dict, hours_before: int, channel: str
         print(f"❌ Error sending Discord notification: {str(e)}")
         return False
 
+# Scheduled reminders: (hours before start, flag recording that it was sent).
+# A reminder is due inside a one-hour window centred on its offset.
+EVENT_REMINDERS = [(24, 'notification_24h_sent'), (3, 'notification_3h_sent')]
+EVENT_REMINDER_WINDOW = timedelta(minutes=30)
+
+
+def parse_event_start(event: dict) -> Optional[datetime]:
+    """Event start as an aware UTC datetime (dates/times are Central Time, noon if no time)"""
+    from zoneinfo import ZoneInfo
+    try:
+        start = datetime.strptime(event['date'], '%Y-%m-%d')
+        if event.get('time'):
+            time_parts = event['time'].split(':')
+            start = start.replace(hour=int(time_parts[0]), minute=int(time_parts[1]))
+        else:
+            start = start.replace(hour=12, minute=0)
+    except (KeyError, ValueError, IndexError, TypeError):
+        return None
+    return start.replace(tzinfo=ZoneInfo("America/Chicago")).astimezone(timezone.utc)
+
+
+def compute_event_notification_state(event: dict, now: Optional[datetime] = None) -> dict:
+    """
+    Derived scheduling fields for an event:
+    - starts_at: normalized UTC start
+    - next_notification: hours_before of the next unsent reminder whose window hasn't passed
+    - next_notify_at: when that reminder's window opens (None when nothing is left to send)
+    """
+    now = now or datetime.now(timezone.utc)
+    starts_at = parse_event_start(event)
+    state = {"starts_at": starts_at, "next_notify_at": None, "next_notification": None}
+    if not starts_at or not event.get('discord_notifications_enabled', True):
+        return state
+    
+    for hours_before, sent_flag in EVENT_REMINDERS:
+        if event.get(sent_flag):
+            continue
+        offset = timedelta(hours=hours_before)
+        if starts_at - offset + EVENT_REMINDER_WINDOW < now:
+            continue  # Window already closed
+        state["next_notify_at"] = starts_at - offset - EVENT_REMINDER_WINDOW
+        state["next_notification"] = hours_before
+        break
+    return state
+
+
+async def backfill_event_notification_state(target_db=None):
+    """Populate starts_at/next_notify_at on events created before they were tracked"""
+    target_db = target_db if target_db is not None else db
+    updated = 0
+    async for event in target_db.events.find({"starts_at": {"$exists": False}}, {"_id": 0}):
+        await target_db.events.update_one(
+            {"id": event.get("id")},
+            {"$set": compute_event_notification_state(event)}
+        )
+        updated += 1
+    return updated
+
+
 async def check_and_send_event_notifications():
-    """Check for upcoming events and send notifications"""
+    """Send event reminders whose notify_at has come due (indexed on next_notify_at)"""
     import sys
     from motor.motor_asyncio import AsyncIOMotorClient
     
@@ -13051,77 +13777,36 @@ async def check_and_send_event_notifications():
         scheduler_client = AsyncIOMotorClient(mongo_url)
         scheduler_db = scheduler_client[os.environ['DB_NAME']]
         
-        # Use Central Time for all event calculations
-        import pytz
-        central = pytz.timezone('America/Chicago')
-        now = datetime.now(central)
-        
+        now = datetime.now(timezone.utc)
         print(f"🔍 [SCHEDULER] Running notification check at {now.strftime('%Y-%m-%d %H:%M:%S %Z')}", file=sys.stderr, flush=True)
         
-        # Get all events
-        events = await scheduler_db.events.find({}, {"_id": 0}).to_list(length=None)
-        print(f"📋 [SCHEDULER] Found {len(events)} total events", file=sys.stderr, flush=True)
+        # Only reminders that are due - cost follows due notifications, not event history
+        events = await scheduler_db.events.find(
+            {"next_notify_at": {"$lte": now}},
+            {"_id": 0}
+        ).sort("next_notify_at", 1).to_list(length=None)
+        print(f"📋 [SCHEDULER] Found {len(events)} event(s) with due reminders", file=sys.stderr, flush=True)
         
         for event in events:
             try:
-                # Parse event date and time in Central Time
-                event_date = datetime.strptime(event['date'], '%Y-%m-%d')
-                
-                # If time is specified, add it
-                if event.get('time'):
-                    time_parts = event['time'].split(':')
-                    event_date = event_date.replace(
-                        hour=int(time_parts[0]),
-                        minute=int(time_parts[1])
-                    )
-                else:
-                    # Default to noon if no time specified
-                    event_date = event_date.replace(hour=12, minute=0)
-                
-                # Make timezone aware as Central Time
-                event_date = central.localize(event_date)
+                state = compute_event_notification_state(event, now)
+                hours_before = state["next_notification"]
                 
-                # Calculate time until event
-                time_until_event = event_date - now
-                hours_until_event = time_until_event.total_seconds() / 3600
-                
-                print(f"  📅 Event '{event.get('title')}': {hours_until_event:.2f}h away (Discord enabled: {event.get('discord_notifications_enabled', True)})", file=sys.stderr, flush=True)
-                
-                # Skip if Discord notifications are disabled for this event
-                if not event.get('discord_notifications_enabled', True):
-                    print(f"  ⏭️  Skipping - Discord notifications disabled", file=sys.stderr, flush=True)
-                    continue
-                
-                # Skip past events
-                if hours_until_event < 0:
-                    print(f"  ⏭️  Skipping - Event is in the past", file=sys.stderr, flush=True)
-                    continue
-                
-                # Check for 24-hour notification (between 23.5 and 24.5 hours)
-                if 23.5 <= hours_until_event <= 24.5 and not event.get('notification_24h_sent'):
-                    print(f"📢 [SCHEDULER] Sending 24h notification for: {event['title']}", file=sys.stderr, flush=True)
-                    success = await send_discord_notification(event, 24)
+                if hours_before and state["next_notify_at"] <= now:
+                    print(f"📢 [SCHEDULER] Sending {hours_before}h notification for: {event['title']}", file=sys.stderr, flush=True)
+                    success = await send_discord_notification(event, hours_before)
                     if success:
-                        await scheduler_db.events.update_one(
-                            {"id": event['id']},
-                            {"$set": {"notification_24h_sent": True}}
-                        )
-                        print(f"✅ [SCHEDULER] 24h notification sent successfully", file=sys.stderr, flush=True)
+                        sent_flag = dict(EVENT_REMINDERS)[hours_before]
+                        event[sent_flag] = True
+                        state = {sent_flag: True, **compute_event_notification_state(event, now)}
+                        print(f"✅ [SCHEDULER] {hours_before}h notification sent successfully", file=sys.stderr, flush=True)
                     else:
-                        print(f"❌ [SCHEDULER] 24h notification failed", file=sys.stderr, flush=True)
+                        # Leave the state as is so the next run retries within the window
+                        print(f"❌ [SCHEDULER] {hours_before}h notification failed", file=sys.stderr, flush=True)
+                        continue
                 
-                # Check for 3-hour notification (between 2.5 and 3.5 hours)
-                elif 2.5 <= hours_until_event <= 3.5 and not event.get('notification_3h_sent'):
-                    print(f"📢 [SCHEDULER] Sending 3h notification for: {event['title']}", file=sys.stderr, flush=True)
-                    success = await send_discord_notification(event, 3)
-                    if success:
-                        await scheduler_db.events.update_one(
-                            {"id": event['id']},
-                            {"$set": {"notification_3h_sent": True}}
-                        )
-                        print(f"✅ [SCHEDULER] 3h notification sent successfully", file=sys.stderr, flush=True)
-                    else:
-                        print(f"❌ [SCHEDULER] 3h notification failed", file=sys.stderr, flush=True)
+                # Advance the state machine (also skips reminders whose window was missed)
+                await scheduler_db.events.update_one({"id": event['id']}, {"$set": state})
                         
             except Exception as e:
                 print(f"❌ [SCHEDULER] Error processing event {event.get('id')}: {str(e)}", file=sys.stderr, flush=True)
@@ -13158,6 +13843,7 @@ def run_notification_check():
             loop.run_until_complete(check_and_send_event_notifications())
             print(f"✅ [SCHEDULER] Notification check job completed", file=sys.stderr, flush=True)
         finally:
+            loop.run_until_complete(discord_webhooks.close())
             loop.close()
             
     except Exception as e:
@@ -13168,80 +13854,105 @@ def run_notification_check():
 
 # ==================== BIRTHDAY NOTIFICATIONS ====================
 
-async def send_birthday_notification(member: dict):
-    """Send Discord notification for a member's birthday to member-chat channel"""
+def format_discord_name_list(names: list) -> str:
+    """Bold, comma-joined names for a Discord message: **A**, **B** and **C**"""
+    bolded = [f"**{name}**" for name in names]
+    if len(bolded) <= 1:
+        return "".join(bolded)
+    return ", ".join(bolded[:-1]) + " and " + bolded[-1]
+
+
+def build_birthday_embed(member: dict) -> dict:
+    """Birthday embed for one member"""
+    member_name = member.get('name', member.get('handle', 'Brother'))
+    member_handle = member.get('handle', '')
+    member_chapter = member.get('chapter', '')
+    member_title = member.get('title', '')
+    
+    # Create a festive birthday embed
+    embed = {
+        "title": "🎂 Happy Birthday! 🎉",
+        "description": f"Today we celebrate **{member_name}**!\n\nWishing you a fantastic birthday filled with joy and many great drives ahead! 🚛",
+        "color": 0xFFD700,  # Gold color for birthday
+        "fields": [],
+        "footer": {
+            "text": "Brothers of the Highway | Birthday Wishes"
+        }
+    }
+    
+    # Add member info
+    if member_handle:
+        embed["fields"].append({
+            "name": "🏷️ Handle",
+            "value": member_handle,
+            "inline": True
+        })
+    
+    if member_chapter:
+        embed["fields"].append({
+            "name": "🏴 Chapter",
+            "value": member_chapter,
+            "inline": True
+        })
+    
+    if member_title:
+        embed["fields"].append({
+            "name": "👤 Title",
+            "value": member_title,
+            "inline": True
+        })
+    
+    # Add call to action
+    embed["fields"].append({
+        "name": "🎊 Join the Celebration!",
+        "value": "All Brothers are invited to wish them a Happy Birthday!",
+        "inline": False
+    })
+    return embed
+
+
+async def send_birthday_notifications(members: list) -> list:
+    """
+    Send one member-chat post (one embed per member) for everyone with a birthday today.
+    Returns one success flag per member; large batches span several messages that
+    succeed or fail independently.
+    """
     # Always use member-chat webhook for birthday notifications
     webhook_url = get_discord_webhook_url("member-chat")
     if not webhook_url:
         print("⚠️  Discord webhook URL not configured for member-chat channel (birthday notification)")
-        return False
+        return [False] * len(members)
+    if not members:
+        return []
     
     try:
-        # Get member details
-        member_name = member.get('name', member.get('handle', 'Brother'))
-        member_handle = member.get('handle', '')
-        member_chapter = member.get('chapter', '')
-        member_title = member.get('title', '')
-        
-        # Create a festive birthday embed
-        embed = {
-            "title": "🎂 Happy Birthday! 🎉",
-            "description": f"Today we celebrate **{member_name}**!\n\nWishing you a fantastic birthday filled with joy and many great drives ahead! 🚛",
-            "color": 0xFFD700,  # Gold color for birthday
-            "fields": [],
-            "footer": {
-                "text": "Brothers of the Highway | Birthday Wishes"
-            }
-        }
-        
-        # Add member info
-        if member_handle:
-            embed["fields"].append({
-                "name": "🏷️ Handle",
-                "value": member_handle,
-                "inline": True
-            })
-        
-        if member_chapter:
-            embed["fields"].append({
-                "name": "🏴 Chapter",
-                "value": member_chapter,
-                "inline": True
-            })
+        names = [m.get('name', m.get('handle', 'Brother')) for m in members]
+        content = f"@everyone **🎂 Birthday Alert!** 🎂\n\nLet's all wish {format_discord_name_list(names)} a very Happy Birthday! 🎉"
         
-        if member_title:
-            embed["fields"].append({
-                "name": "👤 Title",
-                "value": member_title,
-                "inline": True
-            })
-        
-        # Add call to action
-        embed["fields"].append({
-            "name": "🎊 Join the Celebration!",
-            "value": "All Brothers are invited to wish them a Happy Birthday!",
-            "inline": False
-        })
-        
-        payload = {
-            "content": f"@everyone **🎂 Birthday Alert!** 🎂\n\nLet's all wish **{member_name}** a very Happy Birthday! 🎉",
-            "embeds": [embed]
-        }
-        
-        response = requests.post(webhook_url, json=payload)
+        results = await discord_webhooks.post_embeds_each(
+            webhook_url,
+            [build_birthday_embed(m) for m in members],
+            content=content
+        )
         
-        if response.status_code == 204:
-            print(f"✅ Birthday notification sent to #member-chat for: {member_name}")
-            return True
-        else:
-            print(f"❌ Birthday notification failed: {response.status_code} - {response.text}")
-            return False
+        sent = [name for name, ok in zip(names, results) if ok]
+        failed = [name for name, ok in zip(names, results) if not ok]
+        if sent:
+            print(f"✅ Birthday notification sent to #member-chat for: {', '.join(sent)}")
+        if failed:
+            print(f"❌ Birthday notification failed for: {', '.join(failed)}")
+        return results
             
     except Exception as e:
         print(f"❌ Error sending birthday notification: {str(e)}")
         import traceback
         traceback.print_exc()
-        return False
+        return [False] * len(members)
+
+
+async def send_birthday_notification(member: dict):
+    """Send Discord notification for a member's birthday to member-chat channel"""
+    return all(await send_birthday_notifications([member]))
 
 
 async def check_and_send_birthday_notifications():
@@ -13308,18 +14019,19 @@ async def check_and_send_birthday_notifications():
             unique=True
         )
         
-        # Fetch all members with DOB set
+        # Members born on today's month/day (indexed dob_md)
         members = await thread_db.members.find(
-            {"dob": {"$exists": True, "$ne": None, "$ne": ""}},
+            {"dob_md": today_mm_dd},
             {"_id": 0}
         ).to_list(1000)
         
-        print(f"🎂 [BIRTHDAY] Found {len(members)} members with DOB records", file=sys.stderr, flush=True)
+        print(f"🎂 [BIRTHDAY] Found {len(members)} members with a birthday today", file=sys.stderr, flush=True)
         
         # Check today's date key to avoid duplicate notifications
         today_key = today.strftime("%Y-%m-%d")
         
         birthday_count = 0
+        claimed = []  # (member_id, member) records inserted by this run
         for member in members:
             dob = member.get('dob', '')
             if not dob:
@@ -13360,19 +14072,10 @@ async def check_and_send_birthday_notifications():
                             upsert=True
                         )
                         
-                        # Only send notification if this was a new insert (not already exists)
+                        # Only notify if this was a new insert (not already exists)
                         if result.upserted_id:
                             print(f"   🎉 Birthday found: {member.get('name', member.get('handle'))} - {dob}", file=sys.stderr, flush=True)
-                            success = await send_birthday_notification(member)
-                            
-                            if not success:
-                                # If notification failed, remove the record so it can retry
-                                await thread_db.birthday_notifications.delete_one({
-                                    "member_id": member_id,
-                                    "notification_date": today_key
-                                })
-                            else:
-                                birthday_count += 1
+                            claimed.append((member_id, member))
                         else:
                             print(f"   ⏭️ Already notified (race) for {member.get('name', member.get('handle'))}", file=sys.stderr, flush=True)
                     except Exception as dup_error:
@@ -13385,6 +14088,18 @@ async def check_and_send_birthday_notifications():
             except Exception as e:
                 print(f"   ❌ Error processing DOB for {member.get('handle', 'unknown')}: {str(e)}", file=sys.stderr, flush=True)
         
+        # One batched post for all of today's birthdays
+        if claimed:
+            results = await send_birthday_notifications([member for _, member in claimed])
+            birthday_count = sum(1 for ok in results if ok)
+            failed_ids = [member_id for (member_id, _), ok in zip(claimed, results) if not ok]
+            if failed_ids:
+                # Release only the claims whose message failed so those members can be retried
+                await thread_db.birthday_notifications.delete_many({
+                    "member_id": {"$in": failed_ids},
+                    "notification_date": today_key
+                })
+        
         # Mark the job as completed
         await thread_db.scheduler_locks.update_one(
             {"job_name": "birthday_check", "lock_date": today_key},
@@ -13413,6 +14128,7 @@ def run_birthday_check():
             loop.run_until_complete(check_and_send_birthday_notifications())
             print(f"✅ [SCHEDULER] Birthday check job completed", file=sys.stderr, flush=True)
         finally:
+            loop.run_until_complete(discord_webhooks.close())
             loop.close()
             
     except Exception as e:
@@ -13422,100 +14138,121 @@ def run_birthday_check():
 
 # ==================== ANNIVERSARY NOTIFICATIONS ====================
 
-async def send_anniversary_notification(member: dict, years: int):
-    """Send Discord notification for a member's anniversary to member-chat channel"""
+def build_anniversary_embed(member: dict, years: int) -> dict:
+    """Anniversary embed for one member"""
+    member_name = member.get('name', member.get('handle', 'Brother'))
+    member_handle = member.get('handle', '')
+    member_chapter = member.get('chapter', '')
+    member_title = member.get('title', '')
+    
+    # Create trucker-themed anniversary message
+    year_text = "year" if years == 1 else "years"
+    
+    # Milestone messages based on years
+    if years >= 10:
+        milestone_msg = "A true road warrior and pillar of the Brotherhood! 🏆"
+    elif years >= 5:
+        milestone_msg = "A seasoned veteran of the highway! Keep on truckin'! 🛣️"
+    elif years >= 3:
+        milestone_msg = "Rolling strong through the years! 💪"
+    else:
+        milestone_msg = "Keep those wheels turning, Brother! 🚛"
+    
+    # Create a festive anniversary embed
+    embed = {
+        "title": "🎉 Member Anniversary! 🎊",
+        "description": f"**{member_name}** is celebrating **{years} {year_text}** as a Brother of the Highway!\n\n{milestone_msg}",
+        "color": 0x4169E1,  # Royal blue for anniversary
+        "fields": [],
+        "footer": {
+            "text": "Brothers of the Highway | Anniversary Celebration"
+        }
+    }
+    
+    # Add member info
+    if member_handle:
+        embed["fields"].append({
+            "name": "🏷️ Handle",
+            "value": member_handle,
+            "inline": True
+        })
+    
+    if member_chapter:
+        embed["fields"].append({
+            "name": "🏴 Chapter",
+            "value": member_chapter,
+            "inline": True
+        })
+    
+    if member_title:
+        embed["fields"].append({
+            "name": "👤 Title",
+            "value": member_title,
+            "inline": True
+        })
+    
+    # Add years milestone
+    embed["fields"].append({
+        "name": "📅 Years of Brotherhood",
+        "value": f"**{years}** {year_text} on the road together!",
+        "inline": False
+    })
+    
+    # Add call to action
+    embed["fields"].append({
+        "name": "🎊 Congratulations!",
+        "value": "All Brothers are invited to congratulate them on their anniversary!",
+        "inline": False
+    })
+    return embed
+
+
+async def send_anniversary_notifications(anniversaries: list) -> list:
+    """
+    Send one member-chat post for a list of (member, years) anniversaries.
+    Returns one success flag per anniversary (see send_birthday_notifications).
+    """
     # Always use member-chat webhook for anniversary notifications
     webhook_url = get_discord_webhook_url("member-chat")
     if not webhook_url:
         print("⚠️  Discord webhook URL not configured for member-chat channel (anniversary notification)")
-        return False
+        return [False] * len(anniversaries)
+    if not anniversaries:
+        return []
     
     try:
-        # Get member details
-        member_name = member.get('name', member.get('handle', 'Brother'))
-        member_handle = member.get('handle', '')
-        member_chapter = member.get('chapter', '')
-        member_title = member.get('title', '')
-        
-        # Create trucker-themed anniversary message
-        year_text = "year" if years == 1 else "years"
-        
-        # Milestone messages based on years
-        if years >= 10:
-            milestone_msg = "A true road warrior and pillar of the Brotherhood! 🏆"
-        elif years >= 5:
-            milestone_msg = "A seasoned veteran of the highway! Keep on truckin'! 🛣️"
-        elif years >= 3:
-            milestone_msg = "Rolling strong through the years! 💪"
+        names = [m.get('name', m.get('handle', 'Brother')) for m, _ in anniversaries]
+        if len(anniversaries) == 1:
+            years = anniversaries[0][1]
+            year_text = "year" if years == 1 else "years"
+            content = f"@everyone **🎉 Anniversary Alert!** 🎉\n\nLet's all congratulate **{names[0]}** on **{years} {year_text}** with the Brotherhood! 🚛💨"
         else:
-            milestone_msg = "Keep those wheels turning, Brother! 🚛"
-        
-        # Create a festive anniversary embed
-        embed = {
-            "title": "🎉 Member Anniversary! 🎊",
-            "description": f"**{member_name}** is celebrating **{years} {year_text}** as a Brother of the Highway!\n\n{milestone_msg}",
-            "color": 0x4169E1,  # Royal blue for anniversary
-            "fields": [],
-            "footer": {
-                "text": "Brothers of the Highway | Anniversary Celebration"
-            }
-        }
+            content = f"@everyone **🎉 Anniversary Alert!** 🎉\n\nLet's all congratulate {format_discord_name_list(names)} on their anniversaries with the Brotherhood! 🚛💨"
         
-        # Add member info
-        if member_handle:
-            embed["fields"].append({
-                "name": "🏷️ Handle",
-                "value": member_handle,
-                "inline": True
-            })
-        
-        if member_chapter:
-            embed["fields"].append({
-                "name": "🏴 Chapter",
-                "value": member_chapter,
-                "inline": True
-            })
-        
-        if member_title:
-            embed["fields"].append({
-                "name": "👤 Title",
-                "value": member_title,
-                "inline": True
-            })
-        
-        # Add years milestone
-        embed["fields"].append({
-            "name": "📅 Years of Brotherhood",
-            "value": f"**{years}** {year_text} on the road together!",
-            "inline": False
-        })
-        
-        # Add call to action
-        embed["fields"].append({
-            "name": "🎊 Congratulations!",
-            "value": "All Brothers are invited to congratulate them on their anniversary!",
-            "inline": False
-        })
-        
-        payload = {
-            "content": f"@everyone **🎉 Anniversary Alert!** 🎉\n\nLet's all congratulate **{member_name}** on **{years} {year_text}** with the Brotherhood! 🚛💨",
-            "embeds": [embed]
-        }
-        
-        response = requests.post(webhook_url, json=payload)
+        results = await discord_webhooks.post_embeds_each(
+            webhook_url,
+            [build_anniversary_embed(m, years) for m, years in anniversaries],
+            content=content
+        )
         
-        if response.status_code == 204:
-            print(f"✅ Anniversary notification sent to #member-chat for: {member_name} ({years} years)")
-            return True
-        else:
-            print(f"❌ Anniversary notification failed: {response.status_code} - {response.text}")
-            return False
+        sent = [name for name, ok in zip(names, results) if ok]
+        failed = [name for name, ok in zip(names, results) if not ok]
+        if sent:
+            print(f"✅ Anniversary notification sent to #member-chat for: {', '.join(sent)}")
+        if failed:
+            print(f"❌ Anniversary notification failed for: {', '.join(failed)}")
+        return results
             
     except Exception as e:
         print(f"❌ Error sending anniversary notification: {str(e)}")
         import traceback
         traceback.print_exc()
-        return False
+        return [False] * len(anniversaries)
+
+
+async def send_anniversary_notification(member: dict, years: int):
+    """Send Discord notification for a member's anniversary to member-chat channel"""
+    return all(await send_anniversary_notifications([(member, years)]))
 
 
 async def check_and_send_anniversary_notifications():
@@ -13585,15 +14322,16 @@ async def check_and_send_anniversary_notifications():
             unique=True
         )
         
-        # Fetch all members with join_date set
+        # Members who joined in this month (indexed join_month)
         members = await thread_db.members.find(
-            {"join_date": {"$exists": True, "$ne": None, "$ne": ""}},
+            {"join_month": today.month},
             {"_id": 0}
         ).to_list(1000)
         
-        print(f"🎉 [ANNIVERSARY] Found {len(members)} members with join_date records", file=sys.stderr, flush=True)
+        print(f"🎉 [ANNIVERSARY] Found {len(members)} members with an anniversary this month", file=sys.stderr, flush=True)
         
         anniversary_count = 0
+        pending = []  # (member_id, decrypted_member, years) to announce in one post
         for member in members:
             join_date = member.get('join_date', '')
             if not join_date:
@@ -13635,37 +14373,39 @@ async def check_and_send_anniversary_notifications():
                         # Decrypt sensitive data for the notification
                         decrypted_member = decrypt_member_sensitive_data(member.copy())
                         
-                        # Send anniversary notification
                         print(f"   🎉 Anniversary found: {decrypted_member.get('name', decrypted_member.get('handle'))} - {years} year(s) (joined {join_date})", file=sys.stderr, flush=True)
-                        success = await send_anniversary_notification(decrypted_member, years)
-                        
-                        if success:
-                            # Record that we sent the notification (use upsert for safety with unique index)
-                            try:
-                                await thread_db.anniversary_notifications.update_one(
-                                    {
-                                        "member_id": member_id,
-                                        "notification_month": month_key
-                                    },
-                                    {
-                                        "$setOnInsert": {
-                                            "member_id": member_id,
-                                            "member_name": decrypted_member.get('name', decrypted_member.get('handle', '')),
-                                            "notification_month": month_key,
-                                            "years": years,
-                                            "sent_at": datetime.now()
-                                        }
-                                    },
-                                    upsert=True
-                                )
-                                anniversary_count += 1
-                            except Exception as dup_err:
-                                # Duplicate key error means another instance already recorded it
-                                print(f"   ⚠️ Duplicate notification prevented for {member.get('handle')}", file=sys.stderr, flush=True)
+                        pending.append((member_id, decrypted_member, years))
                             
             except Exception as e:
                 print(f"   ❌ Error processing join_date for {member.get('handle', 'unknown')}: {str(e)}", file=sys.stderr, flush=True)
         
+        # One batched post for all of this month's anniversaries; record only the ones that went out
+        results = await send_anniversary_notifications([(m, years) for _, m, years in pending]) if pending else []
+        for (member_id, decrypted_member, years), sent in zip(pending, results):
+            if sent:
+                # Record that we sent the notification (use upsert for safety with unique index)
+                try:
+                    await thread_db.anniversary_notifications.update_one(
+                        {
+                            "member_id": member_id,
+                            "notification_month": month_key
+                        },
+                        {
+                            "$setOnInsert": {
+                                "member_id": member_id,
+                                "member_name": decrypted_member.get('name', decrypted_member.get('handle', '')),
+                                "notification_month": month_key,
+                                "years": years,
+                                "sent_at": datetime.now()
+                            }
+                        },
+                        upsert=True
+                    )
+                    anniversary_count += 1
+                except Exception as dup_err:
+                    # Duplicate key error means another instance already recorded it
+                    print(f"   ⚠️ Duplicate notification prevented for {decrypted_member.get('handle')}", file=sys.stderr, flush=True)
+        
         # Mark job as completed
         await thread_db.scheduler_locks.update_one(
             {
@@ -13703,6 +14443,7 @@ def run_anniversary_check():
             loop.run_until_complete(check_and_send_anniversary_notifications())
             print(f"✅ [SCHEDULER] Anniversary check job completed", file=sys.stderr, flush=True)
         finally:
+            loop.run_until_complete(discord_webhooks.close())
             loop.close()
             
     except Exception as e:
@@ -13720,29 +14461,121 @@ scheduler = None
 UPLOAD_DIR = Path(__file__).parent / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-# ==================== STORE API ENDPOINTS ====================
+# ==================== STORE CATALOG CACHE ====================
+# Versioned in-memory snapshot of active store products. Product CRUD,
+# inventory changes and catalog sync bump the version; list endpoints decorate
+# the snapshot per user and answer repeat requests with 304 via strong ETags.
 
-@api_router.get("/store/products")
-async def get_store_products(category: Optional[str] = None, current_user: dict = Depends(verify_token)):
-    """Get all active store products"""
-    try:
-        query = {"is_active": True}
-        if category:
-            query["category"] = category
-        
-        products = await db.store_products.find(query, {"_id": 0}).to_list(1000)
-        
-        # Check if user is a member for member pricing
-        is_member = current_user.get("role") == "admin" or await db.members.find_one({"email": current_user.get("email")})
-        
-        # Check if user can manage store (async to check delegated admins)
-        user_can_manage = await can_manage_store_async(current_user)
+STORE_CATALOG_MAX_AGE = timedelta(minutes=5)  # Safety net for writes made outside this process
+STORE_USER_CONTEXT_TTL = 60  # Seconds to cache per-user member/manager flags
+
+store_catalog_version = 0
+store_catalog_snapshot = None
+store_catalog_lock = asyncio.Lock()
+store_user_context_cache = TTLCache(maxsize=2048, ttl=STORE_USER_CONTEXT_TTL)
+
+
+def invalidate_store_catalog():
+    """Drop the cached product snapshot after any store_products write"""
+    global store_catalog_version, store_catalog_snapshot
+    store_catalog_version += 1
+    store_catalog_snapshot = None
+
+
+async def get_store_catalog_snapshot() -> dict:
+    """Return the active-product snapshot, reloading it if stale"""
+    global store_catalog_snapshot
+    snapshot = store_catalog_snapshot
+    if snapshot and datetime.now(timezone.utc) - snapshot["loaded_at"] < STORE_CATALOG_MAX_AGE:
+        return snapshot
+    
+    async with store_catalog_lock:
+        snapshot = store_catalog_snapshot
+        if snapshot and datetime.now(timezone.utc) - snapshot["loaded_at"] < STORE_CATALOG_MAX_AGE:
+            return snapshot
         
+        version = store_catalog_version
+        products = await db.store_products.find({"is_active": True}, {"_id": 0}).to_list(1000)
         for product in products:
             if isinstance(product.get('created_at'), str):
                 product['created_at'] = datetime.fromisoformat(product['created_at'])
             if isinstance(product.get('updated_at'), str):
                 product['updated_at'] = datetime.fromisoformat(product['updated_at'])
+        
+        import json
+        content_hash = hashlib.sha256(
+            json.dumps(products, default=str, sort_keys=True).encode()
+        ).hexdigest()
+        snapshot = {
+            "version": version,
+            "loaded_at": datetime.now(timezone.utc),
+            "products": products,
+            "hash": content_hash
+        }
+        # Don't publish a snapshot that was invalidated while loading
+        if version == store_catalog_version:
+            store_catalog_snapshot = snapshot
+        return snapshot
+
+
+async def get_store_user_context(current_user: dict) -> dict:
+    """Cached member-pricing and store-management flags for a user"""
+    key = (current_user.get("username"), current_user.get("role"), current_user.get("chapter"), current_user.get("title"))
+    context = store_user_context_cache.get(key)
+    if context is None:
+        is_member = current_user.get("role") == "admin" or bool(
+            await db.members.find_one({"email": current_user.get("email")}, {"_id": 1})
+        )
+        context = {
+            "is_member": is_member,
+            "can_manage": await can_manage_store_async(current_user)
+        }
+        store_user_context_cache[key] = context
+    return context
+
+
+def store_catalog_etag(snapshot: dict, *variant) -> str:
+    """Strong ETag for one representation of the catalog snapshot"""
+    tag = hashlib.sha256("|".join([snapshot["hash"], *map(str, variant)]).encode()).hexdigest()[:32]
+    return f'"{tag}"'
+
+
+def store_catalog_not_modified(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already covers this ETag"""
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+# ==================== END STORE CATALOG CACHE ====================
+
+# ==================== STORE API ENDPOINTS ====================
+
+@api_router.get("/store/products")
+async def get_store_products(
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Get all active store products"""
+    try:
+        snapshot = await get_store_catalog_snapshot()
+        
+        # Member pricing and management flags from the cached user context
+        user_context = await get_store_user_context(current_user)
+        is_member = user_context["is_member"]
+        user_can_manage = user_context["can_manage"]
+        
+        etag = store_catalog_etag(snapshot, "members", category or "", is_member, user_can_manage)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if store_catalog_not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+        
+        products = []
+        for cached in snapshot["products"]:
+            if category and cached.get("category") != category:
+                continue
+            product = dict(cached)
             # Apply member pricing if applicable
             if is_member and product.get('member_price'):
                 product['display_price'] = product['member_price']
@@ -13752,33 +14585,35 @@ async def get_store_products(category: Optional[str] = None, current_user: dict
                 product['is_member_price'] = False
             # Add management permission flag
             product['can_manage'] = user_can_manage
+            products.append(product)
         
         return products
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/store/public/products")
-async def get_public_store_products():
+async def get_public_store_products(request: Request, response: Response):
     """Get supporter-available store products (no authentication required)"""
     try:
-        # Get only merchandise products that are marked for supporter store
-        query = {
-            "is_active": True,
-            "category": "merchandise",
-            "show_in_supporter_store": True  # Only show products marked for supporter store
-        }
-        
-        products = await db.store_products.find(query, {"_id": 0}).to_list(1000)
-        
-        for product in products:
-            if isinstance(product.get('created_at'), str):
-                product['created_at'] = datetime.fromisoformat(product['created_at'])
-            if isinstance(product.get('updated_at'), str):
-                product['updated_at'] = datetime.fromisoformat(product['updated_at'])
+        snapshot = await get_store_catalog_snapshot()
+        
+        etag = store_catalog_etag(snapshot, "public")
+        headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+        if store_catalog_not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+        
+        products = []
+        for cached in snapshot["products"]:
+            # Only merchandise products that are marked for supporter store
+            if cached.get("category") != "merchandise" or not cached.get("show_in_supporter_store"):
+                continue
+            product = dict(cached)
             # Public store always shows regular price
             product['display_price'] = product.get('price', 0)
             product['is_member_price'] = False
             product['can_manage'] = False
+            products.append(product)
         
         return products
     except Exception as e:
@@ -13804,6 +14639,7 @@ async def create_store_product(product_data: StoreProductCreate, current_user: d
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await db.store_products.insert_one(doc)
+    invalidate_store_catalog()
     
     await log_activity(
         current_user["username"],
@@ -13827,6 +14663,7 @@ async def update_store_product(product_id: str, product_data: StoreProductUpdate
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
     
     await db.store_products.update_one({"id": product_id}, {"$set": update_data})
+    invalidate_store_catalog()
     
     updated_product = await db.store_products.find_one({"id": product_id}, {"_id": 0})
     return updated_product
@@ -13840,6 +14677,7 @@ async def delete_store_product(product_id: str, current_user: dict = Depends(ver
     result = await db.store_products.delete_one({"id": product_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    invalidate_store_catalog()
     
     return {"message": "Product deleted successfully"}
 
@@ -14348,6 +15186,7 @@ async def process_payment(order_id: str, payment: PaymentRequest, current_user:
                         {"id": item["product_id"]},
                         {"$inc": {"inventory_count": -item["quantity"]}}
                     )
+                    invalidate_store_catalog()
             
             # Update member dues status if this is a dues payment
             dues_info = order.get("dues_info")
@@ -14481,6 +15320,7 @@ async def pay_dues(amount: float, year: int, month: int = 0, handle: str = None,
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
         await db.store_products.insert_one(dues_product)
+        invalidate_store_catalog()
     
     # Find the member record for this user - try handle first, then username/email
     member = None
@@ -14552,181 +15392,12 @@ async def sync_square_catalog(current_user: dict = Depends(verify_token)):
         raise HTTPException(status_code=500, detail="Square client not configured")
     
     try:
-        # Fetch catalog items from Square - iterate through the pager
-        result = square_client.catalog.list(types="ITEM")
-        items = list(result)  # Convert pager to list
-        
-        if not items:
-            return {"message": "No items found in Square catalog", "count": 0}
+        # Joins an in-flight sync instead of starting a second one
+        result = await request_catalog_sync(force=True)
+        synced_count = result.get("synced", 0)
         
-        # Collect all variation IDs to fetch inventory in batch
-        all_variation_ids = []
-        for item in items:
-            item_data = item.item_data
-            if not item_data:
-                continue
-            for var in (item_data.variations or []):
-                all_variation_ids.append(var.id)
-        
-        # Fetch inventory counts for all variations
-        inventory_map = {}
-        if all_variation_ids:
-            try:
-                inv_result = square_client.inventory.batch_get_counts(
-                    catalog_object_ids=all_variation_ids,
-                    location_ids=[SQUARE_LOCATION_ID]
-                )
-                inv_items = list(inv_result)
-                for count in inv_items:
-                    qty = int(count.quantity) if count.quantity else 0
-                    inventory_map[count.catalog_object_id] = qty
-            except Exception as inv_e:
-                print(f"Warning: Could not fetch inventory: {inv_e}", file=sys.stderr)
-        
-        synced_count = 0
-        
-        for item in items:
-            item_data = item.item_data
-            if not item_data:
-                continue
-            item_id = item.id
-            name = item_data.name or "Unknown"
-            description = item_data.description or ""
-            
-            # Get ecom image URLs if available
-            image_url = None
-            if item_data.ecom_image_uris and len(item_data.ecom_image_uris) > 0:
-                image_url = item_data.ecom_image_uris[0]
-            
-            # Get variations with inventory
-            variations_list = item_data.variations or []
-            if not variations_list:
-                continue
-            
-            # Build variations data with inventory
-            product_variations = []
-            total_inventory = 0
-            min_price = float('inf')
-            has_size_variations = False
-            
-            # Check if this is a shirt/hoodie (allows customization)
-            # Specific exclusions per user requirements:
-            # - Hi-Viz shirts (any Hi-Viz product)
-            # - Member Long Sleeve Shirt - Black (Original Logo Design)
-            # - Ladiez T-Shirt
-            name_lower = name.lower()
-            is_apparel = any(word in name_lower for word in ['shirt', 'hoodie', 'tee', 'jersey', 'long sleeve'])
-            
-            # Check specific exclusions
-            is_excluded = (
-                'hi-viz' in name_lower or 
-                'hiviz' in name_lower or
-                'hi viz' in name_lower or
-                'ladiez' in name_lower or
-                ('member long sleeve' in name_lower and 'original logo design' in name_lower)
-            )
-            
-            allows_customization = is_apparel and not is_excluded
-            
-            for var in variations_list:
-                var_data = var.item_variation_data
-                if not var_data:
-                    continue
-                
-                price_money = var_data.price_money
-                if not price_money:
-                    continue
-                    
-                price = price_money.amount / 100
-                if price <= 0:
-                    continue
-                
-                if price < min_price:
-                    min_price = price
-                
-                var_name = var_data.name or "Default"
-                var_id = var.id
-                
-                # Get inventory from our map
-                inv_count = inventory_map.get(var_id, 0)
-                total_inventory += inv_count
-                
-                # Check sold_out from location overrides
-                sold_out = inv_count == 0
-                if var_data.location_overrides:
-                    for lo in var_data.location_overrides:
-                        if lo.sold_out:
-                            sold_out = True
-                            break
-                
-                # Check if this looks like a size
-                size_indicators = ['S', 'M', 'L', 'XL', '2XL', '3XL', '4XL', '5XL', 'XS', 'XXL', 'LT', 'XLT', '2XLT', '3XLT']
-                if var_name.upper() in size_indicators or any(s in var_name.upper() for s in size_indicators):
-                    has_size_variations = True
-                
-                product_variations.append({
-                    "id": str(uuid.uuid4()),
-                    "name": var_name,
-                    "price": price,
-                    "square_variation_id": var_id,
-                    "inventory_count": inv_count,
-                    "sold_out": sold_out
-                })
-            
-            if min_price == float('inf'):
-                continue
-            
-            # Sort variations by size order
-            size_order = {'XS': 0, 'S': 1, 'M': 2, 'L': 3, 'LT': 4, 'XL': 5, 'XLT': 6, '2XL': 7, '2XLT': 8, '3XL': 9, '3XLT': 10, '4XL': 11, '5XL': 12, 'Regular': 0}
-            product_variations.sort(key=lambda x: size_order.get(x['name'], 99))
-            
-            # Determine if product should be shown in supporter store
-            # Default: show everything EXCEPT member-only items
-            is_member_only = (
-                'member' in name_lower and 
-                'supporter' not in name_lower
-            )
-            # NEW ITEMS: Default to NOT showing in supporter store
-            # Store admins must manually enable each item for supporter store
-            show_in_supporter = False  # Always false for new items
-            
-            # Check if product already exists
-            existing = await db.store_products.find_one({"square_catalog_id": item_id})
-            
-            product_data = {
-                "name": name,
-                "description": description[:500] if description else "",
-                "price": min_price,
-                "image_url": image_url,
-                "variations": product_variations,
-                "has_variations": len(product_variations) > 1 or has_size_variations,
-                "allows_customization": allows_customization,
-                "inventory_count": total_inventory,
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            if existing:
-                # Update existing product - preserve show_in_supporter_store setting
-                # Admins control this manually
-                await db.store_products.update_one(
-                    {"square_catalog_id": item_id},
-                    {"$set": product_data}
-                )
-            else:
-                # Create new product - default to NOT in supporter store
-                product_data.update({
-                    "id": str(uuid.uuid4()),
-                    "category": "merchandise",
-                    "square_catalog_id": item_id,
-                    "is_active": True,
-                    "show_in_supporter_store": show_in_supporter,  # Default FALSE for new items
-                    "allows_customization": False,  # Default FALSE, admin must enable
-                    "created_at": datetime.now(timezone.utc).isoformat()
-                })
-                await db.store_products.insert_one(product_data)
-                logger.info(f"New product synced: {name} (supporter store: {show_in_supporter})")
-            
-            synced_count += 1
+        if result.get("status") == "unchanged":
+            return {"message": "Square catalog unchanged since last sync", "count": 0}
         
         return {"message": f"Successfully synced {synced_count} products from Square catalog with inventory", "count": synced_count}
     
@@ -14740,7 +15411,12 @@ async def sync_square_catalog(current_user: dict = Depends(verify_token)):
 @api_router.post("/webhooks/square")
 async def handle_square_webhook(request: Request):
     """
-    Handle webhook events from Square.
+    Receive webhook events from Square.
+    
+    The raw event is verified, persisted to the webhook inbox (unique on
+    event_id) and acknowledged immediately. The inbox worker processes it
+    in the background with retries; duplicate deliveries are dropped. If
+    the event can't be stored, a 503 makes Square redeliver it.
     
     Events handled:
     - payment.completed: Update order status to 'paid'
@@ -14781,19 +15457,33 @@ async def handle_square_webhook(request: Request):
         event_data = json.loads(body_str)
         
         event_type = event_data.get('type', '')
-        event_id = event_data.get('event_id', '')
+        # Fall back to a body hash so events without an ID are still deduplicated
+        event_id = event_data.get('event_id') or hashlib.sha256(body).hexdigest()
         
         logger.info(f"Square webhook received: {event_type} (event_id: {event_id})")
         
-        # Handle different event types
-        if event_type == 'payment.completed':
-            await handle_payment_completed(event_data)
-        elif event_type == 'payment.updated':
-            await handle_payment_updated(event_data)
-        elif event_type == 'order.updated':
-            await handle_order_updated(event_data)
-        else:
-            logger.info(f"Unhandled Square webhook event type: {event_type}")
+        now = datetime.now(timezone.utc)
+        try:
+            await db.square_webhook_inbox.insert_one({
+                "event_id": event_id,
+                "type": event_type,
+                "payload": event_data,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "last_error": None,
+                "received_at": now,
+                "processed_at": None
+            })
+        except DuplicateKeyError:
+            logger.info(f"Duplicate Square webhook delivery ignored (event_id: {event_id})")
+            return {"status": "duplicate", "event_id": event_id}
+        except Exception as e:
+            # Not stored, so not acknowledged - Square redelivers on a 5xx
+            logger.error(f"Failed to store Square webhook {event_id}: {str(e)}")
+            raise HTTPException(status_code=503, detail="Webhook could not be stored")
+        
+        square_webhook_wakeup.set()
         
         # Return 200 to acknowledge receipt (Square requires this)
         return {"status": "ok", "event_id": event_id}
@@ -14805,6 +15495,138 @@ async def handle_square_webhook(request: Request):
         # Still return 200 to prevent Square from retrying
         return {"status": "error", "message": str(e)}
 
+
+# ==================== SQUARE WEBHOOK INBOX WORKER ====================
+# Events are processed from the square_webhook_inbox collection so the webhook
+# endpoint can acknowledge immediately. Failed events are retried with
+# exponential backoff and moved to 'dead_letter' after the last attempt.
+
+SQUARE_WEBHOOK_MAX_ATTEMPTS = 5
+SQUARE_WEBHOOK_RETRY_BASE_SECONDS = 30
+SQUARE_WEBHOOK_POLL_SECONDS = 30
+SQUARE_WEBHOOK_STALE_LOCK = timedelta(minutes=5)  # Reclaim events left 'processing' by a crashed worker
+
+square_webhook_wakeup = asyncio.Event()
+square_webhook_worker_task = None
+
+
+async def dispatch_square_webhook_event(event_data: dict):
+    """Route a Square webhook event to its handler (handlers raise on failure)"""
+    event_type = event_data.get('type', '')
+    if event_type == 'payment.completed':
+        await handle_payment_completed(event_data)
+    elif event_type == 'payment.updated':
+        await handle_payment_updated(event_data)
+    elif event_type == 'order.updated':
+        await handle_order_updated(event_data)
+    else:
+        logger.info(f"Unhandled Square webhook event type: {event_type}")
+
+
+async def claim_square_webhook_event() -> Optional[dict]:
+    """Atomically claim the next due inbox event for processing"""
+    now = datetime.now(timezone.utc)
+    return await db.square_webhook_inbox.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "locked_at": {"$lte": now - SQUARE_WEBHOOK_STALE_LOCK}}
+        ]},
+        {"$set": {"status": "processing", "locked_at": now}, "$inc": {"attempts": 1}},
+        sort=[("next_attempt_at", 1)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def process_square_webhook_event(event: dict):
+    """Process one claimed inbox event and record the outcome"""
+    event_id = event["event_id"]
+    try:
+        await dispatch_square_webhook_event(event.get("payload") or {})
+        await db.square_webhook_inbox.update_one(
+            {"event_id": event_id},
+            {"$set": {"status": "done", "processed_at": datetime.now(timezone.utc), "last_error": None},
+             "$unset": {"locked_at": ""}}
+        )
+    except Exception as e:
+        attempts = event.get("attempts", 1)
+        if attempts >= SQUARE_WEBHOOK_MAX_ATTEMPTS:
+            logger.error(f"Square webhook {event_id} moved to dead letter after {attempts} attempts: {e}")
+            update = {"status": "dead_letter", "last_error": str(e)}
+        else:
+            delay = SQUARE_WEBHOOK_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+            logger.warning(f"Square webhook {event_id} failed (attempt {attempts}), retrying in {delay}s: {e}")
+            update = {
+                "status": "pending",
+                "last_error": str(e),
+                "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay)
+            }
+        await db.square_webhook_inbox.update_one(
+            {"event_id": event_id},
+            {"$set": update, "$unset": {"locked_at": ""}}
+        )
+
+
+async def run_square_webhook_worker():
+    """Drain the webhook inbox, then sleep until woken or the poll interval passes"""
+    while True:
+        try:
+            event = await claim_square_webhook_event()
+            if event:
+                await process_square_webhook_event(event)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Square webhook worker error: {str(e)}")
+        
+        square_webhook_wakeup.clear()
+        try:
+            await asyncio.wait_for(square_webhook_wakeup.wait(), timeout=SQUARE_WEBHOOK_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+@app.on_event("startup")
+async def start_square_webhook_worker():
+    """Start the background worker that processes the Square webhook inbox"""
+    global square_webhook_worker_task
+    square_webhook_worker_task = asyncio.create_task(run_square_webhook_worker())
+
+
+@api_router.get("/webhooks/square/inbox")
+async def get_square_webhook_inbox(
+    status: Optional[str] = None,
+    limit: int = 50,
+    current_user: dict = Depends(verify_admin)
+):
+    """List webhook inbox events, optionally filtered by status (e.g. dead_letter)"""
+    query = {"status": status} if status else {}
+    events = await db.square_webhook_inbox.find(
+        query, {"_id": 0, "payload": 0}
+    ).sort("received_at", -1).limit(min(limit, 500)).to_list(None)
+    return {"events": events}
+
+
+@api_router.post("/webhooks/square/inbox/{event_id}/replay")
+async def replay_square_webhook_event(event_id: str, current_user: dict = Depends(verify_admin)):
+    """Re-queue a stored webhook event (e.g. a dead letter) for processing"""
+    result = await db.square_webhook_inbox.update_one(
+        {"event_id": event_id},
+        {"$set": {
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": datetime.now(timezone.utc),
+            "last_error": None
+        }, "$unset": {"locked_at": ""}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Webhook event not found")
+    
+    square_webhook_wakeup.set()
+    await log_activity(current_user["username"], "replay_square_webhook", f"Replayed Square webhook event {event_id}")
+    return {"message": "Webhook event queued for replay", "event_id": event_id}
+
 async def handle_payment_completed(event_data: dict):
     """Handle payment.completed webhook event"""
     try:
@@ -14830,6 +15652,8 @@ async def handle_payment_completed(event_data: dict):
         
         if local_order:
             # Handle in-app store order
+            dues_info = local_order.get("dues_info")
+            is_dues_order = bool(dues_info and dues_info.get("member_id"))
             if local_order.get('status') != 'paid':
                 update_data = {
                     "status": "paid",
@@ -14837,6 +15661,9 @@ async def handle_payment_completed(event_data: dict):
                     "payment_completed_at": datetime.now(timezone.utc).isoformat(),
                     "updated_at": datetime.now(timezone.utc).isoformat()
                 }
+                if is_dues_order:
+                    # Cleared once the dues are recorded; a retried event checks this, not the status
+                    update_data["dues_applied"] = False
                 
                 await db.store_orders.update_one(
                     {"id": local_order["id"]},
@@ -14845,16 +15672,23 @@ async def handle_payment_completed(event_data: dict):
                 
                 logger.info(f"Order {local_order['id']} updated to 'paid' via webhook")
                 
-                # Update member dues if this is a dues payment
-                dues_info = local_order.get("dues_info")
-                if dues_info and dues_info.get("member_id"):
-                    await update_member_dues_from_webhook(dues_info)
-                
                 await log_activity(
                     local_order.get("user_id", "webhook"),
                     "order_paid_webhook",
                     f"Order {local_order['id']} marked as paid via Square webhook"
                 )
+                dues_pending = is_dues_order
+            else:
+                # Orders paid before the flag existed have no dues_applied and are left alone
+                dues_pending = is_dues_order and local_order.get("dues_applied") is False
+            
+            # Update member dues if this is a dues payment
+            if dues_pending:
+                await update_member_dues_from_webhook(dues_info)
+                await db.store_orders.update_one(
+                    {"id": local_order["id"]},
+                    {"$set": {"dues_applied": True}}
+                )
         else:
             # No local order - this might be a direct Square payment (payment link, POS, etc.)
             # Try to match to a member for automatic dues tracking
@@ -14862,11 +15696,21 @@ async def handle_payment_completed(event_data: dict):
             
     except Exception as e:
         logger.error(f"Error handling payment.completed: {str(e)}")
+        raise
 
 
 async def try_match_external_payment_to_dues(payment: dict, payment_id: str, amount: float):
     """Try to match an external Square payment to a member for dues tracking"""
     try:
+        # Webhook events can be retried or replayed - skip payments already recorded
+        if payment_id:
+            already_recorded = await db.external_dues_payments.find_one({"square_payment_id": payment_id}, {"_id": 1})
+            if not already_recorded:
+                already_recorded = await db.unmatched_payments.find_one({"square_payment_id": payment_id}, {"_id": 1})
+            if already_recorded:
+                logger.info(f"External payment {payment_id}: Already recorded, skipping")
+                return
+        
         # Get customer info from payment
         customer_id = payment.get('customer_id')
         buyer_email = payment.get('buyer_email_address')
@@ -14894,43 +15738,9 @@ async def try_match_external_payment_to_dues(payment: dict, payment_id: str, amo
         
         logger.info(f"External payment {payment_id}: Trying to match customer '{customer_name}' to member")
         
-        # Try to find matching member by name (fuzzy match)
-        members = await db.members.find({}, {"_id": 0}).to_list(1000)
-        
-        matched_member = None
-        best_score = 0
-        
-        customer_name_lower = customer_name.lower().strip()
-        
-        for member in members:
-            member_name = member.get('name', '').lower().strip()
-            member_handle = member.get('handle', '').lower().strip()
-            
-            # Exact match on name
-            if customer_name_lower == member_name:
-                matched_member = member
-                best_score = 100
-                break
-            
-            # Exact match on handle
-            if customer_name_lower == member_handle:
-                matched_member = member
-                best_score = 100
-                break
-            
-            # Partial match (name contains or is contained)
-            if customer_name_lower in member_name or member_name in customer_name_lower:
-                score = 80
-                if score > best_score:
-                    best_score = score
-                    matched_member = member
-            
-            # Check if handle matches part of customer name
-            if member_handle and (member_handle in customer_name_lower or customer_name_lower in member_handle):
-                score = 75
-                if score > best_score:
-                    best_score = score
-                    matched_member = member
+        # Try to find matching member by name (same matcher as the Square sync endpoints)
+        members = await db.members.find({}, {"_id": 0, "id": 1, "name": 1, "handle": 1}).to_list(1000)
+        matched_member, best_score, _ = MemberMatcher(members).match(customer_name)
         
         if matched_member and best_score >= 75:
             logger.info(f"External payment {payment_id}: Matched to member '{matched_member.get('handle')}' (score: {best_score})")
@@ -14987,6 +15797,7 @@ async def try_match_external_payment_to_dues(payment: dict, payment_id: str, amo
             
     except Exception as e:
         logger.error(f"Error matching external payment to dues: {str(e)}")
+        raise
 
 async def handle_payment_updated(event_data: dict):
     """Handle payment.updated webhook event"""
@@ -15014,6 +15825,7 @@ async def handle_payment_updated(event_data: dict):
                     logger.info(f"Order {local_order['id']} cancelled due to payment {status_value}")
     except Exception as e:
         logger.error(f"Error handling payment.updated: {str(e)}")
+        raise
 
 async def handle_order_updated(event_data: dict):
     """Handle order.updated webhook event"""
@@ -15055,6 +15867,7 @@ async def handle_order_updated(event_data: dict):
             logger.info(f"Order {local_order['id']} status updated to '{new_status}' via order.updated webhook")
     except Exception as e:
         logger.error(f"Error handling order.updated: {str(e)}")
+        raise
 
 async def update_member_dues_from_webhook(dues_info: dict):
     """Update member dues status when payment is confirmed via webhook"""
@@ -15229,6 +16042,7 @@ async def update_member_dues_from_webhook(dues_info: dict):
         
     except Exception as e:
         logger.error(f"Error updating member dues from webhook: {str(e)}")
+        raise
 
 
 async def update_officer_dues_record(member_id: str, month_str: str, status: str, notes: str, updated_by: str):
@@ -15290,60 +16104,225 @@ async def get_square_webhook_info(current_user: dict = Depends(verify_token)):
         }
     }
 
-# ==================== SQUARE SUBSCRIPTION SYNC ENDPOINTS ====================
+# ==================== SQUARE SYNC STATE ====================
+# Persisted watermarks and subscription fingerprints so each sync run only
+# pulls what changed since the previous run.
+
+SQUARE_SYNC_INITIAL_LOOKBACK_DAYS = 365  # First run (or full resync) window
+SQUARE_SYNC_WATERMARK_OVERLAP = timedelta(minutes=10)  # Re-read a little to cover clock skew
+
+
+async def get_square_sync_state(database, state_id: str) -> dict:
+    """Load the persisted state for a sync stream (empty state if never run)"""
+    state = await database.square_sync_state.find_one({"id": state_id}, {"_id": 0})
+    return state or {"id": state_id}
+
+
+async def save_square_sync_state(database, state_id: str, **fields):
+    """Persist fields of a sync stream's state"""
+    fields["updated_at"] = datetime.now(timezone.utc).isoformat()
+    await database.square_sync_state.update_one(
+        {"id": state_id},
+        {"$set": fields},
+        upsert=True
+    )
+
+
+def square_sync_begin_time(state: dict) -> str:
+    """Start of the delta window: last watermark minus overlap, or the initial lookback"""
+    watermark = state.get("begin_time")
+    if watermark:
+        try:
+            begin = datetime.fromisoformat(watermark.replace('Z', '+00:00')) - SQUARE_SYNC_WATERMARK_OVERLAP
+            return begin.isoformat()
+        except ValueError:
+            pass
+    return (datetime.now(timezone.utc) - timedelta(days=SQUARE_SYNC_INITIAL_LOOKBACK_DAYS)).isoformat()
+
+
+def iter_square_payment_pages(begin_time: str, location_id: str = None):
+    """Yield pages of payments updated since begin_time, oldest first.
+
+    Ordering by updated_at lets callers checkpoint the watermark after every
+    page, so an interrupted run resumes where it stopped.
+    """
+    kwargs = {
+        "updated_at_begin_time": begin_time,
+        "sort_field": "UPDATED_AT",
+        "sort_order": "ASC",
+        "limit": 100
+    }
+    if location_id:
+        kwargs["location_id"] = location_id
+    pager = square_client.payments.list(**kwargs)
+    for page in pager.iter_pages():
+        yield page.items or []
+
+
+def square_payment_watermark(payment) -> Optional[str]:
+    """Watermark value for a payment (updated_at, falling back to created_at)"""
+    return getattr(payment, 'updated_at', None) or getattr(payment, 'created_at', None)
+
+
+def pending_square_payment(pending: dict) -> SimpleNamespace:
+    """Payment-like object for a square_sync_pending entry (the fields auto-sync reads)"""
+    return SimpleNamespace(
+        id=pending["payment_id"],
+        customer_id=pending["customer_id"],
+        created_at=pending.get("created_at"),
+        updated_at=pending.get("updated_at"),
+        amount_money=SimpleNamespace(amount=pending.get("amount_cents", 0))
+    )
+
+
+async def save_pending_square_payments(database, payments_by_customer: dict, synced_customers: set) -> int:
+    """Queue payments of customers that weren't synced and drop those that were. Returns the queue size."""
+    synced_ids = [p.id for cid in synced_customers for p in payments_by_customer.get(cid, [])]
+    if synced_ids:
+        await database.square_sync_pending.delete_many({"payment_id": {"$in": synced_ids}})
+    
+    for customer_id, payments in payments_by_customer.items():
+        if customer_id in synced_customers:
+            continue
+        for payment in payments:
+            try:
+                created = datetime.fromisoformat(payment.created_at.replace('Z', '+00:00'))
+            except (AttributeError, ValueError):
+                continue
+            await database.square_sync_pending.update_one(
+                {"payment_id": payment.id},
+                {"$setOnInsert": {
+                    "payment_id": payment.id,
+                    "customer_id": customer_id,
+                    "created_at": payment.created_at,
+                    "updated_at": square_payment_watermark(payment),
+                    "amount_cents": payment.amount_money.amount if payment.amount_money else 0,
+                    "queued_at": datetime.now(timezone.utc).isoformat(),
+                    # Same window a full resync reads; older payments are no longer retried
+                    "purge_at": created + timedelta(days=SQUARE_SYNC_INITIAL_LOOKBACK_DAYS)
+                }},
+                upsert=True
+            )
+    return await database.square_sync_pending.count_documents({})
+
+
+
+async def apply_payment_link_dues(matcher: MemberMatcher, dues_payment: dict) -> Optional[int]:
+    """Mark a payment-link dues payment on the matched member's dues.
+    Returns the number of months marked, or None when no member matches the Square customer.
+    Square errors propagate so the caller can retry the payment.
+    """
+    payment_id = dues_payment["payment_id"]
+    total_amount = dues_payment["amount"]
+    
+    # Get customer name from payment
+    customer_name = None
+    customer_id = dues_payment.get("customer_id")
+    if customer_id:
+        cust_result = square_client.customers.get(customer_id=customer_id)
+        if cust_result and cust_result.customer:
+            c = cust_result.customer
+            given_name = getattr(c, 'given_name', '') or ''
+            family_name = getattr(c, 'family_name', '') or ''
+            customer_name = f"{given_name} {family_name}".strip()
+    
+    if not customer_name:
+        return None
+    
+    # Use fuzzy matching to find member
+    matched_member, score, match_type = matcher.match(customer_name)
+    if not matched_member:
+        return None
+    
+    # Parse payment date
+    payment_date = dues_payment.get("created_at")
+    if payment_date:
+        try:
+            if isinstance(payment_date, str):
+                payment_dt = datetime.fromisoformat(payment_date.replace('Z', '+00:00'))
+            else:
+                payment_dt = payment_date
+        except Exception:
+            payment_dt = datetime.now(timezone.utc)
+    else:
+        payment_dt = datetime.now(timezone.utc)
+    
+    # Calculate months covered
+    if total_amount >= 300 and total_amount <= 330:
+        num_months = 12
+    else:
+        num_months = max(1, int(total_amount / MONTHLY_DUES_AMOUNT))
+    
+    # Mark dues as paid
+    for month_offset in range(num_months):
+        target_month = payment_dt.month - 1 + month_offset
+        target_year = payment_dt.year
+        
+        while target_month >= 12:
+            target_month -= 12
+            target_year += 1
+        
+        # Include amount in payment note
+        payment_note = f"Paid ${total_amount:.2f} via Square on {payment_dt.strftime('%Y-%m-%d')}"
+        if payment_id:
+            payment_note += f" (Trans: {payment_id[:12]}...)"
+        
+        await update_member_dues_with_payment_info(
+            member_id=matched_member["id"],
+            year=target_year,
+            month=target_month,
+            payment_note=payment_note,
+            payment_id=payment_id
+        )
+    
+    # Mark as processed
+    await db.synced_payment_links.update_one(
+        {"payment_id": payment_id},
+        {"$set": {
+            "payment_id": payment_id,
+            "order_id": dues_payment.get("order_id"),
+            "member_id": matched_member["id"],
+            "member_handle": matched_member.get("handle"),
+            "customer_name": customer_name,
+            "amount": total_amount,
+            "months_covered": num_months,
+            "payment_date": payment_dt.isoformat(),
+            "synced_at": datetime.now(timezone.utc).isoformat(),
+            "match_score": score,
+            "match_type": match_type
+        }},
+        upsert=True
+    )
+    return num_months
+
+
+async def save_pending_payment_link(dues_payment: dict):
+    """Queue a dues payment that matched no member; sync-payment-links retries it each run"""
+    try:
+        created = datetime.fromisoformat(dues_payment["created_at"].replace('Z', '+00:00'))
+    except (AttributeError, KeyError, ValueError):
+        created = datetime.now(timezone.utc)
+    await db.payment_link_pending.update_one(
+        {"payment_id": dues_payment["payment_id"]},
+        {"$setOnInsert": {
+            **dues_payment,
+            "queued_at": datetime.now(timezone.utc).isoformat(),
+            # Same window a full resync reads; older payments are no longer retried
+            "purge_at": created + timedelta(days=SQUARE_SYNC_INITIAL_LOOKBACK_DAYS)
+        }},
+        upsert=True
+    )
+
+def square_subscription_fingerprint(sub) -> dict:
+    """Fields that change whenever a subscription is modified or billed"""
+    return {
+        "version": getattr(sub, 'version', None),
+        "charged_through_date": getattr(sub, 'charged_through_date', None),
+        "invoice_count": len(getattr(sub, 'invoice_ids', None) or [])
+    }
 
-# Fuzzy matching helper for Square subscription matching
-def fuzzy_match_member(customer_name: str, members: list, threshold: int = 75) -> tuple:
-    """
-    Match customer name to member using fuzzy string matching.
-    Returns (matched_member, match_score, match_type) or (None, 0, None)
-    """
-    from rapidfuzz import fuzz, process
-    
-    if not customer_name:
-        return None, 0, None
-    
-    customer_name_lower = customer_name.lower().strip()
-    best_match = None
-    best_score = 0
-    match_type = None
-    
-    for member in members:
-        member_name = member.get('name', '').lower().strip()
-        member_handle = member.get('handle', '').lower().strip()
-        
-        # Exact match - highest priority
-        if customer_name_lower == member_name:
-            return member, 100, "exact_name"
-        if customer_name_lower == member_handle:
-            return member, 100, "exact_handle"
-        
-        # Fuzzy match on name
-        if member_name:
-            name_score = fuzz.token_sort_ratio(customer_name_lower, member_name)
-            if name_score > best_score and name_score >= threshold:
-                best_score = name_score
-                best_match = member
-                match_type = "fuzzy_name"
-        
-        # Fuzzy match on handle
-        if member_handle:
-            handle_score = fuzz.token_sort_ratio(customer_name_lower, member_handle)
-            if handle_score > best_score and handle_score >= threshold:
-                best_score = handle_score
-                best_match = member
-                match_type = "fuzzy_handle"
-        
-        # Partial match - check if one contains the other
-        if member_name and (customer_name_lower in member_name or member_name in customer_name_lower):
-            partial_score = 85  # Give partial matches a good score
-            if partial_score > best_score:
-                best_score = partial_score
-                best_match = member
-                match_type = "partial_name"
-    
-    return best_match, best_score, match_type
 
+# ==================== SQUARE SUBSCRIPTION SYNC ENDPOINTS ====================
 
 @api_router.get("/dues/subscriptions")
 async def get_square_subscriptions(current_user: dict = Depends(verify_token)):
@@ -15425,6 +16404,13 @@ async def get_square_subscriptions(current_user: dict = Depends(verify_token)):
         manual_links = await db.member_subscriptions.find({}, {"_id": 0}).to_list(1000)
         manual_link_map = {link.get("square_customer_id"): link for link in manual_links if link.get("square_customer_id")}
         
+        # Score every customer name against every member in one vectorized pass
+        matcher = MemberMatcher(members)
+        fuzzy_matches = dict(zip(
+            customer_map.keys(),
+            matcher.match_many([info.get("name") for info in customer_map.values()])
+        ))
+        
         # Process and match subscriptions
         matched_subs = []
         unmatched_subs = []
@@ -15446,15 +16432,14 @@ async def get_square_subscriptions(current_user: dict = Depends(verify_token)):
             # First check for manual link
             if customer_id in manual_link_map:
                 link = manual_link_map[customer_id]
-                member_id = link.get("member_id")
-                matched_member = next((m for m in members if m.get("id") == member_id), None)
+                matched_member = matcher.get_by_id(link.get("member_id"))
                 if matched_member:
                     match_score = 100
                     match_type = "manual_link"
             
             # If no manual link, use fuzzy matching
             if not matched_member and customer_name:
-                matched_member, match_score, match_type = fuzzy_match_member(customer_name, members)
+                matched_member, match_score, match_type = fuzzy_matches.get(customer_id, (None, 0, None))
             
             sub_data = {
                 "subscription_id": sub_id,
@@ -15487,12 +16472,14 @@ async def get_square_subscriptions(current_user: dict = Depends(verify_token)):
 
 
 @api_router.post("/dues/sync-subscriptions")
-async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token)):
+async def sync_subscriptions_to_dues(full_resync: bool = False, current_user: dict = Depends(verify_token)):
     """Sync active Square subscriptions to member dues using actual payment history.
     Payment amount determines months covered:
     - $30 = 1 month
     - $300-$330 = 12 months (yearly - $300 if annual sub on Jan 1, $330 otherwise)
     Payment date determines which month(s) get marked as paid.
+    Subscriptions whose version, charged-through date and invoice count are
+    unchanged since the last sync are skipped unless full_resync=true.
     """
     if not is_secretary(current_user) and current_user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Only Secretaries can sync subscriptions")
@@ -15529,8 +16516,14 @@ async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token))
         
         month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
         
-        # Batch retrieve customers for subscriptions
-        customer_ids = list(set(sub.customer_id for sub in subscriptions if sub.customer_id))
+        # Last-seen subscription fingerprints from the previous sync
+        sync_state = await get_square_sync_state(db, "subscriptions")
+        seen_versions = {} if full_resync else dict(sync_state.get("subscription_versions") or {})
+        changed_subs = [sub for sub in subscriptions if seen_versions.get(sub.id) != square_subscription_fingerprint(sub)]
+        unchanged_count = len(subscriptions) - len(changed_subs)
+        
+        # Batch retrieve customers for changed subscriptions only
+        customer_ids = list(set(sub.customer_id for sub in changed_subs if sub.customer_id))
         customer_map = {}
         
         for i in range(0, len(customer_ids), 100):
@@ -15564,14 +16557,19 @@ async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token))
         manual_links = await db.member_subscriptions.find({}, {"_id": 0}).to_list(1000)
         manual_link_map = {link.get("square_customer_id"): link.get("member_id") for link in manual_links if link.get("square_customer_id")}
         
+        # Score every customer name against every member in one vectorized pass
+        matcher = MemberMatcher(members)
+        fuzzy_matches = dict(zip(customer_map.keys(), matcher.match_many(list(customer_map.values()))))
+        
         synced_count = 0
         months_marked_paid = 0
         skipped_count = 0
         errors = []
         
-        for sub in subscriptions:
+        for sub in changed_subs:
             customer_id = sub.customer_id
             customer_name = customer_map.get(customer_id)
+            fingerprint = square_subscription_fingerprint(sub)
             
             if not customer_name and customer_id not in manual_link_map:
                 skipped_count += 1
@@ -15581,12 +16579,11 @@ async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token))
             
             # First check manual link
             if customer_id in manual_link_map:
-                member_id = manual_link_map[customer_id]
-                matched_member = next((m for m in members if m.get("id") == member_id), None)
+                matched_member = matcher.get_by_id(manual_link_map[customer_id])
             
             # Then try fuzzy matching
             if not matched_member and customer_name:
-                matched_member, score, match_type = fuzzy_match_member(customer_name, members)
+                matched_member, score, match_type = fuzzy_matches.get(customer_id, (None, 0, None))
             
             if not matched_member:
                 skipped_count += 1
@@ -15596,6 +16593,7 @@ async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token))
             try:
                 invoice_ids = getattr(sub, 'invoice_ids', None) or []
                 payments_processed = set()  # Track processed payments to avoid duplicates
+                invoice_failed = False
                 
                 for invoice_id in invoice_ids:
                     try:
@@ -15695,10 +16693,16 @@ async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token))
                         
                     except Exception as inv_err:
                         logger.warning(f"Failed to process invoice {invoice_id}: {inv_err}")
+                        invoice_failed = True
                         continue
                 
                 synced_count += 1
                 
+                # Remember this version so unchanged subscriptions are skipped next run;
+                # leave it unrecorded if an invoice failed so it is retried
+                if not invoice_failed:
+                    seen_versions[sub.id] = fingerprint
+                
                 # Save/update subscription link
                 await db.member_subscriptions.update_one(
                     {"member_id": matched_member["id"]},
@@ -15716,11 +16720,21 @@ async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token))
             except Exception as e:
                 errors.append(f"Failed to update {matched_member.get('handle')}: {str(e)}")
         
+        # Drop fingerprints of subscriptions that are no longer active
+        active_ids = {sub.id for sub in subscriptions}
+        seen_versions = {sub_id: fp for sub_id, fp in seen_versions.items() if sub_id in active_ids}
+        await save_square_sync_state(
+            db, "subscriptions",
+            subscription_versions=seen_versions,
+            last_run_at=datetime.now(timezone.utc).isoformat()
+        )
+        
         return {
             "message": "Subscription sync complete - based on actual payment history",
             "members_synced": synced_count,
             "months_marked_paid": months_marked_paid,
             "skipped": skipped_count,
+            "unchanged": unchanged_count,
             "total_subscriptions": len(subscriptions),
             "errors": errors if errors else None
         }
@@ -15731,10 +16745,12 @@ async def sync_subscriptions_to_dues(current_user: dict = Depends(verify_token))
 
 
 @api_router.post("/dues/sync-payment-links")
-async def sync_payment_links_to_dues(current_user: dict = Depends(verify_token)):
+async def sync_payment_links_to_dues(full_resync: bool = False, current_user: dict = Depends(verify_token)):
     """Sync dues from Square payments (one-time dues payments via payment links).
     Uses the Payments API and matches customers to members by name using fuzzy matching.
     Looks for orders with dues-related items.
+    Only payments updated since the last run's watermark are fetched; pass
+    full_resync=true to re-scan the initial 12-month window.
     """
     if not is_secretary(current_user) and current_user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Only Secretaries can sync payment links")
@@ -15742,7 +16758,6 @@ async def sync_payment_links_to_dues(current_user: dict = Depends(verify_token))
     if not square_client:
         raise HTTPException(status_code=500, detail="Square client not configured")
     
-    MONTHLY_DUES_AMOUNT = 30
     DUES_ITEM_KEYWORDS = [
         "dues",
         "dues annual",
@@ -15762,191 +16777,151 @@ async def sync_payment_links_to_dues(current_user: dict = Depends(verify_token))
     ]
     
     try:
-        # Get all completed payments from last 12 months
-        start_date = (datetime.now(timezone.utc) - timedelta(days=365)).isoformat()
-        
-        payments_result = square_client.payments.list(
-            begin_time=start_date,
-            limit=200
-        )
-        
-        all_payments = list(payments_result) if payments_result else []
-        
-        # Filter to completed payments only
-        completed_payments = [p for p in all_payments if p.status == "COMPLETED"]
+        state = await get_square_sync_state(db, "payment_links")
+        if full_resync:
+            state = {"id": "payment_links"}
+        begin_time = square_sync_begin_time(state)
         
         # Get all members for matching
         members = await db.members.find({}, {"_id": 0}).to_list(1000)
-        
-        # Track processed payments to avoid duplicates
-        processed_payments = set()
-        existing_synced = await db.synced_payment_links.find({}, {"payment_id": 1}).to_list(10000)
-        for doc in existing_synced:
-            if doc.get("payment_id"):
-                processed_payments.add(doc["payment_id"])
-        
-        # Also exclude payments that are from subscriptions (already synced via subscription sync)
-        subscription_payment_ids = set()
-        sub_links = await db.member_subscriptions.find({}, {"_id": 0}).to_list(1000)
-        # We'll check order_ids instead since subscription payments are tied to subscription orders
+        matcher = MemberMatcher(members)
         
         synced_count = 0
         months_marked_paid = 0
         skipped_no_match = 0
         skipped_not_dues = 0
+        total_checked = 0
         errors = []
         
-        for payment in completed_payments:
+        # Watermark only advances past payments that were handled; a failure
+        # freezes it so the failed payment is retried on the next run.
+        watermark = state.get("begin_time")
+        watermark_frozen = False
+        
+        # Dues payments from earlier runs that matched no member
+        pending_retried = 0
+        async for pending in db.payment_link_pending.find({}, {"_id": 0}):
+            pending_retried += 1
             try:
-                payment_id = payment.id
-                
-                # Skip if already processed
-                if payment_id in processed_payments:
-                    continue
-                
-                order_id = getattr(payment, 'order_id', None)
-                if not order_id:
-                    continue
-                
-                # Get the order to check if it's a dues payment
+                if await db.synced_payment_links.find_one({"payment_id": pending["payment_id"]}, {"_id": 1}):
+                    months_paid = 0
+                else:
+                    months_paid = await apply_payment_link_dues(matcher, pending)
+                    if months_paid is None:
+                        continue
+                    synced_count += 1
+                    months_marked_paid += months_paid
+                await db.payment_link_pending.delete_one({"payment_id": pending["payment_id"]})
+            except Exception as e:
+                errors.append(f"Failed to retry payment {pending['payment_id']}: {str(e)}")
+        
+        for page in iter_square_payment_pages(begin_time):
+            # Only look up already-synced IDs for this page
+            page_ids = [p.id for p in page]
+            existing_synced = await db.synced_payment_links.find(
+                {"payment_id": {"$in": page_ids}},
+                {"_id": 0, "payment_id": 1}
+            ).to_list(len(page_ids))
+            processed_payments = {doc["payment_id"] for doc in existing_synced if doc.get("payment_id")}
+            
+            for payment in page:
+                payment_failed = False
                 try:
-                    order_result = square_client.orders.get(order_id=order_id)
-                    if not order_result or not order_result.order:
+                    payment_id = payment.id
+                    
+                    # Skip payments that are not completed or already processed
+                    if payment.status != "COMPLETED" or payment_id in processed_payments:
                         continue
-                    order = order_result.order
-                except Exception:
-                    continue
-                
-                # Check if this order has dues-related items
-                line_items = getattr(order, 'line_items', None) or []
-                is_dues_order = False
-                total_amount = 0
-                
-                # Debug: Log item names for troubleshooting
-                item_names_found = []
-                
-                for item in line_items:
-                    item_name = (getattr(item, 'name', '') or '').lower()
-                    item_names_found.append(item_name)
-                    if any(keyword in item_name for keyword in DUES_ITEM_KEYWORDS):
-                        is_dues_order = True
-                        if hasattr(item, 'total_money') and item.total_money:
-                            total_amount += item.total_money.amount / 100
-                
-                # Also check order note/reference for dues keywords
-                order_note = (getattr(order, 'reference_id', '') or '').lower()
-                order_source = (getattr(order, 'source', None) or {})
-                if hasattr(order_source, 'name'):
-                    order_source_name = (order_source.name or '').lower()
-                else:
-                    order_source_name = ''
-                
-                if not is_dues_order:
-                    # Check if any dues keyword in order note or source
-                    if any(keyword in order_note for keyword in DUES_ITEM_KEYWORDS):
-                        is_dues_order = True
-                    elif any(keyword in order_source_name for keyword in DUES_ITEM_KEYWORDS):
-                        is_dues_order = True
-                
-                if not is_dues_order:
-                    skipped_not_dues += 1
-                    continue
-                
-                # Use payment amount if we couldn't get it from items
-                if total_amount == 0 and payment.amount_money:
-                    total_amount = payment.amount_money.amount / 100
-                
-                # Get customer name from payment
-                customer_name = None
-                customer_id = getattr(payment, 'customer_id', None)
-                
-                if customer_id:
-                    try:
-                        cust_result = square_client.customers.get(customer_id=customer_id)
-                        if cust_result and cust_result.customer:
-                            c = cust_result.customer
-                            given_name = getattr(c, 'given_name', '') or ''
-                            family_name = getattr(c, 'family_name', '') or ''
-                            customer_name = f"{given_name} {family_name}".strip()
-                    except Exception:
-                        pass
-                
-                if not customer_name:
-                    skipped_no_match += 1
-                    continue
-                
-                # Use fuzzy matching to find member
-                matched_member, score, match_type = fuzzy_match_member(customer_name, members)
-                
-                if not matched_member:
-                    skipped_no_match += 1
-                    continue
-                
-                # Parse payment date
-                payment_date = getattr(payment, 'created_at', None)
-                if payment_date:
+                    
+                    total_checked += 1
+                    
+                    order_id = getattr(payment, 'order_id', None)
+                    if not order_id:
+                        continue
+                    
+                    # Get the order to check if it's a dues payment
                     try:
-                        if isinstance(payment_date, str):
-                            payment_dt = datetime.fromisoformat(payment_date.replace('Z', '+00:00'))
-                        else:
-                            payment_dt = payment_date
-                    except Exception:
-                        payment_dt = datetime.now(timezone.utc)
-                else:
-                    payment_dt = datetime.now(timezone.utc)
-                
-                # Calculate months covered
-                if total_amount >= 300 and total_amount <= 330:
-                    num_months = 12
-                else:
-                    num_months = max(1, int(total_amount / MONTHLY_DUES_AMOUNT))
-                
-                # Mark dues as paid
-                for month_offset in range(num_months):
-                    target_month = payment_dt.month - 1 + month_offset
-                    target_year = payment_dt.year
+                        order_result = square_client.orders.get(order_id=order_id)
+                        if not order_result or not order_result.order:
+                            continue
+                        order = order_result.order
+                    except Exception as e:
+                        # Transient Square error - hold the watermark so the payment is read again
+                        payment_failed = True
+                        errors.append(f"Failed to get order for payment {payment_id}: {str(e)}")
+                        continue
                     
-                    while target_month >= 12:
-                        target_month -= 12
-                        target_year += 1
+                    # Check if this order has dues-related items
+                    line_items = getattr(order, 'line_items', None) or []
+                    is_dues_order = False
+                    total_amount = 0
                     
-                    # Include amount in payment note
-                    payment_note = f"Paid ${total_amount:.2f} via Square on {payment_dt.strftime('%Y-%m-%d')}"
-                    if payment_id:
-                        payment_note += f" (Trans: {payment_id[:12]}...)"
+                    for item in line_items:
+                        item_name = (getattr(item, 'name', '') or '').lower()
+                        if any(keyword in item_name for keyword in DUES_ITEM_KEYWORDS):
+                            is_dues_order = True
+                            if hasattr(item, 'total_money') and item.total_money:
+                                total_amount += item.total_money.amount / 100
                     
-                    await update_member_dues_with_payment_info(
-                        member_id=matched_member["id"],
-                        year=target_year,
-                        month=target_month,
-                        payment_note=payment_note,
-                        payment_id=payment_id
-                    )
-                    months_marked_paid += 1
-                
-                # Mark as processed
-                await db.synced_payment_links.update_one(
-                    {"payment_id": payment_id},
-                    {"$set": {
+                    # Also check order note/reference for dues keywords
+                    order_note = (getattr(order, 'reference_id', '') or '').lower()
+                    order_source = (getattr(order, 'source', None) or {})
+                    if hasattr(order_source, 'name'):
+                        order_source_name = (order_source.name or '').lower()
+                    else:
+                        order_source_name = ''
+                    
+                    if not is_dues_order:
+                        # Check if any dues keyword in order note or source
+                        if any(keyword in order_note for keyword in DUES_ITEM_KEYWORDS):
+                            is_dues_order = True
+                        elif any(keyword in order_source_name for keyword in DUES_ITEM_KEYWORDS):
+                            is_dues_order = True
+                    
+                    if not is_dues_order:
+                        skipped_not_dues += 1
+                        continue
+                    
+                    # Use payment amount if we couldn't get it from items
+                    if total_amount == 0 and payment.amount_money:
+                        total_amount = payment.amount_money.amount / 100
+                    
+                    dues_payment = {
                         "payment_id": payment_id,
                         "order_id": order_id,
-                        "member_id": matched_member["id"],
-                        "member_handle": matched_member.get("handle"),
-                        "customer_name": customer_name,
+                        "customer_id": getattr(payment, 'customer_id', None),
                         "amount": total_amount,
-                        "months_covered": num_months,
-                        "payment_date": payment_dt.isoformat(),
-                        "synced_at": datetime.now(timezone.utc).isoformat(),
-                        "match_score": score,
-                        "match_type": match_type
-                    }},
-                    upsert=True
-                )
-                
-                synced_count += 1
-                
-            except Exception as e:
-                errors.append(f"Failed to process payment {payment.id}: {str(e)}")
+                        "created_at": getattr(payment, 'created_at', None),
+                        "updated_at": square_payment_watermark(payment)
+                    }
+                    months_paid = await apply_payment_link_dues(matcher, dues_payment)
+                    if months_paid is None:
+                        skipped_no_match += 1
+                        # Retried on later runs once the member exists (or is renamed to match)
+                        await save_pending_payment_link(dues_payment)
+                        continue
+                    months_marked_paid += months_paid
+                    
+                    synced_count += 1
+                    
+                except Exception as e:
+                    payment_failed = True
+                    errors.append(f"Failed to process payment {payment.id}: {str(e)}")
+                finally:
+                    if payment_failed:
+                        watermark_frozen = True
+                    elif not watermark_frozen:
+                        watermark = square_payment_watermark(payment) or watermark
+            
+            # Checkpoint after every page so an interrupted run resumes from here
+            await save_square_sync_state(db, "payment_links", begin_time=watermark)
+        
+        await save_square_sync_state(
+            db, "payment_links",
+            begin_time=watermark,
+            last_run_at=datetime.now(timezone.utc).isoformat(),
+            last_window_start=begin_time
+        )
         
         return {
             "message": "Payment link sync complete",
@@ -15954,7 +16929,10 @@ async def sync_payment_links_to_dues(current_user: dict = Depends(verify_token))
             "months_marked_paid": months_marked_paid,
             "skipped_no_member_match": skipped_no_match,
             "skipped_not_dues": skipped_not_dues,
-            "total_payments_checked": len(completed_payments),
+            "total_payments_checked": total_checked,
+            "pending_payments_retried": pending_retried,
+            "payments_pending_match": await db.payment_link_pending.count_documents({}),
+            "window_start": begin_time,
             "errors": errors if errors else None
         }
         
@@ -16801,30 +17779,23 @@ async def get_store_settings_public():
     }
 
 @api_router.get("/stats/experience")
-async def get_total_experience():
+async def get_total_experience(request: Request, response: Response):
     """Public endpoint to get total years of trucking experience across all members"""
-    members = await db.members.find({}, {"experience_start": 1, "_id": 0}).to_list(10000)
-    
-    total_years = 0.0
-    members_with_experience = 0
-    now = datetime.now(timezone.utc)
-    
-    for member in members:
-        exp_start = member.get("experience_start")
-        if exp_start:
-            try:
-                # Parse MM/YYYY format
-                parts = exp_start.split("/")
-                if len(parts) == 2:
-                    month = int(parts[0])
-                    year = int(parts[1])
-                    start_date = datetime(year, month, 1, tzinfo=timezone.utc)
-                    years = (now - start_date).days / 365.25
-                    if years > 0:
-                        total_years += years
-                        members_with_experience += 1
-            except (ValueError, IndexError):
-                continue
+    today = datetime.now(timezone.utc).date()
+    stats = await db.member_stats.find_one({"id": EXPERIENCE_STATS_ID}, {"_id": 0})
+    if not stats or stats.get("as_of") != today.isoformat():
+        stats = await rebuild_experience_stats()
+    
+    members_with_experience = stats.get("member_count", 0)
+    ordinal_sum = stats.get("start_ordinal_sum", 0)
+    total_years = (members_with_experience * today.toordinal() - ordinal_sum) / 365.25
+    
+    # The landing page asks for this on every view; let browsers and proxies reuse it
+    etag = f'"{today.isoformat()}-{members_with_experience}-{ordinal_sum}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     
     return {
         "total_years": round(total_years, 1),
@@ -16899,186 +17870,425 @@ async def update_store_settings(
 
 # ==================== END STORE SETTINGS ENDPOINTS ====================
 
-# ==================== AUTO-SYNC ON LOGIN ====================
+# ==================== SQUARE CATALOG SYNC SERVICE ====================
+# Single-flight, debounced catalog sync. Logins and the manual sync endpoint
+# request a sync; at most one runs at a time, automatic requests inside the
+# minimum interval are dropped, and runs skip work when neither the catalog
+# (Square's latest_time / item versions) nor inventory counts changed.
+
+CATALOG_SYNC_MIN_INTERVAL = timedelta(minutes=15)
+CATALOG_SIZE_INDICATORS = ['S', 'M', 'L', 'XL', '2XL', '3XL', '4XL', '5XL', 'XS', 'XXL', 'LT', 'XLT', '2XLT', '3XLT']
+CATALOG_SIZE_ORDER = {'XS': 0, 'S': 1, 'M': 2, 'L': 3, 'LT': 4, 'XL': 5, 'XLT': 6, '2XL': 7, '2XLT': 8, '3XL': 9, '3XLT': 10, '4XL': 11, '5XL': 12, 'Regular': 0}
+
+catalog_sync_task = None
+catalog_sync_task_forced = False
+catalog_sync_status = {
+    "running": False,
+    "last_requested_at": None,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "last_result": None,
+    "last_error": None,
+    "coalesced_requests": 0,
+    "debounced_requests": 0
+}
+
 
-async def trigger_catalog_sync_background():
-    """Background task to sync Square catalog"""
-    try:
-        if not square_client:
-            logger.warning("Square client not configured, skipping auto-sync")
-            return
+def build_store_product_from_square_item(item, inventory_map: dict) -> Optional[dict]:
+    """Build the synced store_products fields for a Square catalog item (None if not sellable)"""
+    item_data = item.item_data
+    if not item_data:
+        return None
+    
+    name = item_data.name or "Unknown"
+    description = item_data.description or ""
+    
+    # Get ecom image URLs if available
+    image_url = None
+    if item_data.ecom_image_uris and len(item_data.ecom_image_uris) > 0:
+        image_url = item_data.ecom_image_uris[0]
+    
+    variations_list = item_data.variations or []
+    if not variations_list:
+        return None
+    
+    product_variations = []
+    total_inventory = 0
+    min_price = float('inf')
+    has_size_variations = False
+    
+    # Check if this is a shirt/hoodie (allows customization)
+    # Specific exclusions per user requirements:
+    # - Hi-Viz shirts (any Hi-Viz product)
+    # - Member Long Sleeve Shirt - Black (Original Logo Design)
+    # - Ladiez T-Shirt
+    name_lower = name.lower()
+    is_apparel = any(word in name_lower for word in ['shirt', 'hoodie', 'tee', 'jersey', 'long sleeve'])
+    is_excluded = (
+        'hi-viz' in name_lower or 
+        'hiviz' in name_lower or
+        'hi viz' in name_lower or
+        'ladiez' in name_lower or
+        ('member long sleeve' in name_lower and 'original logo design' in name_lower)
+    )
+    allows_customization = is_apparel and not is_excluded
+    
+    for var in variations_list:
+        var_data = var.item_variation_data
+        if not var_data:
+            continue
         
-        # Fetch catalog items from Square
-        result = square_client.catalog.list(types="ITEM")
-        items = list(result)
+        price_money = var_data.price_money
+        if not price_money:
+            continue
         
-        if not items:
-            logger.info("No items found in Square catalog during auto-sync")
-            return
+        price = price_money.amount / 100
+        if price <= 0:
+            continue
         
-        # Collect all variation IDs for inventory fetch
-        all_variation_ids = []
-        for item in items:
-            item_data = item.item_data
-            if not item_data:
-                continue
-            for var in (item_data.variations or []):
-                all_variation_ids.append(var.id)
+        if price < min_price:
+            min_price = price
         
-        # Fetch inventory counts
-        inventory_map = {}
-        if all_variation_ids:
-            try:
-                inv_result = square_client.inventory.batch_get_counts(
-                    catalog_object_ids=all_variation_ids,
-                    location_ids=[SQUARE_LOCATION_ID]
-                )
-                inv_items = list(inv_result)
-                for count in inv_items:
-                    qty = int(count.quantity) if count.quantity else 0
-                    inventory_map[count.catalog_object_id] = qty
-            except Exception as inv_e:
-                logger.warning(f"Could not fetch inventory during auto-sync: {inv_e}")
+        var_name = var_data.name or "Default"
+        var_id = var.id
+        inv_count = inventory_map.get(var_id, 0)
+        total_inventory += inv_count
         
-        synced_count = 0
-        new_count = 0
+        # Check sold_out from location overrides
+        sold_out = inv_count == 0
+        if var_data.location_overrides:
+            for lo in var_data.location_overrides:
+                if lo.sold_out:
+                    sold_out = True
+                    break
         
-        for item in items:
-            item_data = item.item_data
-            if not item_data:
-                continue
-            
-            item_id = item.id
-            name = item_data.name or "Unknown"
-            description = item_data.description or ""
-            
-            # Get ecom image URLs
-            image_url = None
-            if item_data.ecom_image_uris and len(item_data.ecom_image_uris) > 0:
-                image_url = item_data.ecom_image_uris[0]
-            
-            variations_list = item_data.variations or []
-            if not variations_list:
-                continue
-            
-            # Build variations data
-            product_variations = []
-            total_inventory = 0
-            min_price = float('inf')
-            has_size_variations = False
-            
-            name_lower = name.lower()
-            is_apparel = any(word in name_lower for word in ['shirt', 'hoodie', 'tee', 'jersey', 'long sleeve'])
-            is_excluded = (
-                'hi-viz' in name_lower or 
-                'hiviz' in name_lower or
-                'hi viz' in name_lower or
-                'ladiez' in name_lower or
-                ('member long sleeve' in name_lower and 'original logo design' in name_lower)
+        if var_name.upper() in CATALOG_SIZE_INDICATORS or any(s in var_name.upper() for s in CATALOG_SIZE_INDICATORS):
+            has_size_variations = True
+        
+        product_variations.append({
+            "id": str(uuid.uuid4()),
+            "name": var_name,
+            "price": price,
+            "square_variation_id": var_id,
+            "inventory_count": inv_count,
+            "sold_out": sold_out
+        })
+    
+    if min_price == float('inf'):
+        return None
+    
+    # Sort variations by size order
+    product_variations.sort(key=lambda x: CATALOG_SIZE_ORDER.get(x['name'], 99))
+    
+    return {
+        "name": name,
+        "description": description[:500] if description else "",
+        "price": min_price,
+        "image_url": image_url,
+        "variations": product_variations,
+        "has_variations": len(product_variations) > 1 or has_size_variations,
+        "allows_customization": allows_customization,
+        "inventory_count": total_inventory,
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def _fetch_square_inventory(variation_ids: list = None, updated_after: str = None) -> list:
+    """Blocking inventory count fetch (run in a worker thread)"""
+    kwargs = {"location_ids": [SQUARE_LOCATION_ID]}
+    if variation_ids is not None:
+        kwargs["catalog_object_ids"] = variation_ids
+    if updated_after:
+        kwargs["updated_after"] = updated_after
+    return list(square_client.inventory.batch_get_counts(**kwargs))
+
+
+async def run_square_catalog_sync(force: bool = False) -> dict:
+    """Sync Square catalog items into store_products, skipping unchanged items"""
+    state = await get_square_sync_state(db, "catalog")
+    now = datetime.now(timezone.utc)
+    
+    # Another worker process may have synced recently
+    if not force and state.get("last_run_at"):
+        last_run = datetime.fromisoformat(state["last_run_at"])
+        if now - last_run < CATALOG_SYNC_MIN_INTERVAL:
+            return {"status": "debounced", "synced": 0, "new": 0}
+    
+    # Cheap change detection: catalog latest_time and inventory counts updated since last run
+    probe = await asyncio.to_thread(square_client.catalog.search, object_types=["ITEM"], limit=1)
+    catalog_latest_time = getattr(probe, 'latest_time', None)
+    inventory_watermark = state.get("inventory_updated_at")
+    changed_counts = None
+    if inventory_watermark and not force:
+        changed_counts = await asyncio.to_thread(_fetch_square_inventory, None, inventory_watermark)
+    
+    catalog_unchanged = catalog_latest_time and catalog_latest_time == state.get("catalog_latest_time")
+    if not force and catalog_unchanged and changed_counts is not None and not changed_counts:
+        await save_square_sync_state(db, "catalog", last_run_at=now.isoformat())
+        return {"status": "unchanged", "synced": 0, "new": 0}
+    
+    items = await asyncio.to_thread(lambda: list(square_client.catalog.list(types="ITEM")))
+    
+    # Only items whose version changed or whose variations had inventory movement
+    item_versions = {} if force else dict(state.get("item_versions") or {})
+    changed_variation_ids = {c.catalog_object_id for c in (changed_counts or [])}
+    items_to_sync = []
+    for item in items:
+        if not item.item_data:
+            continue
+        variation_ids = [var.id for var in (item.item_data.variations or [])]
+        if (changed_counts is None
+                or item_versions.get(item.id) != item.version
+                or changed_variation_ids.intersection(variation_ids)):
+            items_to_sync.append(item)
+    
+    # Fetch inventory counts for the variations being synced
+    inventory_map = {}
+    inventory_times = [c.calculated_at for c in (changed_counts or []) if c.calculated_at]
+    all_variation_ids = [var.id for item in items_to_sync for var in (item.item_data.variations or [])]
+    if all_variation_ids:
+        try:
+            counts = await asyncio.to_thread(_fetch_square_inventory, all_variation_ids)
+            for count in counts:
+                qty = int(count.quantity) if count.quantity else 0
+                inventory_map[count.catalog_object_id] = qty
+                if count.calculated_at:
+                    inventory_times.append(count.calculated_at)
+        except Exception as inv_e:
+            logger.warning(f"Could not fetch inventory during catalog sync: {inv_e}")
+    
+    synced_count = 0
+    new_count = 0
+    
+    for item in items_to_sync:
+        product_data = build_store_product_from_square_item(item, inventory_map)
+        item_versions[item.id] = item.version
+        if not product_data:
+            continue
+        
+        existing = await db.store_products.find_one({"square_catalog_id": item.id}, {"_id": 0, "id": 1})
+        if existing:
+            # Update existing - preserve admin-controlled settings
+            await db.store_products.update_one(
+                {"square_catalog_id": item.id},
+                {"$set": product_data}
             )
-            allows_customization = is_apparel and not is_excluded
-            
-            for var in variations_list:
-                var_data = var.item_variation_data
-                if not var_data:
-                    continue
-                
-                price_money = var_data.price_money
-                if not price_money:
-                    continue
-                
-                price = price_money.amount / 100
-                if price <= 0:
-                    continue
-                
-                if price < min_price:
-                    min_price = price
-                
-                var_name = var_data.name or "Default"
-                var_id = var.id
-                inv_count = inventory_map.get(var_id, 0)
-                total_inventory += inv_count
-                
-                sold_out = inv_count == 0
-                if var_data.location_overrides:
-                    for lo in var_data.location_overrides:
-                        if lo.sold_out:
-                            sold_out = True
-                            break
-                
-                size_indicators = ['S', 'M', 'L', 'XL', '2XL', '3XL', '4XL', '5XL', 'XS', 'XXL', 'LT', 'XLT', '2XLT', '3XLT']
-                if var_name.upper() in size_indicators or any(s in var_name.upper() for s in size_indicators):
-                    has_size_variations = True
-                
-                product_variations.append({
-                    "id": str(uuid.uuid4()),
-                    "name": var_name,
-                    "price": price,
-                    "square_variation_id": var_id,
-                    "inventory_count": inv_count,
-                    "sold_out": sold_out
-                })
-            
-            if min_price == float('inf'):
-                continue
-            
-            # Sort variations by size order
-            size_order = {'XS': 0, 'S': 1, 'M': 2, 'L': 3, 'LT': 4, 'XL': 5, 'XLT': 6, '2XL': 7, '2XLT': 8, '3XL': 9, '3XLT': 10, '4XL': 11, '5XL': 12, 'Regular': 0}
-            product_variations.sort(key=lambda x: size_order.get(x['name'], 99))
-            
-            # Check if product already exists
-            existing = await db.store_products.find_one({"square_catalog_id": item_id})
-            
-            product_data = {
-                "name": name,
-                "description": description[:500] if description else "",
-                "price": min_price,
-                "image_url": image_url,
-                "variations": product_variations,
-                "has_variations": len(product_variations) > 1 or has_size_variations,
-                "allows_customization": allows_customization,
-                "inventory_count": total_inventory,
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            if existing:
-                # Update existing - preserve admin-controlled settings
-                await db.store_products.update_one(
-                    {"square_catalog_id": item_id},
-                    {"$set": product_data}
-                )
-            else:
-                # New product - default to NOT showing in supporter store
-                product_data.update({
-                    "id": str(uuid.uuid4()),
-                    "category": "merchandise",
-                    "square_catalog_id": item_id,
-                    "is_active": True,
-                    "show_in_supporter_store": False,  # NEW items default to hidden from supporter store
-                    "allows_customization": False,  # Default FALSE, admin must enable
-                    "created_at": datetime.now(timezone.utc).isoformat()
-                })
-                await db.store_products.insert_one(product_data)
-                new_count += 1
-                logger.info(f"Auto-sync: New product added: {name} (hidden from supporter store)")
-            
-            synced_count += 1
+        else:
+            # New product - default to NOT showing in supporter store
+            # Store admins must manually enable each item for supporter store
+            product_data.update({
+                "id": str(uuid.uuid4()),
+                "category": "merchandise",
+                "square_catalog_id": item.id,
+                "is_active": True,
+                "show_in_supporter_store": False,
+                "allows_customization": False,  # Default FALSE, admin must enable
+                "created_at": datetime.now(timezone.utc).isoformat()
+            })
+            await db.store_products.insert_one(product_data)
+            new_count += 1
+            logger.info(f"Catalog sync: New product added: {product_data['name']} (hidden from supporter store)")
         
-        logger.info(f"Auto-sync completed: {synced_count} products synced, {new_count} new products added")
+        synced_count += 1
+    
+    if synced_count:
+        invalidate_store_catalog()
+    
+    # Forget versions of items that no longer exist in Square
+    live_ids = {item.id for item in items}
+    item_versions = {item_id: version for item_id, version in item_versions.items() if item_id in live_ids}
+    
+    await save_square_sync_state(
+        db, "catalog",
+        last_run_at=now.isoformat(),
+        catalog_latest_time=catalog_latest_time,
+        inventory_updated_at=max(inventory_times) if inventory_times else inventory_watermark,
+        item_versions=item_versions
+    )
     
+    logger.info(f"Catalog sync completed: {synced_count} of {len(items)} products synced, {new_count} new products added")
+    return {"status": "synced", "synced": synced_count, "new": new_count, "total_items": len(items)}
+
+
+async def _run_catalog_sync_tracked(force: bool) -> dict:
+    """Run a catalog sync and record its outcome in catalog_sync_status"""
+    catalog_sync_status["running"] = True
+    catalog_sync_status["last_started_at"] = datetime.now(timezone.utc).isoformat()
+    try:
+        result = await run_square_catalog_sync(force=force)
+        catalog_sync_status["last_result"] = result
+        catalog_sync_status["last_error"] = None
+        return result
     except Exception as e:
-        logger.error(f"Auto-sync error: {str(e)}")
+        logger.error(f"Catalog sync error: {str(e)}")
+        catalog_sync_status["last_error"] = str(e)
+        raise
+    finally:
+        catalog_sync_status["running"] = False
+        catalog_sync_status["last_finished_at"] = datetime.now(timezone.utc).isoformat()
+
+
+async def _run_catalog_sync_after(previous: asyncio.Task, force: bool) -> dict:
+    """Run a catalog sync once the in-flight one has finished (whatever its outcome)"""
+    await asyncio.wait([previous])
+    return await _run_catalog_sync_tracked(force)
+
+
+def request_catalog_sync(force: bool = False) -> Optional[asyncio.Task]:
+    """
+    Request a catalog sync.
+    Returns the in-flight task if one is running (single-flight), None if the
+    request was debounced, or a newly started task. A forced request made while
+    an unforced sync is running gets a forced sync queued right after it.
+    """
+    global catalog_sync_task, catalog_sync_task_forced
+    
+    if not square_client:
+        return None
+    
+    catalog_sync_status["last_requested_at"] = datetime.now(timezone.utc).isoformat()
+    
+    in_flight = catalog_sync_task if catalog_sync_task and not catalog_sync_task.done() else None
+    if in_flight and (catalog_sync_task_forced or not force):
+        catalog_sync_status["coalesced_requests"] += 1
+        return in_flight
+    
+    last_finished = catalog_sync_status.get("last_finished_at")
+    if not force and last_finished:
+        if datetime.now(timezone.utc) - datetime.fromisoformat(last_finished) < CATALOG_SYNC_MIN_INTERVAL:
+            catalog_sync_status["debounced_requests"] += 1
+            return None
+    
+    if in_flight:
+        catalog_sync_task = asyncio.create_task(_run_catalog_sync_after(in_flight, force))
+    else:
+        catalog_sync_task = asyncio.create_task(_run_catalog_sync_tracked(force))
+    catalog_sync_task_forced = force
+    # Background requests are fire-and-forget; retrieve the exception so it isn't reported as unhandled
+    catalog_sync_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return catalog_sync_task
 
-# ==================== END AUTO-SYNC ====================
+
+@api_router.get("/store/sync-square-catalog/status")
+async def get_catalog_sync_status(current_user: dict = Depends(verify_token)):
+    """Get the state of the Square catalog sync service (Store admins only)"""
+    if not await can_manage_store_async(current_user):
+        raise HTTPException(status_code=403, detail="Only store admins can view sync status")
+    
+    state = await get_square_sync_state(db, "catalog")
+    return {
+        **catalog_sync_status,
+        "configured": square_client is not None,
+        "min_interval_seconds": int(CATALOG_SYNC_MIN_INTERVAL.total_seconds()),
+        "last_run_at": state.get("last_run_at"),
+        "catalog_latest_time": state.get("catalog_latest_time"),
+        "inventory_updated_at": state.get("inventory_updated_at"),
+        "tracked_items": len(state.get("item_versions") or {})
+    }
+
+# ==================== END SQUARE CATALOG SYNC SERVICE ====================
 
 # ==================== END STORE API ENDPOINTS ====================
 
 
 # ==================== FORMS MANAGEMENT ENDPOINTS ====================
 
+# Forms are kept in the blob store; this directory only holds files uploaded before that
 FORMS_UPLOAD_DIR = Path("/app/uploads/forms")
 FORMS_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+FORM_CONTENT_TYPES = {
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.csv': 'text/csv',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp'
+}
+
+
+async def migrate_inline_blobs() -> dict:
+    """
+    Move legacy file storage into the blob store: base64 template PDFs and
+    receipts stored inside documents, and forms saved on local disk.
+    Safe to re-run; only records without a blob reference are touched, and a
+    record's blob reference is only counted once. Records that fail are logged
+    and left for the next run.
+    """
+    import base64
+    migrated = {"templates": 0, "receipts": 0, "forms": 0, "failed": 0}
+    
+    cursor = db.document_templates.find(
+        {"pdf_data": {"$nin": [None, ""]}},
+        {"_id": 0, "id": 1, "pdf_data": 1, "pdf_filename": 1}
+    )
+    async for template in cursor:
+        try:
+            pdf_bytes = base64.b64decode(template["pdf_data"])
+            key = await blob_store.put(
+                pdf_bytes, "application/pdf", template.get("pdf_filename"),
+                owner=f"document_templates:{template['id']}"
+            )
+            await db.document_templates.update_one(
+                {"id": template["id"]},
+                {"$set": {"pdf_blob": key, "pdf_size": len(pdf_bytes)}, "$unset": {"pdf_data": ""}}
+            )
+            migrated["templates"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to move template {template.get('id')} PDF to blob store: {e}")
+            migrated["failed"] += 1
+    
+    cursor = db.treasury_transactions.find(
+        {"receipt_data": {"$nin": [None, ""]}},
+        {"_id": 0, "id": 1, "receipt_data": 1, "receipt_filename": 1, "receipt_content_type": 1}
+    )
+    async for transaction in cursor:
+        try:
+            content = base64.b64decode(transaction["receipt_data"])
+            key = await blob_store.put(
+                content, transaction.get("receipt_content_type"), transaction.get("receipt_filename"),
+                owner=f"treasury_transactions:{transaction['id']}"
+            )
+            await db.treasury_transactions.update_one(
+                {"id": transaction["id"]},
+                {"$set": {"receipt_blob": key, "receipt_size": len(content)}, "$unset": {"receipt_data": ""}}
+            )
+            migrated["receipts"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to move receipt of transaction {transaction.get('id')} to blob store: {e}")
+            migrated["failed"] += 1
+    
+    cursor = db.forms.find(
+        {"blob_id": {"$exists": False}, "stored_filename": {"$exists": True}},
+        {"_id": 0, "id": 1, "stored_filename": 1, "filename": 1, "file_type": 1}
+    )
+    async for form in cursor:
+        try:
+            file_path = FORMS_UPLOAD_DIR / form["stored_filename"]
+            if not file_path.exists():
+                continue
+            content = file_path.read_bytes()
+            key = await blob_store.put(
+                content, FORM_CONTENT_TYPES.get(form.get("file_type", "").lower()), form.get("filename"),
+                owner=f"forms:{form['id']}"
+            )
+            await db.forms.update_one(
+                {"id": form["id"]},
+                {"$set": {"blob_id": key, "file_size": len(content)}, "$unset": {"stored_filename": ""}}
+            )
+            file_path.unlink(missing_ok=True)
+            migrated["forms"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to move form {form.get('id')} to blob store: {e}")
+            migrated["failed"] += 1
+    
+    return migrated
+
 @api_router.get("/forms")
 async def get_forms(current_user: dict = Depends(verify_token)):
     """Get all available forms"""
@@ -17107,19 +18317,13 @@ async def upload_form(
     if len(file_content) > 10 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
     
-    # Generate unique filename
-    import uuid
     file_ext = Path(file.filename).suffix.lower()
     allowed_extensions = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.csv', '.png', '.jpg', '.jpeg', '.gif', '.webp']
     if file_ext not in allowed_extensions:
         raise HTTPException(status_code=400, detail=f"File type not allowed. Allowed: {', '.join(allowed_extensions)}")
     
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = FORMS_UPLOAD_DIR / unique_filename
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(file_content)
+    # Store file (identical uploads share one copy)
+    blob_id = await blob_store.put(file_content, FORM_CONTENT_TYPES.get(file_ext), file.filename)
     
     # Create form record
     form_id = str(uuid.uuid4())
@@ -17128,7 +18332,7 @@ async def upload_form(
         "name": name or file.filename,
         "description": description or "",
         "filename": file.filename,
-        "stored_filename": unique_filename,
+        "blob_id": blob_id,
         "file_size": len(file_content),
         "file_type": file_ext,
         "uploaded_by": current_user.get("username"),
@@ -17147,27 +18351,26 @@ async def download_form(form_id: str, current_user: dict = Depends(verify_token)
     if not form:
         raise HTTPException(status_code=404, detail="Form not found")
     
+    # Determine content type
+    file_ext = form.get("file_type", "").lower()
+    content_type = FORM_CONTENT_TYPES.get(file_ext, 'application/octet-stream')
+    
+    if form.get("blob_id"):
+        try:
+            body = await blob_store.stream(form["blob_id"])
+        except BlobNotFound:
+            raise HTTPException(status_code=404, detail="Form file not found")
+        from urllib.parse import quote
+        headers = {"Content-Disposition": f"attachment; filename*=utf-8''{quote(form.get('filename', 'download'))}"}
+        if form.get("file_size"):
+            headers["Content-Length"] = str(form["file_size"])
+        return StreamingResponse(body, media_type=content_type, headers=headers)
+    
+    # Legacy form stored on local disk (not yet migrated)
     file_path = FORMS_UPLOAD_DIR / form.get("stored_filename", "")
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Form file not found")
     
-    # Determine content type
-    content_types = {
-        '.pdf': 'application/pdf',
-        '.doc': 'application/msword',
-        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        '.xls': 'application/vnd.ms-excel',
-        '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        '.csv': 'text/csv',
-        '.png': 'image/png',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.gif': 'image/gif',
-        '.webp': 'image/webp'
-    }
-    file_ext = form.get("file_type", "").lower()
-    content_type = content_types.get(file_ext, 'application/octet-stream')
-    
     from fastapi.responses import FileResponse
     return FileResponse(
         path=str(file_path),
@@ -17188,9 +18391,12 @@ async def delete_form(form_id: str, current_user: dict = Depends(verify_token)):
         raise HTTPException(status_code=404, detail="Form not found")
     
     # Delete file
-    file_path = FORMS_UPLOAD_DIR / form.get("stored_filename", "")
-    if file_path.exists():
-        file_path.unlink()
+    if form.get("blob_id"):
+        await blob_store.release(form["blob_id"])
+    elif form.get("stored_filename"):
+        file_path = FORMS_UPLOAD_DIR / form["stored_filename"]
+        if file_path.exists():
+            file_path.unlink()
     
     # Delete record
     await db.forms.delete_one({"id": form_id})
@@ -18032,6 +19238,7 @@ app.add_middleware(
     allow_origins=cors_origins,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["Authorization", "Content-Type", "Accept", "Origin", "X-Requested-With"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],
 )
 
 @app.on_event("shutdown")
@@ -18045,6 +19252,21 @@ async def shutdown_db_client():
         except Exception as e:
             print(f"⚠️ [SCHEDULER] Error stopping scheduler: {str(e)}", file=sys.stderr, flush=True)
     
+    # Stop the Square webhook inbox worker
+    if square_webhook_worker_task and not square_webhook_worker_task.done():
+        square_webhook_worker_task.cancel()
+    if upcoming_events_rollover_task and not upcoming_events_rollover_task.done():
+        upcoming_events_rollover_task.cancel()
+    
+    # Quit pooled SMTP sessions
+    await smtp_mailer.close()
+    await support_mailer.close()
+    await account_mailer.close()
+    await discord_webhooks.close()
+    
+    # Stop PDF worker processes
+    pdf_service.shutdown()
+    
     # Close MongoDB client
     client.close()
 
@@ -0,0 +1,175 @@
+"""
+Mailer Tests
+============
+Tests for pooled SMTP delivery (utils/mailer.py) against the in-process
+LocalSMTPServer - no network or real relay needed.
+
+Features tested:
+- Bulk sends share a few authenticated connections instead of one per message
+- Concurrency cap on open connections
+- Per-message results from send_many
+- Transient failures (4xx, dropped connection) retried on a fresh connection
+- Permanent failures (5xx) raised without retrying
+- Retries give up after max_attempts
+"""
+import asyncio
+import os
+import sys
+from email.message import EmailMessage
+
+# Add backend to path for direct imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosmtplib
+
+from utils.mailer import Mailer, LocalSMTPServer, is_transient_smtp_error
+
+
+def make_message(index: int) -> EmailMessage:
+    message = EmailMessage()
+    message["To"] = f"member{index}@example.com"
+    message["Subject"] = f"Message {index}"
+    message.set_content(f"Body {index}")
+    return message
+
+
+class FlakySMTPServer(LocalSMTPServer):
+    """LocalSMTPServer that answers its first connections with an error greeting and hangs up"""
+    
+    def __init__(self, failures: int, code: int = 421):
+        super().__init__()
+        self.failures = failures
+        self.code = code
+        self.rejected = 0
+    
+    async def _handle(self, reader, writer):
+        if self.rejected < self.failures:
+            self.rejected += 1
+            self.connections += 1
+            writer.write(f"{self.code} Service not available\r\n".encode())
+            await writer.drain()
+            await reader.read()  # let the client hang up
+            writer.close()
+            return
+        await super()._handle(reader, writer)
+
+
+async def run_with_server(server: LocalSMTPServer, scenario, **mailer_options):
+    """Start the server, run scenario(mailer), then close mailer and server"""
+    await server.start()
+    mailer = Mailer(
+        "127.0.0.1", server.port, "user", "pass",
+        from_email="noreply@example.com", backoff=0, timeout=5, **mailer_options
+    )
+    try:
+        return await scenario(mailer)
+    finally:
+        await mailer.close()
+        await server.stop()
+
+
+class TestMailerBatching:
+    """Bulk delivery over persistent connections"""
+    
+    def test_send_many_delivers_every_message(self):
+        """All queued messages arrive with their recipients and sender"""
+        server = LocalSMTPServer()
+        messages = [make_message(i) for i in range(20)]
+        
+        results = asyncio.run(run_with_server(server, lambda m: m.send_many(messages), concurrency=4))
+        
+        assert results == [None] * 20
+        assert len(server.messages) == 20
+        assert sorted(r for m in server.messages for r in m["rcpt_tos"]) == \
+            sorted(f"member{i}@example.com" for i in range(20))
+        assert all(m["mail_from"] == "noreply@example.com" for m in server.messages)
+    
+    def test_connections_are_reused(self):
+        """A bulk run opens at most `concurrency` sessions and logs in once per session"""
+        server = LocalSMTPServer()
+        messages = [make_message(i) for i in range(30)]
+        
+        asyncio.run(run_with_server(server, lambda m: m.send_many(messages), concurrency=3))
+        
+        assert len(server.messages) == 30
+        assert 1 <= server.connections <= 3
+        assert server.logins == server.connections
+    
+    def test_sequential_sends_share_one_connection(self):
+        """Messages sent one after another reuse the idle worker's session"""
+        server = LocalSMTPServer()
+        
+        async def scenario(mailer):
+            for i in range(5):
+                await mailer.send(make_message(i))
+        
+        asyncio.run(run_with_server(server, scenario, concurrency=4))
+        
+        assert len(server.messages) == 5
+        assert server.connections == 1
+    
+    def test_send_many_reports_failures_per_message(self):
+        """A failed message is returned as its exception; the others still go out"""
+        server = FlakySMTPServer(failures=1, code=554)
+        messages = [make_message(i) for i in range(3)]
+        
+        results = asyncio.run(run_with_server(server, lambda m: m.send_many(messages), concurrency=1))
+        
+        failed = [r for r in results if r is not None]
+        assert len(failed) == 1
+        assert isinstance(failed[0], aiosmtplib.SMTPResponseException)
+        assert failed[0].code == 554
+        assert len(server.messages) == 2
+
+
+class TestMailerRetries:
+    """Retry policy for transient and permanent SMTP failures"""
+    
+    def test_transient_failure_is_retried(self):
+        """4xx greetings are retried on a new connection until delivery succeeds"""
+        server = FlakySMTPServer(failures=2, code=421)
+        
+        asyncio.run(run_with_server(server, lambda m: m.send(make_message(0)), max_attempts=3))
+        
+        assert len(server.messages) == 1
+        assert server.connections == 3
+    
+    def test_permanent_failure_is_not_retried(self):
+        """5xx replies fail the send on the first attempt"""
+        server = FlakySMTPServer(failures=5, code=554)
+        
+        async def scenario(mailer):
+            try:
+                await mailer.send(make_message(0))
+            except aiosmtplib.SMTPResponseException as e:
+                return e
+        
+        error = asyncio.run(run_with_server(server, scenario, max_attempts=3))
+        
+        assert error is not None and error.code == 554
+        assert server.connections == 1
+        assert server.messages == []
+    
+    def test_gives_up_after_max_attempts(self):
+        """A failure that stays transient raises once max_attempts is used up"""
+        server = FlakySMTPServer(failures=10, code=421)
+        
+        async def scenario(mailer):
+            try:
+                await mailer.send(make_message(0))
+            except aiosmtplib.SMTPResponseException as e:
+                return e
+        
+        error = asyncio.run(run_with_server(server, scenario, max_attempts=3))
+        
+        assert error is not None and error.code == 421
+        assert server.connections == 3
+        assert server.messages == []
+    
+    def test_error_classification(self):
+        """Connection loss and 4xx are transient; 5xx and bad credentials are not"""
+        assert is_transient_smtp_error(aiosmtplib.SMTPServerDisconnected("gone"))
+        assert is_transient_smtp_error(aiosmtplib.SMTPResponseException(451, "try later"))
+        assert not is_transient_smtp_error(aiosmtplib.SMTPResponseException(550, "no such user"))
+        assert not is_transient_smtp_error(aiosmtplib.SMTPAuthenticationError(454, "auth failed"))
+        assert not is_transient_smtp_error(ValueError("bad message"))
@@ -0,0 +1,167 @@
+"""
+Member Matching Tests
+=====================
+Table-driven parity tests for utils/matching.py MemberMatcher against the
+per-customer fuzzy matcher it replaced (fuzzy_match_member, kept below as
+the reference implementation).
+
+Cases covered:
+- Exact, reordered, misspelled and partial member names
+- Exact and misspelled handles
+- Customer "names" that are emails or phone numbers (Square customers without
+  a given/family name)
+- Ties between members, and no match at all
+"""
+import os
+import sys
+
+import pytest
+
+# Add backend to path for direct imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.matching import MemberMatcher
+
+
+def legacy_fuzzy_match_member(customer_name: str, members: list, threshold: int = 75) -> tuple:
+    """fuzzy_match_member as it was in server.py before MemberMatcher"""
+    from rapidfuzz import fuzz
+    
+    if not customer_name:
+        return None, 0, None
+    
+    customer_name_lower = customer_name.lower().strip()
+    best_match = None
+    best_score = 0
+    match_type = None
+    
+    for member in members:
+        member_name = member.get('name', '').lower().strip()
+        member_handle = member.get('handle', '').lower().strip()
+        
+        # Exact match - highest priority
+        if customer_name_lower == member_name:
+            return member, 100, "exact_name"
+        if customer_name_lower == member_handle:
+            return member, 100, "exact_handle"
+        
+        # Fuzzy match on name
+        if member_name:
+            name_score = fuzz.token_sort_ratio(customer_name_lower, member_name)
+            if name_score > best_score and name_score >= threshold:
+                best_score = name_score
+                best_match = member
+                match_type = "fuzzy_name"
+        
+        # Fuzzy match on handle
+        if member_handle:
+            handle_score = fuzz.token_sort_ratio(customer_name_lower, member_handle)
+            if handle_score > best_score and handle_score >= threshold:
+                best_score = handle_score
+                best_match = member
+                match_type = "fuzzy_handle"
+        
+        # Partial match - check if one contains the other
+        if member_name and (customer_name_lower in member_name or member_name in customer_name_lower):
+            partial_score = 85  # Give partial matches a good score
+            if partial_score > best_score:
+                best_score = partial_score
+                best_match = member
+                match_type = "partial_name"
+    
+    return best_match, best_score, match_type
+
+
+MEMBERS = [
+    {"id": "m1", "name": "John Smith", "handle": "Tex", "email": "john.smith@example.com", "phone": "(512) 555-0101"},
+    {"id": "m2", "name": "Robert Johnson", "handle": "Bobby J", "email": "rjohnson@example.com", "phone": "512-555-0102"},
+    {"id": "m3", "name": "Maria Garcia", "handle": "Lonestar", "email": "maria@example.com", "phone": "5125550103"},
+    {"id": "m4", "name": "Jon Smith", "handle": "Smitty", "email": "jon.smith@example.com", "phone": "512.555.0104"},
+    {"id": "m5", "name": "Ann Lee", "handle": "", "email": "ann.lee@example.com", "phone": ""},
+    {"id": "m6", "name": "", "handle": "Ghost", "email": "", "phone": "+1 512 555 0106"},
+    {"id": "m7", "name": "William O'Brien", "handle": "5125550107", "email": "bill@example.com", "phone": "512-555-0107"},
+    {"id": "m8", "name": "Lee", "handle": "Shorty", "email": "lee@example.com", "phone": ""},
+]
+
+CUSTOMER_NAMES = [
+    # Names
+    ("exact name", "John Smith"),
+    ("exact name, other case and padding", "  maria GARCIA "),
+    ("reordered name", "Smith John"),
+    ("misspelled name", "Robert Jonson"),
+    ("misspelled name close to two members", "Jon Smyth"),
+    ("name with middle initial", "Maria L Garcia"),
+    ("name contained in customer name", "Ann Lee Jr"),
+    ("customer name contained in member name", "O'Brien"),
+    ("name of one member contained in another", "Lee"),
+    ("surname contained in several members", "Smith"),
+    ("punctuation dropped", "William OBrien"),
+    ("unrelated name", "Carlos Mendez"),
+    ("empty name", ""),
+    # Handles
+    ("exact handle", "Lonestar"),
+    ("handle of member without a name", "ghost"),
+    ("misspelled handle", "Lonestarr"),
+    ("handle with space", "bobby j"),
+    # Emails used as the customer name
+    ("email of a member", "john.smith@example.com"),
+    ("email local part only", "rjohnson"),
+    ("email containing a member name", "ann lee@example.com"),
+    ("unknown email", "someone@else.org"),
+    # Phone numbers used as the customer name
+    ("phone matching a numeric handle", "5125550107"),
+    ("formatted phone of numeric handle", "512-555-0107"),
+    ("phone of a member", "(512) 555-0101"),
+    ("unknown phone", "+44 20 7946 0958"),
+]
+
+
+def summarize(result: tuple) -> tuple:
+    member, score, match_type = result
+    return (member["id"] if member else None, float(score), match_type)
+
+
+class TestMemberMatcherParity:
+    """MemberMatcher returns what the per-customer matcher returned"""
+    
+    @pytest.fixture(scope="class")
+    def matcher(self):
+        return MemberMatcher(MEMBERS)
+    
+    @pytest.mark.parametrize("customer_name", [name for _, name in CUSTOMER_NAMES], ids=[case for case, _ in CUSTOMER_NAMES])
+    def test_match_same_as_legacy(self, matcher, customer_name):
+        """Same member, score and match type for a single customer name"""
+        assert summarize(matcher.match(customer_name)) == summarize(legacy_fuzzy_match_member(customer_name, MEMBERS))
+    
+    def test_match_many_same_as_legacy(self, matcher):
+        """A batch gives the same results, in order, as matching one name at a time"""
+        names = [name for _, name in CUSTOMER_NAMES]
+        batch = [summarize(result) for result in matcher.match_many(names)]
+        assert batch == [summarize(legacy_fuzzy_match_member(name, MEMBERS)) for name in names]
+    
+    @pytest.mark.parametrize("threshold", [60, 90])
+    def test_threshold_same_as_legacy(self, threshold):
+        """The fuzzy threshold cuts off the same candidates"""
+        matcher = MemberMatcher(MEMBERS, threshold=threshold)
+        for _, name in CUSTOMER_NAMES:
+            assert summarize(matcher.match(name)) == summarize(legacy_fuzzy_match_member(name, MEMBERS, threshold))
+    
+    def test_member_order_breaks_ties(self):
+        """Members with equal scores resolve to the first one listed, as before"""
+        twins = [
+            {"id": "a", "name": "Sam Hill", "handle": "Sammy"},
+            {"id": "b", "name": "Sam Hill", "handle": "Sam"},
+            {"id": "c", "name": "Sam Hall", "handle": "Sam Hill"},
+        ]
+        for name in ["Sam Hill", "sam", "Sam Hil", "Hill Sam", "Sam"]:
+            assert summarize(MemberMatcher(twins).match(name)) == summarize(legacy_fuzzy_match_member(name, twins))
+    
+    def test_no_members(self):
+        """An empty member list never matches"""
+        assert MemberMatcher([]).match("John Smith") == (None, 0, None)
+        assert legacy_fuzzy_match_member("John Smith", []) == (None, 0, None)
+    
+    def test_get_by_id(self, matcher):
+        """Manual links resolve by member id"""
+        assert matcher.get_by_id("m3")["name"] == "Maria Garcia"
+        assert matcher.get_by_id("missing") is None
@@ -0,0 +1,152 @@
+"""
+PDF Service Tests
+=================
+Tests for the PDF worker pool (utils/pdf_service.py) using small top-level job
+functions - the workers are spawned, so jobs must be importable from this module.
+
+Features tested:
+- Jobs run in worker processes and return their results
+- A job over the timeout raises PDFServiceTimeout
+- Jobs running next to a timed-out job still finish, and the runaway worker is
+  killed afterwards
+- A crashed worker raises PDFServiceError (not a timeout)
+- The service keeps working after a timeout or a crash
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add backend to path for direct imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_service import PDFService, PDFServiceError, PDFServiceTimeout
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+def sleep_then_return(seconds: float, value):
+    time.sleep(seconds)
+    return value
+
+
+def crash():
+    os._exit(1)
+
+
+@pytest.fixture
+def service():
+    pdf_service = PDFService(max_workers=2, timeout=30, memory_limit_mb=None)
+    yield pdf_service
+    pdf_service.shutdown()
+
+
+def wait_until_dead(pid: int, timeout: float = 5) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestPDFServiceJobs:
+    """Normal job execution"""
+    
+    def test_run_returns_result(self, service):
+        """A job runs in another process and returns its value"""
+        async def scenario():
+            return await service.run(square, 7), await service.run(worker_pid)
+        
+        result, pid = asyncio.run(scenario())
+        
+        assert result == 49
+        assert pid != os.getpid()
+    
+    def test_concurrent_jobs(self, service):
+        """More jobs than workers all complete"""
+        async def scenario():
+            return await asyncio.gather(*(service.run(square, i) for i in range(10)))
+        
+        assert asyncio.run(scenario()) == [i * i for i in range(10)]
+
+
+class TestPDFServiceTimeout:
+    """Jobs that run past the timeout"""
+    
+    def test_timeout_raises(self, service):
+        """A job over its timeout raises PDFServiceTimeout"""
+        async def scenario():
+            await service.run(sleep_then_return, 30, None, timeout=0.5)
+        
+        started = time.time()
+        with pytest.raises(PDFServiceTimeout):
+            asyncio.run(scenario())
+        assert time.time() - started < 10
+    
+    def test_timeout_spares_running_jobs(self, service):
+        """A job sharing the pool with a timed-out one still returns its result"""
+        async def scenario():
+            slow = asyncio.create_task(service.run(sleep_then_return, 2, "done"))
+            await asyncio.sleep(0.5)  # both jobs on the same pool
+            with pytest.raises(PDFServiceTimeout):
+                await service.run(sleep_then_return, 30, None, timeout=0.5)
+            return await slow
+        
+        assert asyncio.run(scenario()) == "done"
+    
+    def test_runaway_worker_killed_after_timeout(self, service):
+        """The worker stuck on a timed-out job is terminated once its pool is idle"""
+        async def scenario():
+            await service.run(square, 1)
+            pool = service._pool
+            pids = [p.pid for p in pool._processes.values()]
+            with pytest.raises(PDFServiceTimeout):
+                await service.run(sleep_then_return, 30, None, timeout=0.5)
+            return pool, pids
+        
+        pool, pids = asyncio.run(scenario())
+        
+        assert service._pool is not pool
+        assert all(wait_until_dead(pid) for pid in pids)
+    
+    def test_recovers_after_timeout(self, service):
+        """New jobs run on a fresh pool after a timeout"""
+        async def scenario():
+            with pytest.raises(PDFServiceTimeout):
+                await service.run(sleep_then_return, 30, None, timeout=0.5)
+            return await service.run(square, 5)
+        
+        assert asyncio.run(scenario()) == 25
+
+
+class TestPDFServiceCrash:
+    """Workers that die while running a job"""
+    
+    def test_crash_raises_service_error(self, service):
+        """A worker that exits abruptly fails the job with PDFServiceError, not a timeout"""
+        async def scenario():
+            await service.run(crash)
+        
+        with pytest.raises(PDFServiceError) as error:
+            asyncio.run(scenario())
+        assert not isinstance(error.value, PDFServiceTimeout)
+    
+    def test_recovers_after_crash(self, service):
+        """New jobs run on a fresh pool after a crash"""
+        async def scenario():
+            with pytest.raises(PDFServiceError):
+                await service.run(crash)
+            return await service.run(square, 6)
+        
+        assert asyncio.run(scenario()) == 36
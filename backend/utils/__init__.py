@@ -2,3 +2,9 @@
 from .formatting import format_phone_number
 from .sanitization import sanitize_for_regex, sanitize_string_input
 from .hashing import hash_for_duplicate_detection
+from .matching import MemberMatcher
+from .mailer import Mailer, LocalSMTPServer
+from .discord_webhooks import DiscordWebhookClient
+from .notification_hub import NotificationHub
+from .blob_store import BlobStore, BlobNotFound
+from .pdf_service import PDFService
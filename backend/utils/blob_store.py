@@ -0,0 +1,149 @@
+# Content-addressed binary storage on GridFS
+import hashlib
+from typing import AsyncIterator, Optional
+
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo import ReturnDocument
+
+
+class BlobNotFound(KeyError):
+    """No blob is stored under the requested key"""
+
+
+class BlobStore:
+    """
+    Binary files stored in GridFS under their SHA-256 hex digest.
+
+    Identical content is stored once: `put` on existing content only bumps a
+    reference count kept in the file's metadata, and `release` deletes the file
+    once nothing references it. Documents keep the digest instead of a base64
+    copy of the bytes; reads stream the stored chunks as-is.
+
+    Two concurrent first uploads of the same content may both be stored; each
+    copy keeps its own reference count, so this only costs space, never data.
+    """
+
+    def __init__(self, database, bucket_name: str = "blobs", chunk_size: int = 255 * 1024):
+        self.database = database
+        self.bucket_name = bucket_name
+        self.chunk_size = chunk_size
+        self._bucket = None
+
+    @property
+    def files(self):
+        return self.database[f"{self.bucket_name}.files"]
+
+    @property
+    def chunks(self):
+        return self.database[f"{self.bucket_name}.chunks"]
+
+    @property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        if self._bucket is None:
+            self._bucket = AsyncIOMotorGridFSBucket(
+                self.database, bucket_name=self.bucket_name, chunk_size_bytes=self.chunk_size
+            )
+        return self._bucket
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    async def put(
+        self,
+        data: bytes,
+        content_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> str:
+        """
+        Store `data` (or add a reference to an identical blob) and return its key.
+
+        With an `owner` id the reference is added at most once per owner, so a
+        caller that crashed before saving the key can safely call `put` again.
+        """
+        key = self.key_for(data)
+        query = {"filename": key}
+        update = {"$inc": {"metadata.refs": 1}}
+        if owner:
+            query["metadata.owners"] = {"$ne": owner}
+            update["$addToSet"] = {"metadata.owners": owner}
+        existing = await self.files.update_one(query, update)
+        if existing.matched_count:
+            return key
+        if owner and await self.files.find_one({"filename": key, "metadata.owners": owner}, {"_id": 1}):
+            return key
+        metadata = {
+            "sha256": key,
+            "content_type": content_type,
+            "original_filename": filename,
+            "refs": 1,
+        }
+        if owner:
+            metadata["owners"] = [owner]
+        await self.bucket.upload_from_stream(key, data, metadata=metadata)
+        return key
+
+    async def release(self, key: Optional[str]):
+        """
+        Drop one reference to a blob, deleting it when none remain. The file is
+        only deleted if its count is still zero at that moment, so a concurrent
+        `put` that re-references the content keeps it.
+        """
+        if not key:
+            return
+        file_doc = await self.files.find_one_and_update(
+            {"filename": key},
+            {"$inc": {"metadata.refs": -1}},
+            projection={"_id": 1, "metadata.refs": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not file_doc or (file_doc.get("metadata") or {}).get("refs", 0) > 0:
+            return
+        deleted = await self.files.find_one_and_delete(
+            {"_id": file_doc["_id"], "metadata.refs": {"$lte": 0}},
+            projection={"_id": 1},
+        )
+        if deleted:
+            await self.chunks.delete_many({"files_id": deleted["_id"]})
+
+    async def info(self, key: str) -> Optional[dict]:
+        """Size, content type and upload time of a blob, or None"""
+        file_doc = await self.files.find_one({"filename": key}, {"length": 1, "uploadDate": 1, "metadata": 1})
+        if not file_doc:
+            return None
+        metadata = file_doc.get("metadata") or {}
+        return {
+            "key": key,
+            "length": file_doc.get("length", 0),
+            "content_type": metadata.get("content_type"),
+            "uploaded_at": file_doc.get("uploadDate"),
+        }
+
+    async def get(self, key: str) -> bytes:
+        """Whole blob in memory (for PDF processing and the like)"""
+        grid_out = await self._open(key)
+        return await grid_out.read()
+
+    async def stream(self, key: str) -> AsyncIterator[bytes]:
+        """
+        Open a blob and return an iterator over its stored chunks, suitable for a
+        StreamingResponse. Raises BlobNotFound before any bytes are sent.
+        """
+        grid_out = await self._open(key)
+
+        async def chunks():
+            while True:
+                chunk = await grid_out.readchunk()
+                if not chunk:
+                    break
+                yield chunk
+
+        return chunks()
+
+    async def _open(self, key: str):
+        try:
+            return await self.bucket.open_download_stream_by_name(key)
+        except NoFile as e:
+            raise BlobNotFound(key) from e
@@ -0,0 +1,161 @@
+# Shared async Discord webhook client
+import asyncio
+import logging
+import time
+import weakref
+from typing import List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Discord message limits
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+def embed_length(embed: dict) -> int:
+    """Characters Discord counts toward the 6000-per-message embed limit"""
+    total = len(embed.get("title") or "") + len(embed.get("description") or "")
+    total += len((embed.get("footer") or {}).get("text") or "")
+    total += len((embed.get("author") or {}).get("name") or "")
+    for field in embed.get("fields") or []:
+        total += len(field.get("name") or "") + len(field.get("value") or "")
+    return total
+
+
+def chunk_embeds(embeds: List[dict]) -> List[List[dict]]:
+    """Split embeds into groups that fit into single webhook messages"""
+    chunks, current, current_chars = [], [], 0
+    for embed in embeds:
+        size = embed_length(embed)
+        if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or current_chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+            chunks.append(current)
+            current, current_chars = [], 0
+        current.append(embed)
+        current_chars += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class _Bucket:
+    """Rate-limit state for one webhook, from Discord's X-RateLimit-* headers"""
+
+    def __init__(self):
+        self.remaining = None
+        self.reset_at = 0.0
+
+    def delay(self) -> float:
+        if self.remaining == 0:
+            return max(0.0, self.reset_at - time.monotonic())
+        return 0.0
+
+    def update(self, headers: httpx.Headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset_after is not None:
+            self.reset_at = time.monotonic() + float(reset_after)
+
+
+class DiscordWebhookClient:
+    """
+    Keep-alive HTTP client for Discord webhooks.
+
+    Each webhook URL gets its own rate-limit bucket: requests to one webhook are
+    serialized, wait out an exhausted X-RateLimit-Remaining window and retry 429
+    responses after the advertised retry_after. Different webhooks post in parallel.
+
+    The HTTP connection pool is tracked per event loop because scheduler jobs run
+    in their own short-lived loops; call `close()` before such a loop shuts down.
+    """
+
+    def __init__(self, max_connections: int = 10, timeout: float = 15, max_attempts: int = 3):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self._buckets = {}
+        self._clients = weakref.WeakKeyDictionary()
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+            self._clients[loop] = client
+        return client
+
+    def _lock(self, webhook_url: str) -> asyncio.Lock:
+        locks = self._locks.setdefault(asyncio.get_running_loop(), {})
+        if webhook_url not in locks:
+            locks[webhook_url] = asyncio.Lock()
+        return locks[webhook_url]
+
+    async def post(self, webhook_url: str, payload: dict) -> httpx.Response:
+        """POST one payload, honoring the webhook's rate limit. Returns the final response."""
+        bucket = self._buckets.setdefault(webhook_url, _Bucket())
+        client = self._client()
+        async with self._lock(webhook_url):
+            response = None
+            for attempt in range(1, self.max_attempts + 1):
+                delay = bucket.delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                response = await client.post(webhook_url, json=payload)
+                bucket.update(response.headers)
+                if response.status_code != 429:
+                    return response
+
+                retry_after = None
+                try:
+                    retry_after = float(response.json().get("retry_after"))
+                except Exception:
+                    retry_after = float(response.headers.get("Retry-After", 1))
+                logger.warning(f"Discord webhook rate limited; retrying in {retry_after:.2f}s (attempt {attempt})")
+                bucket.remaining = 0
+                bucket.reset_at = time.monotonic() + retry_after
+            return response
+
+    async def post_embeds(self, webhook_url: str, embeds: List[dict], content: Optional[str] = None) -> bool:
+        """
+        Post embeds in as few messages as Discord allows (10 embeds / 6000 chars each).
+        `content` is sent with the first message only. Returns True if every message was accepted.
+        """
+        return all(await self.post_embeds_each(webhook_url, embeds, content))
+
+    async def post_embeds_each(self, webhook_url: str, embeds: List[dict], content: Optional[str] = None) -> List[bool]:
+        """
+        Post embeds like `post_embeds`, reporting per embed (in input order) whether
+        the message carrying it was accepted, so callers can retry only failed ones.
+        """
+        results = []
+        for index, chunk in enumerate(chunk_embeds(embeds)):
+            payload = {"embeds": chunk}
+            if content and index == 0:
+                payload["content"] = content
+            try:
+                response = await self.post(webhook_url, payload)
+            except httpx.HTTPError as e:
+                # Only this chunk failed; the ones already posted stay reported as sent
+                logger.error(f"Discord webhook post failed: {e}")
+                results.extend([False] * len(chunk))
+                continue
+            accepted = response.status_code in (200, 204)
+            if not accepted:
+                logger.error(f"Discord webhook post failed: {response.status_code} - {response.text}")
+            results.extend([accepted] * len(chunk))
+        return results
+
+    async def close(self):
+        """Close this loop's HTTP connection pool"""
+        loop = asyncio.get_running_loop()
+        self._locks.pop(loop, None)
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,324 @@
+# Pooled async SMTP delivery
+import asyncio
+import logging
+import time
+import weakref
+from email.message import Message
+from typing import List, Optional
+
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying on a fresh connection (dropped links, timeouts, 4xx replies)
+TRANSIENT_SMTP_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """True if the send may succeed when retried (connection loss or a 4xx reply)"""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(400 <= r.code < 500 for r in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return 400 <= error.code < 500
+    return isinstance(error, TRANSIENT_SMTP_ERRORS)
+
+
+class _LoopState:
+    """Queue, workers and open connections belonging to one event loop"""
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.workers = set()
+        self.idle = 0  # workers waiting for a message
+        self.clients = set()
+
+
+class Mailer:
+    """
+    Outbound mail queue backed by persistent, authenticated SMTP connections.
+
+    Messages are queued and delivered by at most `concurrency` workers. Each worker
+    keeps its connection open between messages, so a bulk run reuses the same
+    session instead of doing a TLS handshake and login per recipient. A worker
+    closes its connection and exits after `idle_timeout` seconds without work.
+
+    Transient failures (dropped connection, timeouts, 4xx replies) are retried on a
+    fresh connection with exponential backoff; permanent failures raise at once.
+
+    Scheduler jobs run their own short-lived event loops, so queue and connections
+    are tracked per loop. Call `close()` before a loop is shut down.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        from_email: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 30,
+        idle_timeout: float = 30,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_email = from_email
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._states = weakref.WeakKeyDictionary()
+
+    # ---- public API ----
+
+    async def send(self, message: Message, recipients: Optional[List[str]] = None):
+        """
+        Queue a message and wait until it has been delivered.
+        Raises the last SMTP error if delivery ultimately fails.
+        """
+        if self.from_email and not message.get("From"):
+            message["From"] = self.from_email
+
+        state = self._state()
+        future = asyncio.get_running_loop().create_future()
+        await state.queue.put((message, recipients, future))
+        self._ensure_workers(state)
+        return await future
+
+    async def send_many(self, messages: List[Message]) -> list:
+        """
+        Queue several messages at once. Returns one entry per message:
+        None on success, otherwise the exception that stopped delivery.
+        """
+        results = await asyncio.gather(*(self.send(m) for m in messages), return_exceptions=True)
+        return [r if isinstance(r, BaseException) else None for r in results]
+
+    async def close(self):
+        """Stop this loop's workers and quit their SMTP sessions"""
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if not state:
+            return
+        for worker in list(state.workers):
+            worker.cancel()
+        await asyncio.gather(*state.workers, return_exceptions=True)
+        for client in list(state.clients):
+            await self._disconnect(state, client)
+        while not state.queue.empty():
+            _, _, future = state.queue.get_nowait()
+            if not future.done():
+                future.set_exception(aiosmtplib.SMTPServerDisconnected("Mailer closed"))
+
+    # ---- internals ----
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = _LoopState()
+            self._states[loop] = state
+        return state
+
+    def _ensure_workers(self, state: _LoopState):
+        # Idle workers pick up queued messages on their open connection before a new one is started
+        while len(state.workers) < self.concurrency and state.queue.qsize() > state.idle:
+            worker = asyncio.create_task(self._worker(state))
+            state.workers.add(worker)
+            state.idle += 1
+            worker.add_done_callback(state.workers.discard)
+
+    async def _connect(self, state: _LoopState) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        state.clients.add(client)
+        if self.username and self.password:
+            try:
+                await client.login(self.username, self.password)
+            except Exception:
+                await self._disconnect(state, client)
+                raise
+        return client
+
+    async def _disconnect(self, state: _LoopState, client: Optional[aiosmtplib.SMTP]):
+        if client is None:
+            return
+        state.clients.discard(client)
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def _worker(self, state: _LoopState):
+        client = None
+        idle = True
+        try:
+            while True:
+                try:
+                    message, recipients, future = await asyncio.wait_for(
+                        state.queue.get(), timeout=self.idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    if state.queue.empty():
+                        return
+                    continue
+                state.idle -= 1
+                idle = False
+                if not future.done():
+                    client = await self._deliver(state, client, message, recipients, future)
+                state.idle += 1
+                idle = True
+        finally:
+            if idle:
+                state.idle -= 1
+            await self._disconnect(state, client)
+
+    async def _deliver(self, state, client, message, recipients, future):
+        """Send one message with retries; returns the connection to keep using"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if client is None or not client.is_connected:
+                    await self._disconnect(state, client)
+                    client = await self._connect(state)
+                await client.send_message(message, recipients=recipients)
+                if not future.done():
+                    future.set_result(None)
+                return client
+            except Exception as e:
+                await self._disconnect(state, client)
+                client = None
+                if attempt >= self.max_attempts or not is_transient_smtp_error(e):
+                    if not future.done():
+                        future.set_exception(e)
+                    return None
+                delay = self.backoff * (2 ** (attempt - 1))
+                logger.warning(f"SMTP send attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        return client
+
+
+class LocalSMTPServer:
+    """
+    Minimal in-process SMTP server that records what it receives.
+    Stand-in for a real relay when testing; accepts any AUTH credentials.
+
+        server = LocalSMTPServer()
+        await server.start()
+        mailer = Mailer("127.0.0.1", server.port, "user", "pass")
+        ...
+        await server.stop()
+    """
+
+    def __init__(self, hostname: str = "127.0.0.1", port: int = 0):
+        self.hostname = hostname
+        self.port = port
+        self.messages = []  # dicts with mail_from, rcpt_tos, data, received_at
+        self.connections = 0
+        self.logins = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.hostname, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write((line + "\r\n").encode())
+            await writer.drain()
+
+        mail_from, rcpt_tos = None, []
+        await reply("220 localhost LocalSMTPServer ready")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode(errors="replace").rstrip("\r\n")
+                verb = line.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250-AUTH PLAIN LOGIN")
+                    await reply("250 8BITMIME")
+                elif verb == "HELO":
+                    await reply("250 localhost")
+                elif verb == "AUTH":
+                    parts = line.split()
+                    if len(parts) > 1 and parts[1].upper() == "LOGIN":
+                        # Base64 "Username:" / "Password:" prompts; username may come inline
+                        prompts = ["UGFzc3dvcmQ6"] if len(parts) > 2 else ["VXNlcm5hbWU6", "UGFzc3dvcmQ6"]
+                        for prompt in prompts:
+                            await reply(f"334 {prompt}")
+                            await reader.readline()
+                    elif len(parts) == 2:
+                        await reply("334 ")
+                        await reader.readline()
+                    self.logins += 1
+                    await reply("235 Authentication successful")
+                elif verb == "MAIL":
+                    mail_from = line.split(":", 1)[1].strip().strip("<>").split(">")[0]
+                    rcpt_tos = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    rcpt_tos.append(line.split(":", 1)[1].strip().strip("<>").split(">")[0])
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        data_line = await reader.readline()
+                        if not data_line or data_line in (b".\r\n", b".\n"):
+                            break
+                        if data_line.startswith(b".."):
+                            data_line = data_line[1:]
+                        lines.append(data_line)
+                    self.messages.append({
+                        "mail_from": mail_from,
+                        "rcpt_tos": rcpt_tos,
+                        "data": b"".join(lines),
+                        "received_at": time.time(),
+                    })
+                    mail_from, rcpt_tos = None, []
+                    await reply("250 OK: queued")
+                elif verb in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
@@ -0,0 +1,97 @@
+# Member name matching utilities for Square customer reconciliation
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# Score given when one name contains the other
+PARTIAL_MATCH_SCORE = 85
+
+
+class MemberMatcher:
+    """
+    Pre-normalized index of member names and handles.
+    Build once per sync and reuse it for every customer name.
+
+    Matching rules (in priority order):
+    - Exact name or handle match (hash map lookup) scores 100
+    - Best fuzzy token_sort_ratio on name or handle at or above the threshold
+    - Name containment in either direction scores 85
+    Ties go to the member that appears first in the list, name before handle.
+    """
+
+    def __init__(self, members: list, threshold: int = 75):
+        self.members = members
+        self.threshold = threshold
+        self._names = [(m.get('name') or '').lower().strip() for m in members]
+        self._handles = [(m.get('handle') or '').lower().strip() for m in members]
+        self._by_id = {m.get('id'): m for m in members if m.get('id')}
+
+        # Exact-match fast path - first member in list order wins
+        self._exact = {}
+        for index, (name, handle) in enumerate(zip(self._names, self._handles)):
+            if name and name not in self._exact:
+                self._exact[name] = (index, "exact_name")
+            if handle and handle not in self._exact:
+                self._exact[handle] = (index, "exact_handle")
+
+    def get_by_id(self, member_id: str):
+        """Return the member with the given id, or None"""
+        return self._by_id.get(member_id)
+
+    def match(self, customer_name: str) -> tuple:
+        """
+        Match one customer name.
+        Returns (matched_member, match_score, match_type) or (None, 0, None)
+        """
+        return self.match_many([customer_name])[0]
+
+    def match_many(self, customer_names: list) -> list:
+        """
+        Match a batch of customer names with one vectorized scoring pass.
+        Returns a list of (matched_member, match_score, match_type) tuples.
+        """
+        results = [(None, 0, None)] * len(customer_names)
+        if not self.members:
+            return results
+
+        pending = []
+        for position, customer_name in enumerate(customer_names):
+            query = (customer_name or '').lower().strip()
+            if not query:
+                continue
+            exact = self._exact.get(query)
+            if exact:
+                index, match_type = exact
+                results[position] = (self.members[index], 100, match_type)
+            else:
+                pending.append((position, query))
+
+        if not pending:
+            return results
+
+        queries = [query for _, query in pending]
+        name_scores = process.cdist(queries, self._names, scorer=fuzz.token_sort_ratio, dtype=np.float64)
+        handle_scores = process.cdist(queries, self._handles, scorer=fuzz.token_sort_ratio, dtype=np.float64)
+        # partial_ratio is 100 exactly when the shorter string is contained in the longer one
+        containment = process.cdist(queries, self._names, scorer=fuzz.partial_ratio, score_cutoff=100)
+
+        has_name = np.array([bool(n) for n in self._names])
+        has_handle = np.array([bool(h) for h in self._handles])
+        name_scores = np.where((name_scores >= self.threshold) & has_name, name_scores, -1)
+        handle_scores = np.where((handle_scores >= self.threshold) & has_handle, handle_scores, -1)
+        partial_scores = np.where((containment >= 100) & has_name, PARTIAL_MATCH_SCORE, -1)
+
+        # Candidates laid out member by member as (name, handle, partial) so argmax
+        # picks the earliest candidate on ties
+        candidates = np.stack([name_scores, handle_scores, partial_scores], axis=2)
+        candidates = candidates.reshape(len(queries), -1)
+        best = candidates.argmax(axis=1)
+        match_types = ("fuzzy_name", "fuzzy_handle", "partial_name")
+
+        for row, (position, _) in enumerate(pending):
+            score = float(candidates[row, best[row]])
+            if score <= 0:
+                continue
+            member_index, kind = divmod(int(best[row]), 3)
+            results[position] = (self.members[member_index], score, match_types[kind])
+
+        return results
@@ -0,0 +1,97 @@
+# In-process pub/sub for pushing live updates to connected clients
+import asyncio
+import json
+from typing import Callable, Optional
+
+
+class Subscription:
+    """One connected client (browser tab) and its pending events"""
+
+    def __init__(self, user: dict, queue_size: int):
+        self.user = user
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, message: str):
+        # A slow client loses its oldest events rather than blocking publishers
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+
+class NotificationHub:
+    """
+    Fan-out of server events to subscribed clients, keyed by username.
+
+    Publishing is cheap and never blocks: each subscriber has a bounded queue
+    drained by its own streaming response. Publishes from other threads (e.g.
+    scheduler jobs running their own event loop) are handed to the hub's loop.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._loop = None
+
+    def subscribe(self, user: dict) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(user, self.queue_size)
+        self._subscribers.setdefault(user["username"], set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        username = subscription.user["username"]
+        subscriptions = self._subscribers.get(username)
+        if subscriptions:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[username]
+
+    def connected_users(self) -> list:
+        """One user dict per connected username"""
+        return [next(iter(subs)).user for subs in self._subscribers.values() if subs]
+
+    def is_connected(self, username: str) -> bool:
+        return bool(self._subscribers.get(username))
+
+    def publish(self, username: str, event: str, data: dict):
+        """Send an event to every connection of one user"""
+        self._dispatch(lambda user: user["username"] == username, event, data)
+
+    def publish_where(self, predicate: Callable[[dict], bool], event: str, data: dict):
+        """Send an event to every connection whose user matches `predicate`"""
+        self._dispatch(predicate, event, data)
+
+    def _dispatch(self, predicate, event: str, data: dict):
+        if not self._subscribers:
+            return
+        message = format_sse(event, data)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self._loop is not None and running is not self._loop:
+            try:
+                self._loop.call_soon_threadsafe(self._deliver, predicate, message)
+            except RuntimeError:
+                pass  # Hub loop already closed (shutdown)
+        else:
+            self._deliver(predicate, message)
+
+    def _deliver(self, predicate, message: str):
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                if predicate(subscription.user):
+                    subscription.put(message)
+
+
+def format_sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """Encode one Server-Sent Events frame"""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
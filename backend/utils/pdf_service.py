@@ -0,0 +1,129 @@
+# Process pool for CPU-heavy PDF parsing and rendering
+import asyncio
+import logging
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PDFServiceError(RuntimeError):
+    """A PDF job failed because its worker died (crash or memory cap)"""
+
+
+class PDFServiceTimeout(PDFServiceError, TimeoutError):
+    """A PDF job took longer than the service timeout"""
+
+
+def _limit_worker_memory(limit_bytes: Optional[int]):
+    """Pool initializer: cap the worker's address space so one huge PDF can't exhaust the host"""
+    if not limit_bytes:
+        return
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+    except (ImportError, ValueError, OSError):
+        pass  # Not supported on this platform; run uncapped
+
+
+class PDFService:
+    """
+    Runs PDF functions (PyMuPDF / PyPDF2) in a pool of worker processes so that
+    rendering scales across cores and never blocks the API's event loop.
+
+    - Jobs must be picklable top-level functions taking plain data (bytes, dicts).
+    - At most `max_workers` jobs run at once; up to `max_pending` more may wait.
+      Callers beyond that wait for a slot before their job is submitted.
+    - A job exceeding `timeout` seconds raises PDFServiceTimeout. Its pool is
+      retired: new jobs go to a fresh pool, jobs already running on the old one
+      finish, and then the old workers (including the runaway one) are killed.
+    - If a worker dies, its pool is broken and every job on it fails with
+      PDFServiceError; the next job starts a fresh pool.
+    - Workers are spawned (not forked) and capped at `memory_limit_mb` of address
+      space; a job that exceeds it fails with MemoryError or PDFServiceError.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: float = 60,
+        memory_limit_mb: Optional[int] = 1024,
+        max_pending: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_pending = max_pending or self.max_workers * 4
+        self._pool = None
+        self._active = {}  # pool -> number of jobs awaiting a result from it
+        self._retired = set()
+        self._slots = weakref.WeakKeyDictionary()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            limit = self.memory_limit_mb * 1024 * 1024 if self.memory_limit_mb else None
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_worker_memory,
+                initargs=(limit,),
+            )
+        return self._pool
+
+    def _slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slot = self._slots.get(loop)
+        if slot is None:
+            slot = asyncio.Semaphore(self.max_workers + self.max_pending)
+            self._slots[loop] = slot
+        return slot
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None):
+        """Run `fn(*args)` in a worker process and return its result"""
+        loop = asyncio.get_running_loop()
+        async with self._slot():
+            pool = self._executor()
+            self._active[pool] = self._active.get(pool, 0) + 1
+            try:
+                future = loop.run_in_executor(pool, fn, *args)
+                return await asyncio.wait_for(future, timeout or self.timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"PDF job {fn.__name__} timed out after {timeout or self.timeout}s; retiring pool")
+                self._retire(pool)
+                raise PDFServiceTimeout(f"{fn.__name__} timed out")
+            except BrokenProcessPool as e:
+                logger.error(f"PDF worker died running {fn.__name__}; restarting pool")
+                self._retire(pool)
+                raise PDFServiceError(f"{fn.__name__} failed: worker process died") from e
+            finally:
+                self._active[pool] -= 1
+                if pool in self._retired and not self._active[pool]:
+                    self._terminate(pool)
+
+    def _retire(self, pool: ProcessPoolExecutor):
+        """Stop sending jobs to a pool; it is terminated once its other jobs are done"""
+        if self._pool is pool:
+            self._pool = None
+        self._retired.add(pool)
+
+    def _terminate(self, pool: ProcessPoolExecutor):
+        """Kill a pool's workers, including any still running an abandoned job"""
+        self._retired.discard(pool)
+        self._active.pop(pool, None)
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def shutdown(self):
+        """Stop all workers (call on application shutdown)"""
+        for pool in list(self._retired):
+            self._terminate(pool)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -3,6 +3,7 @@ import "@/App.css";
 import { BrowserRouter, Routes, Route, Navigate, useNavigate } from "react-router-dom";
 import axios from "axios";
 import { toast } from "sonner";
+import { useNotificationStream } from "@/hooks/use-notification-stream";
 import Login from "@/pages/Login";
 import Dashboard from "@/pages/Dashboard";
 import UserManagement from "@/pages/UserManagement";
@@ -116,6 +117,37 @@ function MessageNotifier() {
   const isFirstLoad = useRef(true);
   const navigate = useNavigate();
 
+  const handleUnreadCount = (newCount) => {
+    // Check if we have new messages (count increased)
+    // Don't show notification on first load
+    if (!isFirstLoad.current && newCount > previousUnreadCount.current) {
+      const newMessages = newCount - previousUnreadCount.current;
+      toast.info(
+        `You have ${newMessages} new private message${newMessages > 1 ? 's' : ''}!`,
+        {
+          duration: 5000,
+          action: {
+            label: 'View',
+            onClick: () => navigate('/messages')
+          }
+        }
+      );
+    }
+
+    // Update the counts
+    previousUnreadCount.current = newCount;
+
+    // Mark first load as complete
+    if (isFirstLoad.current) {
+      isFirstLoad.current = false;
+    }
+  };
+
+  // Counts are pushed by the server when messages arrive or are read
+  useNotificationStream({
+    unread_messages: (data) => handleUnreadCount(data.unread_count),
+  });
+
   useEffect(() => {
     const fetchUnreadCount = async () => {
       try {
@@ -125,41 +157,13 @@ function MessageNotifier() {
         const response = await axios.get(`${API}/messages/unread/count`, {
           headers: { Authorization: `Bearer ${token}` },
         });
-        const newCount = response.data.unread_count;
-
-        // Check if we have new messages (count increased)
-        // Don't show notification on first load
-        if (!isFirstLoad.current && newCount > previousUnreadCount.current) {
-          const newMessages = newCount - previousUnreadCount.current;
-          toast.info(
-            `You have ${newMessages} new private message${newMessages > 1 ? 's' : ''}!`,
-            {
-              duration: 5000,
-              action: {
-                label: 'View',
-                onClick: () => navigate('/messages')
-              }
-            }
-          );
-        }
-
-        // Update the counts
-        previousUnreadCount.current = newCount;
-
-        // Mark first load as complete
-        if (isFirstLoad.current) {
-          isFirstLoad.current = false;
-        }
+        handleUnreadCount(response.data.unread_count);
       } catch (error) {
         console.error("Failed to fetch unread messages count:", error);
       }
     };
 
-    // Fetch immediately and then every 30 seconds
     fetchUnreadCount();
-    const interval = setInterval(fetchUnreadCount, 30000);
-
-    return () => clearInterval(interval);
   }, [navigate]);
 
   return null;
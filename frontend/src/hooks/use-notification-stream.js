@@ -0,0 +1,99 @@
+import { useEffect, useRef } from "react";
+import axios from "axios";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+const RECONNECT_DELAY_MS = 5000;
+
+// One EventSource per tab, shared by every component that listens
+let source = null;
+let sourceToken = null;
+let opening = false;
+let reconnectTimer = null;
+const listeners = new Set();
+const EVENTS = ["private_message", "unread_messages", "upcoming_events", "support_messages"];
+
+async function openStream() {
+  const token = localStorage.getItem("token");
+  if (!token || opening || (source && sourceToken === token)) return;
+  closeStream();
+
+  opening = true;
+  try {
+    // EventSource can't send headers, so the stream is opened with a short-lived
+    // one-time ticket instead of putting the session token in the URL
+    const response = await axios.post(`${API}/notifications/stream-ticket`, {}, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (listeners.size === 0 || localStorage.getItem("token") !== token) return;
+
+    sourceToken = token;
+    source = new EventSource(
+      `${API}/notifications/stream?ticket=${encodeURIComponent(response.data.ticket)}`
+    );
+    EVENTS.forEach((event) => {
+      source.addEventListener(event, (e) => {
+        let data;
+        try {
+          data = JSON.parse(e.data);
+        } catch {
+          return;
+        }
+        listeners.forEach((listener) => listener(event, data));
+      });
+    });
+    // The browser would retry with the same (already used) ticket; reconnect with a new one
+    source.onerror = () => {
+      closeStream();
+      scheduleReconnect();
+    };
+  } catch (error) {
+    if (error.response?.status !== 401) scheduleReconnect();
+  } finally {
+    opening = false;
+  }
+}
+
+function scheduleReconnect() {
+  if (reconnectTimer || listeners.size === 0) return;
+  reconnectTimer = setTimeout(() => {
+    reconnectTimer = null;
+    if (listeners.size > 0) openStream();
+  }, RECONNECT_DELAY_MS);
+}
+
+function closeStream() {
+  if (source) {
+    source.close();
+    source = null;
+    sourceToken = null;
+  }
+}
+
+/**
+ * Subscribe to live server notifications (new messages, badge counts).
+ * `handlers` maps event names to callbacks, e.g. { unread_messages: (data) => ... }.
+ * The server sends current counts as soon as the stream opens (and reopens).
+ */
+export function useNotificationStream(handlers) {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    const listener = (event, data) => {
+      const handler = handlersRef.current[event];
+      if (handler) handler(data);
+    };
+    listeners.add(listener);
+    openStream();
+
+    return () => {
+      listeners.delete(listener);
+      if (listeners.size === 0) {
+        clearTimeout(reconnectTimer);
+        reconnectTimer = null;
+        closeStream();
+      }
+    };
+  }, []);
+}
@@ -46,6 +46,7 @@ import {
 import { LogOut, Plus, Pencil, Trash2, Download, Users, Mail, Phone, MapPin, MessageCircle, Clock, LifeBuoy, FileText, Calendar, Star, DollarSign, Headphones, Settings, Menu, Key, Database, Lightbulb, Shield, Send, ChevronUp, ChevronDown, X, Eye, CreditCard } from "lucide-react";
 import { useNavigate } from "react-router-dom";
 import { Badge } from "@/components/ui/badge";
+import { useNotificationStream } from "@/hooks/use-notification-stream";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -324,14 +325,14 @@ export default function Dashboard({ onLogout, userRole, userPermissions, userCha
     fetchUpcomingEventsCount();
     fetchTotalExperience();
     fetchMyDues();
-    // Auto-refresh counts every 30 seconds
-    const interval = setInterval(() => {
-      fetchUnreadPrivateCount();
-      fetchUpcomingEventsCount();
-    }, 30000);
-    return () => clearInterval(interval);
   }, [userRole]);
 
+  // Badge counts are pushed by the server as they change
+  useNotificationStream({
+    unread_messages: (data) => setUnreadPrivateCount(data.unread_count),
+    upcoming_events: (data) => setUpcomingEventsCount(data.count),
+  });
+
   const fetchMyDues = async () => {
     try {
       setMyDuesLoading(true);
@@ -15,6 +15,7 @@ import {
   AlertDialogTitle,
 } from "@/components/ui/alert-dialog";
 import { useNavigate } from "react-router-dom";
+import { useNotificationStream } from "@/hooks/use-notification-stream";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -107,21 +108,24 @@ export default function Messages() {
     fetchConversations();
     fetchAllUsers();
     fetchArchivedConversations();
-    
-    // Auto-refresh every 15 seconds
-    const interval = setInterval(() => {
+  }, [showArchived]);
+
+  // Live updates instead of polling: the unread count is pushed when a message
+  // arrives, when messages are read and whenever the stream (re)connects
+  useNotificationStream({
+    unread_messages: () => {
       if (showArchived) {
         fetchArchivedConversations();
       } else {
         fetchConversations();
       }
-      if (selectedUser) {
+    },
+    private_message: (message) => {
+      if (message.sender === selectedUser) {
         fetchMessages(selectedUser);
       }
-    }, 15000);
-    
-    return () => clearInterval(interval);
-  }, [showArchived]);
+    },
+  });
 
   useEffect(() => {
     if (selectedUser) {
@@ -11,6 +11,7 @@ import {
 import { Textarea } from "@/components/ui/textarea";
 import { ArrowLeft, Mail, CheckCircle, Clock, Download, Trash2 } from "lucide-react";
 import { useNavigate } from "react-router-dom";
+import { useNotificationStream } from "@/hooks/use-notification-stream";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -27,6 +28,15 @@ export default function SupportCenter({ onLogout }) {
     fetchMessages();
   }, []);
 
+  // The open-ticket count is pushed when a message is submitted, replied to or deleted
+  useNotificationStream({
+    support_messages: (data) => {
+      if (!loading && data.count !== messages.filter(m => m.status === "open").length) {
+        fetchMessages();
+      }
+    },
+  });
+
   const fetchMessages = async () => {
     try {
       const token = localStorage.getItem("token");